@@ -0,0 +1 @@
+# Project Path: benchmarks/__init__.py
@@ -0,0 +1,229 @@
+# Project Path: benchmarks/bench_extraction.py
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+from benchmarks.corpus import LAYOUTS, ensure_corpus
+from core.FFmpegPaths import BASE_DIR, check_ffmpeg_exists
+
+DEFAULT_CORPUS_ROOT = os.path.join(BASE_DIR, "bench_corpus")
+DEFAULT_RESULTS_DIR = os.path.join(BASE_DIR, "bench_results")
+
+# 完整矩阵；--quick 时只取每个维度的第一个值
+MATRIX = {
+    "layout": list(LAYOUTS),
+    "mode": [("seconds", 1), ("seconds", 30), ("frames", 25), ("keyframes", 0)],
+    "format": ["png", "jpg", "webp"],
+    "output": ["files", "tar"],
+    "jobs": [1, 4, os.cpu_count() or 4],
+}
+
+# 编码吞吐测试：固定语料与采样（解码量相同），只改变图片编码设置，比较各格式每秒编码的帧数与像素数。
+# (名称, 图片格式, 额外命令行参数)；--quick 时只跑前三项
+ENCODE_LAYOUT = "few_huge"
+ENCODE_MODE = ("frames", 10)
+ENCODE_CASES = [
+    ("png", "png", []),
+    ("jpg", "jpg", []),
+    ("webp", "webp", []),
+    ("png-level1", "png", ["--compression-level", "1"]),
+    ("webp-method0", "webp", ["--compression-level", "0"]),
+    ("png-rgb24", "png", ["--pix-fmt", "rgb24"]),
+    ("png-640w-fast", "png", ["--width", "640", "--scaler", "fast_bilinear"]),
+    ("jpg-640w-fast", "jpg", ["--width", "640", "--scaler", "fast_bilinear"]),
+    ("webp-640w-fast", "webp", ["--width", "640", "--scaler", "fast_bilinear"]),
+]
+
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        return result.stdout.decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def run_case(corpus_dir, mode, param, image_format, jobs, output="files", extra_args=()):
+    # 每个用例在独立的命令行子进程中运行，wait4 取得该子进程及其 ffmpeg 的峰值内存与 CPU 时间。
+    # 语料中同规格的片段内容完全相同，需关闭重复视频跳过，否则 40 个短片只会提取 1 个；
+    # 也不读写用户的隔离名单，保证每次测量的工作量一致
+    cmd = [sys.executable, "-m", "core", corpus_dir, "--mode", mode, "-n", str(param),
+           "--format", image_format, "-j", str(jobs), "--no-probe-cache", "--keep-duplicate-videos",
+           "--no-quarantine", "--cpu", *extra_args]
+    if output == "tar":
+        cmd.append("--tar-shards")
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=BASE_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = proc.stdout.read()
+    peak_rss_kb, cpu_seconds = None, None
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # Linux 下 ru_maxrss 单位为 KB，macOS 为字节
+        peak_rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+        cpu_seconds = usage.ru_utime + usage.ru_stime
+    else:
+        proc.wait()
+    wall = time.perf_counter() - start
+
+    output_root, metrics = None, None
+    for line in output.decode(errors="ignore").splitlines():
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if event.get("event") == "finished":
+            output_root = event.get("output_root")
+        elif event.get("event") == "metrics":
+            metrics = event
+    if proc.returncode != 0 or not output_root or not metrics:
+        raise RuntimeError(f"用例执行失败: {' '.join(cmd)}")
+
+    # 帧数与字节数取自引擎的运行统计，单文件与 tar 分片两种输出一致
+    frames, bytes_written = metrics["frames"], metrics["output_bytes"]
+    shutil.rmtree(output_root, ignore_errors=True)
+    return {
+        "wall_seconds": round(wall, 3),
+        "frames": frames,
+        "frames_per_second": round(frames / wall, 2) if wall > 0 else None,
+        "bytes_written": bytes_written,
+        "peak_rss_kb": peak_rss_kb,
+        "cpu_seconds": round(cpu_seconds, 3) if cpu_seconds is not None else None,
+    }
+
+
+def new_results(args):
+    return {
+        "revision": git_revision(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "repeat": args.repeat,
+        "cases": [],
+        "encode": [],
+    }
+
+
+def run_matrix(args, results):
+    matrix = {key: values[:1] if args.quick else values for key, values in MATRIX.items()}
+    if args.layout:
+        matrix["layout"] = args.layout
+    if args.jobs:
+        matrix["jobs"] = args.jobs
+    matrix["jobs"] = sorted(set(matrix["jobs"]))
+
+    for layout, (mode, param), image_format, output, jobs in itertools.product(
+            matrix["layout"], matrix["mode"], matrix["format"], matrix["output"], matrix["jobs"]):
+        corpus_dir = ensure_corpus(args.corpus, layout)
+        runs = [run_case(corpus_dir, mode, param, image_format, jobs, output) for _ in range(args.repeat)]
+        # 多次重复取墙钟时间最短的一次，减少系统抖动的影响
+        best = min(runs, key=lambda r: r["wall_seconds"])
+        case = {"layout": layout, "mode": mode, "param": param, "format": image_format, "output": output,
+                "jobs": jobs, **best}
+        print(json.dumps(case, ensure_ascii=False))
+        results["cases"].append(case)
+    return results
+
+
+def run_encode_sweep(args, results):
+    layout = args.layout[0] if args.layout else ENCODE_LAYOUT
+    corpus_dir = ensure_corpus(args.corpus, layout)
+    mode, param = ENCODE_MODE
+    jobs = args.jobs[0] if args.jobs else os.cpu_count() or 4
+    for name, image_format, extra_args in ENCODE_CASES[:3] if args.quick else ENCODE_CASES:
+        runs = [run_case(corpus_dir, mode, param, image_format, jobs, extra_args=extra_args)
+                for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["wall_seconds"])
+        # 同一语料、同一采样下解码量相同，差异来自编码：每帧 CPU 时间与输出字节数直接反映编码开销
+        case = {"encode": name, "layout": layout, "format": image_format, "args": extra_args, "jobs": jobs, **best,
+                "mb_per_second": round(best["bytes_written"] / (1024 * 1024) / best["wall_seconds"], 2)
+                if best["wall_seconds"] else None,
+                "cpu_ms_per_frame": round(best["cpu_seconds"] * 1000 / best["frames"], 2)
+                if best["cpu_seconds"] is not None and best["frames"] else None,
+                "kb_per_frame": round(best["bytes_written"] / 1024 / best["frames"], 1) if best["frames"] else None}
+        print(json.dumps(case, ensure_ascii=False))
+        results["encode"].append(case)
+    return results
+
+
+def case_key(case):
+    # 早期结果没有 output 字段，均为单文件输出
+    return case["layout"], case["mode"], case["param"], case["format"], case.get("output", "files"), case["jobs"]
+
+
+def compare(base_path, new_path):
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = {case_key(c): c for c in json.load(f)["cases"]}
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)["cases"]
+    print(f"{'用例':<48}{'基准(s)':>10}{'新(s)':>10}{'加速比':>8}")
+    for case in new:
+        old = base.get(case_key(case))
+        if not old:
+            continue
+        label = "/".join(str(v) for v in case_key(case))
+        speedup = old["wall_seconds"] / case["wall_seconds"] if case["wall_seconds"] else float("inf")
+        print(f"{label:<48}{old['wall_seconds']:>10.2f}{case['wall_seconds']:>10.2f}{speedup:>8.2f}x")
+    # 编码吞吐按名称对比（早期结果没有 encode 部分）
+    with open(base_path, "r", encoding="utf-8") as f:
+        base_encode = {c["encode"]: c for c in json.load(f).get("encode", [])}
+    with open(new_path, "r", encoding="utf-8") as f:
+        new_encode = json.load(f).get("encode", [])
+    if base_encode and new_encode:
+        print(f"{'编码':<48}{'基准(帧/s)':>10}{'新(帧/s)':>10}{'加速比':>8}")
+    for case in new_encode:
+        old = base_encode.get(case["encode"])
+        if not old or not old["frames_per_second"] or not case["frames_per_second"]:
+            continue
+        speedup = case["frames_per_second"] / old["frames_per_second"]
+        print(f"{case['encode']:<48}{old['frames_per_second']:>10.2f}{case['frames_per_second']:>10.2f}"
+              f"{speedup:>8.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_extraction",
+                                     description="提取引擎基准测试：生成确定性的合成视频并跑模式/格式/并发矩阵")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_ROOT, help="合成语料目录")
+    parser.add_argument("--output", default=None, help="结果 JSON 路径，默认写入 bench_results/")
+    parser.add_argument("--layout", action="append", choices=list(LAYOUTS), help="只跑指定语料布局，可重复")
+    parser.add_argument("--jobs", action="append", type=int, help="只跑指定并发数，可重复")
+    parser.add_argument("--repeat", type=int, default=1, help="每个用例重复次数，取最快一次")
+    parser.add_argument("--quick", action="store_true", help="每个维度只取第一个值，用于冒烟测试")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="比较两次结果文件")
+    encode_group = parser.add_mutually_exclusive_group()
+    encode_group.add_argument("--encode-only", action="store_true", help="只跑各图片格式 / 编码设置的编码吞吐测试")
+    encode_group.add_argument("--no-encode", action="store_true", help="跳过编码吞吐测试")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    check_ffmpeg_exists(gui_mode=False)
+    results = new_results(args)
+    if not args.encode_only:
+        run_matrix(args, results)
+    if not args.no_encode:
+        run_encode_sweep(args, results)
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"{results['timestamp'].replace(':', '')}_{results['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# Project Path: benchmarks/corpus.py
+import json
+import os
+import subprocess
+
+from core.FFmpegPaths import FFMPEG_BIN, CREATE_NO_WINDOW
+
+# 单个合成视频的规格：(lavfi 源, 宽, 高, 编码器, GOP, 时长秒, 帧率)
+# testsrc2 画面变化规律、压缩快；mandelbrot 细节多、接近真实素材的编码负担
+LAYOUTS = {
+    # 大量短小片段：考察进程启动、探测开销与并发
+    "many_small": [("testsrc2", 640, 360, "libx264", 30, 2, 25)] * 40,
+    # 少量超长大文件：考察解码吞吐与调度长尾
+    "few_huge": [
+        ("mandelbrot", 1920, 1080, "libx264", 250, 120, 25),
+        ("testsrc2", 3840, 2160, "libx264", 48, 60, 24),
+    ],
+    # 混合：多个短片 + 一个长片，GOP 与编码格式各不相同
+    "mixed": [("testsrc2", 1280, 720, "libx264", 12, 5, 30)] * 12 + [
+        ("testsrc2", 1280, 720, "mpeg4", 250, 5, 30),
+        ("mandelbrot", 1920, 1080, "libx265", 120, 90, 25),
+    ],
+}
+
+
+def corpus_signature(specs):
+    return json.dumps(specs, sort_keys=True)
+
+
+def build_generate_cmd(spec, output_path):
+    source, width, height, codec, gop, duration, fps = spec
+    if source == "mandelbrot":
+        lavfi = f"mandelbrot=size={width}x{height}:rate={fps}"
+    else:
+        lavfi = f"{source}=size={width}x{height}:rate={fps}"
+    cmd = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+           "-f", "lavfi", "-i", lavfi, "-t", str(duration),
+           "-c:v", codec, "-g", str(gop), "-pix_fmt", "yuv420p",
+           # bitexact 保证不同机器、多次生成得到相同的文件
+           "-fflags", "+bitexact", "-flags:v", "+bitexact"]
+    if codec in ("libx264", "libx265"):
+        cmd += ["-preset", "ultrafast", "-threads", "1"]
+    cmd.append(output_path)
+    return cmd
+
+
+def ensure_corpus(root, layout):
+    # 生成（或复用已生成的）测试语料，返回语料目录
+    specs = LAYOUTS[layout]
+    corpus_dir = os.path.join(root, layout)
+    stamp_path = os.path.join(corpus_dir, ".corpus.json")
+    signature = corpus_signature(specs)
+    try:
+        with open(stamp_path, "r", encoding="utf-8") as f:
+            if f.read() == signature:
+                return corpus_dir
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    for index, spec in enumerate(specs):
+        source, width, height, codec, gop, duration, fps = spec
+        # 分子目录存放，同时覆盖递归扫描
+        sub_dir = os.path.join(corpus_dir, f"group_{index // 10:02d}")
+        os.makedirs(sub_dir, exist_ok=True)
+        name = f"{index:03d}_{source}_{width}x{height}_{codec}_g{gop}_{duration}s.mp4"
+        print(f"生成语料: {layout}/{name}")
+        subprocess.run(build_generate_cmd(spec, os.path.join(sub_dir, name)),
+                       check=True, creationflags=CREATE_NO_WINDOW)
+    with open(stamp_path, "w", encoding="utf-8") as f:
+        f.write(signature)
+    return corpus_dir
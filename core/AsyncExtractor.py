@@ -0,0 +1,130 @@
+# Project Path: core/AsyncExtractor.py
+import asyncio
+import os
+
+from core.FFmpegCommands import (
+    MODE_SCENES, STRATEGY_SEEK, choose_strategy, seek_timestamps, build_seek_cmds, build_linear_cmd
+)
+from core.FFmpegPaths import CREATE_NO_WINDOW
+from core.OutputSpecs import parse_output_spec
+from core.ProgressTracker import FFmpegProgressParser
+from core.RunManifest import list_frame_files
+from core.VideoProbe import build_probe_cmd, parse_probe_output
+from core.VideoScanner import output_subdir
+
+
+# 基于 asyncio 子进程的提取接口，便于嵌入异步服务：一个事件循环即可驱动大量并发提取，
+# 不需要为每个视频占用一个线程。并发数由信号量限制；任务被取消时结束对应的 ffmpeg
+class AsyncExtractor:
+    def __init__(self, max_concurrency=4, threads=None, use_gpu=False, dedup_threshold=None):
+        self.semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        # 单个 ffmpeg 的解码线程数，默认按并发数平分 CPU 核心
+        self.threads = threads or max(1, (os.cpu_count() or 4) // max(1, int(max_concurrency)))
+        self.use_gpu = use_gpu
+        self.dedup_threshold = dedup_threshold
+
+    @staticmethod
+    async def _run(cmd, on_progress=None):
+        # 与 ExtractionEngine.run_process 相同：传入 on_progress 时让 ffmpeg 把 -progress 写到 stdout 边运行边解析
+        if on_progress is not None:
+            cmd = cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, creationflags=CREATE_NO_WINDOW)
+        err_task = None
+        try:
+            if on_progress is None:
+                out, err = await proc.communicate()
+                return proc.returncode, out, err
+            # stderr 同时读取，避免管道写满导致 ffmpeg 阻塞
+            err_task = asyncio.ensure_future(proc.stderr.read())
+            parser = FFmpegProgressParser()
+            async for raw in proc.stdout:
+                progress = parser.feed(raw.decode(errors="ignore"))
+                if progress is not None:
+                    on_progress(progress)
+            err = await err_task
+            await proc.wait()
+            return proc.returncode, b"", err
+        finally:
+            if proc.returncode is None:
+                # 被取消或读取出错：ffmpeg 不会自行退出，结束它并回收
+                proc.kill()
+                await proc.wait()
+            if err_task is not None and not err_task.done():
+                err_task.cancel()
+
+    async def probe(self, path):
+        returncode, out_bytes, err_bytes = await self._run(build_probe_cmd(path))
+        if returncode != 0:
+            raise ValueError(err_bytes.decode(errors="ignore").strip() or "ffprobe 执行失败")
+        return parse_probe_output(path, out_bytes.decode(errors="ignore"))
+
+    def build_cmds(self, video, meta, spec, output_pattern):
+        # 与引擎相同的策略：间隔明显大于关键帧间隔时跳转解码；否则顺序解码。裁剪与缩放都在滤镜链末尾
+        if not self.dedup_threshold and choose_strategy(meta, spec.mode, spec.param) == STRATEGY_SEEK:
+            timestamps = seek_timestamps(meta, spec.param)
+            return build_seek_cmds(video, output_pattern, timestamps, self.use_gpu, spec.encoding())
+        return [build_linear_cmd(video, output_pattern, spec.mode, spec.param, self.threads, self.use_gpu,
+                                 spec.encoding(), self.dedup_threshold)]
+
+    async def extract(self, video, spec, output_dir, on_progress=None):
+        # 提取单个视频到 output_dir；spec 为 OutputSpec 或同格式的 dict（与多输出任务定义中的一项相同）。
+        # 返回 {"video", "output_dir", "frames", "duration", "fps"}，失败时抛出 ValueError
+        if isinstance(spec, dict):
+            spec = parse_output_spec(spec)
+        if spec.mode == MODE_SCENES:
+            raise ValueError("异步接口暂不支持场景切换模式")
+        async with self.semaphore:
+            meta = await self.probe(video)
+            os.makedirs(output_dir, exist_ok=True)
+            output_pattern = os.path.join(output_dir, f"frame_%04d.{spec.image_format}")
+            frames = 0
+            for cmd in self.build_cmds(video, meta, spec, output_pattern):
+                report = None
+                if on_progress is not None:
+                    # 跳转解码分多个进程，帧数按进程累计
+                    report = lambda progress, base=frames: on_progress(dict(progress, frames=base + progress["frames"]))
+                returncode, _, err_bytes = await self._run(cmd, report)
+                if returncode != 0:
+                    raise ValueError(err_bytes.decode(errors="ignore").strip()[-500:] or "ffmpeg 执行失败")
+                frames = len(list_frame_files(output_dir))
+        return {"video": video, "output_dir": output_dir, "frames": frames,
+                "duration": meta.duration, "fps": round(meta.fps, 2)}
+
+    async def extract_many(self, videos, spec, output_root, folder=None):
+        # 批量提取，以异步迭代器逐个产出事件：
+        #   {"event": "progress", "video", "frames", "fps", "speed", "out_time", "end"}
+        #   {"event": "done", "video", "output_dir", "frames", "duration", "fps"}
+        #   {"event": "error", "video", "message"}
+        # 输出子目录按相对 folder（默认为各视频的公共上级目录）的路径命名，与界面 / 命令行一致。
+        # 提前结束迭代时（break 后 aclose，或外层任务被取消）会取消其余提取并结束对应的 ffmpeg
+        videos = list(videos)
+        if not videos:
+            return
+        folder = folder or os.path.commonpath([os.path.dirname(os.path.abspath(v)) for v in videos])
+        events = asyncio.Queue()
+
+        async def run_one(path):
+            output_dir = os.path.join(output_root, output_subdir(folder, os.path.abspath(path)))
+            try:
+                result = await self.extract(path, spec, output_dir, on_progress=lambda progress: events.put_nowait(
+                    dict(progress, event="progress", video=path)))
+                events.put_nowait(dict(result, event="done"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                events.put_nowait({"event": "error", "video": path, "message": str(e)})
+
+        # 任务数可以远大于并发数，未拿到信号量的任务只是挂起等待，不占用进程或线程
+        tasks = [asyncio.ensure_future(run_one(path)) for path in videos]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await events.get()
+                if event["event"] != "progress":
+                    remaining -= 1
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,899 @@
+# Project Path: core/ExtractionEngine.py
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+
+from core.FFmpegCommands import (
+    MODE_KEYFRAMES, MODE_SCENES, STRATEGY_SEEK, PIPE_OUTPUT, choose_strategy, count_framecrc_frames, count_showinfo_frames,
+    seek_timestamps, build_seek_cmds, build_seek_pipe_cmds, build_linear_cmd, build_multi_output_cmd,
+    build_scene_detect_cmd, harden_cmd, parse_showinfo_times, plan_scene_timestamps
+)
+from core.FFmpegPaths import CREATE_NO_WINDOW
+from core.FolderWatcher import DEFAULT_STABLE_SECONDS, FolderWatcher
+from core.FrameShards import ImageStreamSplitter, ShardWriter
+from core.ImageEncoding import DEFAULT_SCALER, ImageEncoding
+from core.JobScheduler import JobScheduler, estimate_cost, estimate_multi_cost
+from core.ProcessWatchdog import (
+    MIN_STALL_SECONDS, MIN_TIMEOUT, PROBE_TIMEOUT, PROCESS_GROUP_KWARGS, ProcessTimeout, ProcessWatchdog,
+    extraction_limits, signal_process_group
+)
+from core.ProgressTracker import FFmpegProgressParser, ProgressTracker
+from core.RunManifest import (
+    WATCH_OUTPUT_NAME, RunManifest, find_resumable_root, new_output_root, list_frame_files, list_output_entries,
+    output_checksum
+)
+from core.RunMetrics import METRICS_JSONL, RunMetrics, wait_with_usage
+from core.Segments import SegmentPlan, resolve_segments, segment_meta
+from core.SourceDedup import DUPLICATES_NAME, SourceIndex, link_output, record_duplicate
+from core.VideoScanner import DEFAULT_EXTENSIONS, iter_videos, output_subdir
+from core.VideoProbe import VideoMeta, build_probe_cmd, parse_probe_output, estimate_frame_count
+
+
+def format_duration(seconds):
+    h = int(seconds) // 3600
+    m = (int(seconds) % 3600) // 60
+    s = int(seconds) % 60
+    return f"{h}h{m}m{s}s" if h else f"{m}m{s}s"
+
+
+# 使用 nvidia-smi 获取显卡型号
+def get_nvidia_gpu_info():
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=name", "--format=csv,noheader"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+        )
+        gpus = result.stdout.decode().strip().splitlines()
+        return gpus
+    except Exception:
+        return []
+
+
+@dataclass
+class VideoJob:
+    path: str
+    name: str
+    info: dict
+    output_dir: str
+    meta: VideoMeta
+    frame_count: int
+    cost: float = 0.0
+    segments: list = None       # 只处理的片段（Segment 列表）；None 表示整个视频
+    scope_duration: float = 0.0  # 实际处理的时长（秒），即各片段时长之和
+    dedup_candidates: int = 0    # 去重前的候选帧数（本次尝试中各进程累计）
+
+
+def _ignore(*args):
+    pass
+
+
+# 监视模式只在内存中保留最近这么多条结果记录，完整记录见清单与 metrics.jsonl
+WATCH_RESULT_LIMIT = 1000
+
+
+# 管道模式下每次从 ffmpeg stdout 读取的最大字节数
+PIPE_CHUNK_SIZE = 1024 * 1024
+# 流式扫描每凑够这么多个视频，或距上一批超过 SCAN_BATCH_SECONDS 秒，就送入探测
+SCAN_BATCH_SIZE = 64
+SCAN_BATCH_SECONDS = 0.2
+
+
+# 不依赖 Qt 的提取引擎：界面通过 WorkerThread 适配，命令行直接调用
+class ExtractionEngine:
+    def __init__(self, folder, mode, param, max_threads=4, image_format="png", jpg_quality=None,
+                 decoder_threads=None, probe_cache=None, incremental=False, use_gpu=None, shard_size=None,
+                 output_specs=None, dedup_threshold=None, scene_min_gap=0.0, scene_max_gap=0.0, width=None,
+                 height=None, scaler=DEFAULT_SCALER, crop=None, pix_fmt=None, compression_level=None,
+                 time_ranges=None, segment_csv=None, extensions=DEFAULT_EXTENSIONS, exclude=(), skip_duplicates=True,
+                 output_root=None, manifest_part=None, watch=False, stable_seconds=DEFAULT_STABLE_SECONDS,
+                 quarantine=None, on_scan=None, on_notice=None, on_progress=None, on_item=None, on_frames=None,
+                 on_stats=None, on_metrics=None):
+        self.folder = folder
+        self.mode = mode
+        self.param = param
+        self.max_threads = max(1, int(max_threads))  # 同时处理的视频数
+        # 单个 ffmpeg 的 -threads；未指定时由调度器按任务开销分配
+        self.decoder_threads = max(1, int(decoder_threads)) if decoder_threads else None
+        # 帧图片的编码与后处理（格式、质量 / 压缩级别、像素格式、裁剪与缩放）；jpg_quality 也用于 WebP
+        self.encoding = ImageEncoding(image_format, jpg_quality, compression_level, width, height, scaler, crop,
+                                      pix_fmt)
+        self.image_format = self.encoding.image_format
+        self.jpg_quality = self.encoding.quality
+        # 指定时帧图片不单独落盘，而是顺序写入该大小上限（字节）的 tar 分片
+        self.shard_size = shard_size
+        # 多输出任务（OutputSpec 列表）：一次解码同时生成多种输出，此时忽略 mode/param/image_format
+        self.output_specs = list(output_specs) if output_specs else None
+        if self.output_specs and shard_size:
+            raise ValueError("多输出任务暂不支持 tar 分片输出")
+        # 近似重复帧去除阈值；None 表示不去重
+        self.dedup_threshold = dedup_threshold
+        if dedup_threshold and mode == MODE_SCENES and not self.output_specs:
+            # 场景切换模式按检测出的时间点跳转取帧，不经过去重滤镜
+            raise ValueError("场景切换模式不支持去除近似重复帧")
+        # 场景切换模式下相邻取帧点的最小 / 最大间隔（秒），0 表示不限制
+        self.scene_min_gap = float(scene_min_gap or 0)
+        self.scene_max_gap = float(scene_max_gap or 0)
+        # 只处理的时间范围：全局的 [(开始, 结束或 None)]，以及按视频列出片段的 CSV 片段表
+        self.segment_plan = SegmentPlan(folder, time_ranges, segment_csv)
+        self.probe_cache = probe_cache
+        # 隔离名单（Quarantine）：跳过此前重试后仍失败的视频，并记录本次重试后仍失败的视频；None 表示不启用
+        self.quarantine = quarantine
+        # 扫描的视频扩展名与排除规则（glob，匹配相对路径或名称）
+        self.extensions = tuple(extensions)
+        self.exclude = tuple(exclude)
+        # 内容相同的视频只提取一次，其余引用（链接）已提取的输出
+        self.skip_duplicates = skip_duplicates
+        self.cached_meta = {}  # 预热阶段从缓存命中的探测结果
+        self._is_running = True
+        self._is_paused = False
+        self.pause_cond = threading.Condition()
+        # 事件回调：提示信息、单个视频完成进度、结果记录、提取帧数
+        self.on_notice = on_notice or _ignore
+        self.on_progress = on_progress or _ignore
+        self.on_item = on_item or _ignore
+        self.on_frames = on_frames or _ignore
+        # 扫描进度：已发现的视频数、扫描是否结束
+        self.on_scan = on_scan or _ignore
+        # 实时帧进度（节流后），含整批吞吐与预计剩余时间
+        self.progress_tracker = ProgressTracker(on_stats or _ignore)
+        # 运行结束后的分阶段耗时汇总
+        self.on_metrics = on_metrics or _ignore
+        self.metrics = RunMetrics()
+        # 监视模式：扫描完已有视频后不结束，持续处理新写完的视频，直到 stop()；
+        # 始终使用同一个输出目录并按续提方式跳过已完成的视频
+        self.watch = watch
+        self.stable_seconds = stable_seconds
+        if watch:
+            incremental = True
+            output_root = output_root or os.path.join(folder, WATCH_OUTPUT_NAME)
+        self.incremental = incremental
+        # 指定 output_root 时直接使用（集群模式下由协调端创建，各节点共用）
+        self.output_root = output_root
+        if incremental and not self.output_root:
+            # 增量模式：沿用参数一致的上一次输出目录，跳过已完成的视频
+            self.output_root = find_resumable_root(self.folder, self.extraction_params())
+        if not self.output_root:
+            self.output_root = new_output_root(self.folder)
+        os.makedirs(self.output_root, exist_ok=True)
+        # manifest_part：集群节点各自写入的清单分片名
+        self.manifest = RunManifest(self.output_root, self.folder, self.extraction_params(), manifest_part)
+        self.shard_writer = ShardWriter(self.output_root, shard_size) if shard_size else None
+        self.collected = []
+        self.total = 0
+        self.completed_count = 0
+        self.completed_lock = threading.Lock()
+        self.process_lock = threading.Lock()
+        self.running_processes = set()  # 保存所有正在运行的 subprocess
+        # 子进程超时或卡住时结束其进程组
+        self.watchdog = ProcessWatchdog()
+
+        # 自动检测 GPU；use_gpu=False 时强制 CPU 模式
+        self.gpu_models = get_nvidia_gpu_info() if use_gpu is not False else []
+        self.use_gpu = bool(self.gpu_models)
+
+    @property
+    def is_running(self):
+        return self._is_running
+
+    def extraction_params(self):
+        # 影响输出内容的参数，参数不同的运行不会互相续提
+        if self.output_specs:
+            params = {"outputs": [spec.to_dict() for spec in self.output_specs]}
+        else:
+            params = {
+                "mode": self.mode,
+                "param": self.param,
+                "image_format": self.image_format.lower(),
+                "jpg_quality": self.jpg_quality,
+                **self.encoding.extra_params(),
+            }
+            if self.mode == MODE_SCENES:
+                params["scene_gaps"] = [self.scene_min_gap, self.scene_max_gap]
+        params.update(self.segment_plan.params())
+        if self.shard_size:
+            params["output"] = "tar"
+        if self.dedup_threshold:
+            params["dedup"] = self.dedup_threshold
+        return params
+
+    def video_output_dir(self, path):
+        # 每个视频的输出子目录按源文件夹中的相对路径区分，不同子文件夹下的同名视频互不覆盖
+        return os.path.join(self.output_root, output_subdir(self.folder, path, self.extensions))
+
+    def member_prefix(self, output_dir):
+        # tar 分片中某个视频的成员名前缀，与单文件模式下的输出子目录一致
+        return os.path.relpath(output_dir, self.output_root).replace("\\", "/")
+
+    def spec_output_dirs(self, output_dir):
+        # 多输出任务中某个视频在各输出子文件夹下的目录：[(OutputSpec, 目录)]
+        rel = self.member_prefix(output_dir)
+        return [(spec, os.path.join(self.output_root, spec.name, rel)) for spec in self.output_specs]
+
+    def output_entries(self, output_dir):
+        # 某个视频当前的输出 [(名称, 字节数)]；多输出任务的名称带输出子文件夹前缀
+        if self.output_specs:
+            return [(f"{spec.name}/{frame_name}", size)
+                    for spec, spec_dir in self.spec_output_dirs(output_dir)
+                    for frame_name, size in list_output_entries(spec_dir)]
+        if self.shard_writer is not None:
+            return self.shard_writer.entries(self.member_prefix(output_dir))
+        return list_output_entries(output_dir)
+
+    def check_pause_and_stop(self):
+        with self.pause_cond:
+            while self._is_paused and self._is_running:
+                self.pause_cond.wait()
+            running = self._is_running
+        if not running:
+            # 停止子进程
+            self.terminate_processes()
+            raise RuntimeError("中止处理")
+
+    def terminate_processes(self):
+        with self.process_lock:
+            processes = list(self.running_processes)
+        for proc in processes:
+            signal_process_group(proc, signal.SIGTERM)
+
+    def run_process(self, cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, on_progress=None, on_usage=None,
+                    on_stdout=None, timeout=MIN_TIMEOUT, stall=None, media_duration=None):
+        # 启动子进程并登记，便于 stop() 时统一终止；
+        # 传入 on_progress 时让 ffmpeg 把 -progress 写到 stdout，边运行边解析；
+        # 传入 on_stdout 时 stdout 是数据流（如图片管道），按块交给回调。
+        # 子进程由看门狗监视：超过 timeout 秒、或有进度输出时 stall 秒内没有新帧，即结束整个进程组并抛出 ProcessTimeout；
+        # 给出 media_duration（秒）时按实际处理速度推算时限
+        self.check_pause_and_stop()
+        if on_progress is not None:
+            cmd = cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+        popen_kwargs = dict(PROCESS_GROUP_KWARGS)
+        popen_kwargs["creationflags"] = popen_kwargs.get("creationflags", 0) | CREATE_NO_WINDOW
+        proc = subprocess.Popen(cmd, stdout=stdout, stderr=stderr, shell=False, **popen_kwargs)
+        with self.process_lock:
+            self.running_processes.add(proc)
+        if not self._is_running:
+            # 登记前恰好收到 stop()，补一次终止
+            signal_process_group(proc, signal.SIGTERM)
+        watch = self.watchdog.watch(proc, timeout, stall if on_progress or on_stdout else None, media_duration)
+        try:
+            if on_stdout is not None:
+                chunks = [0]
+
+                def consume_chunk(chunk):
+                    # 管道模式没有 -progress，以收到数据作为进展
+                    chunks[0] += 1
+                    watch.advance(chunks[0], None)
+                    on_stdout(chunk)
+                out, err, usage = self._communicate_streaming(proc, lambda stream: self._read_chunks(stream, consume_chunk))
+            elif on_progress is not None:
+                def consume_progress(progress):
+                    watch.advance(progress["frames"], progress["out_time"])
+                    on_progress(progress)
+                out, err, usage = self._communicate_streaming(proc, lambda stream: self._read_progress(stream, consume_progress))
+            else:
+                out, err = proc.communicate()
+                usage = None
+            if usage is not None and on_usage is not None:
+                on_usage(usage)
+        finally:
+            self.watchdog.unwatch(watch)
+            with self.process_lock:
+                self.running_processes.discard(proc)
+        self.check_pause_and_stop()
+        if watch.reason is not None:
+            raise ProcessTimeout(watch.reason)
+        return proc.returncode, out, err
+
+    @staticmethod
+    def _communicate_streaming(proc, consume):
+        # stderr 在后台线程读取，避免管道写满导致 ffmpeg 阻塞；stdout 交给 consume 读完
+        err_chunks = []
+        err_thread = threading.Thread(target=lambda: err_chunks.append(proc.stderr.read()), daemon=True)
+        err_thread.start()
+        try:
+            consume(proc.stdout)
+        except BaseException:
+            # 回调出错（如写分片失败）时不能让 ffmpeg 卡在写满的管道上
+            proc.kill()
+            proc.wait()
+            raise
+        usage = wait_with_usage(proc)
+        err_thread.join()
+        return b"", b"".join(err_chunks), usage
+
+    @staticmethod
+    def _read_progress(stream, on_progress):
+        parser = FFmpegProgressParser()
+        for raw in stream:
+            progress = parser.feed(raw.decode(errors="ignore"))
+            if progress is not None:
+                on_progress(progress)
+
+    @staticmethod
+    def _read_chunks(stream, on_chunk):
+        while True:
+            chunk = stream.read1(PIPE_CHUNK_SIZE)
+            if not chunk:
+                return
+            on_chunk(chunk)
+
+    def pause(self):
+        with self.pause_cond:
+            self._is_paused = True
+
+    def resume(self):
+        with self.pause_cond:
+            self._is_paused = False
+            self.pause_cond.notify_all()
+
+    def stop(self):
+        with self.pause_cond:
+            self._is_running = False
+            self.pause_cond.notify_all()
+        # 终止所有子进程
+        self.terminate_processes()
+
+    def probe(self, path, tolerant=False):
+        # 获取视频信息：缓存命中则直接使用（用后即移除），否则调用 ffprobe 并写回缓存；
+        # tolerant 为 True 时使用容错参数并放宽时限，用于失败后的重试
+        meta = self.cached_meta.pop(path, None)
+        if meta is not None:
+            return meta
+        returncode, out_bytes, err_bytes = self.run_process(build_probe_cmd(path, tolerant),
+                                                            timeout=PROBE_TIMEOUT * (2 if tolerant else 1))
+        if returncode != 0:
+            raise ValueError(err_bytes.decode(errors="ignore").strip() or "ffprobe 执行失败")
+        meta = parse_probe_output(path, out_bytes.decode(errors="ignore"))
+        if self.probe_cache is not None:
+            self.probe_cache.put(path, meta)
+        return meta
+
+    @staticmethod
+    def base_info(path):
+        name = os.path.basename(path)
+        return {
+            "文件名": name,
+            "所在路径": os.path.dirname(path),
+            "类型": os.path.splitext(name)[1].lower().lstrip('.'),
+            "大小(MB)": round(os.path.getsize(path) / (1024 * 1024), 2),
+            "时长": "",
+            "每秒帧数": "",
+            "截取帧数量": ""
+        }
+
+    def prepare_video(self, path):
+        # 第一阶段：探测并估算开销。返回 (VideoJob, None)；已完成或探测失败时返回 (None, info)
+        name = os.path.basename(path)
+
+        self.check_pause_and_stop()  # 检查 pause/stop
+
+        info = self.base_info(path)
+        output_dir = self.video_output_dir(path)
+        info["输出目录"] = self.member_prefix(output_dir)
+        frame_dirs = [d for _, d in self.spec_output_dirs(output_dir)] if self.output_specs else [output_dir]
+        for frame_dir in frame_dirs:
+            # 上一次运行中它是重复视频、输出目录是指向别处的链接：改为自己提取
+            if os.path.islink(frame_dir):
+                os.unlink(frame_dir)
+        if self.incremental:
+            done_info = self.manifest.completed_info(path, self.output_entries(output_dir))
+            if done_info is not None:
+                self.progress_tracker.skip(path)
+                return None, done_info
+            # 未完成或输出不完整：清掉残留帧后重做
+            self.clear_outputs(output_dir)
+        if self.quarantine is not None:
+            reason = self.quarantine.reason(path)
+            if reason is not None:
+                info["隔离原因"] = reason
+                self.metrics.record_output(path, 0, 0, "quarantined")
+                self.progress_tracker.skip(path)
+                return None, info
+        ranges = self.segment_plan.ranges_for(path)
+        if ranges == []:
+            # 给了片段表、没有全局范围，且该视频不在表中
+            info["片段"] = "未列入片段表，跳过"
+            self.metrics.record_output(path, 0, 0, "skipped")
+            self.progress_tracker.skip(path)
+            return None, info
+
+        try:
+            with self.metrics.stage("probe", path):
+                try:
+                    meta = self.probe(path)
+                except (ValueError, ProcessTimeout) as e:
+                    # 偶发的慢读（如网络共享）或轻微损坏：用容错参数、放宽时限重试一次
+                    print(f"[重试] {path}: 探测失败（{str(e)[-200:]}）；改用容错参数重新探测", file=sys.stderr)
+                    meta = self.probe(path, tolerant=True)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            print(f"[异常] {path}: {str(e)}", file=sys.stderr)
+            info["时长"] = "读取失败"
+            status = "failed"
+            if isinstance(e, (ValueError, ProcessTimeout)) and self.add_to_quarantine(
+                    path, info, f"读取失败：{str(e)[-200:]}"):
+                # 重试后 ffprobe 仍读不出这个文件（损坏或卡住），以后不再尝试
+                status = "quarantined"
+            self.metrics.record_output(path, 0, 0, status)
+            return None, info
+
+        info["时长"] = format_duration(meta.duration)
+        info["每秒帧数"] = round(meta.fps, 2)
+        segments = None
+        scopes = [meta]
+        if ranges is not None:
+            segments = resolve_segments(ranges, meta.duration)
+            info["片段"] = ", ".join(segment.describe() for segment in segments) or "超出视频时长，跳过"
+            if not segments:
+                self.metrics.record_output(path, 0, 0, "skipped")
+                self.progress_tracker.skip(path)
+                return None, info
+            # 挑帧规则在每个片段内单独计算，帧数按片段分别预估
+            scopes = [segment_meta(meta, segment.duration) for segment in segments]
+        if self.output_specs:
+            spec_counts = [sum(estimate_frame_count(scope, spec.mode, spec.param) for scope in scopes)
+                           for spec in self.output_specs]
+            frame_count = sum(spec_counts)
+        else:
+            frame_count = sum(estimate_frame_count(scope, self.mode, self.param) for scope in scopes)
+        info["截取帧数量"] = frame_count
+        self.progress_tracker.set_expected(path, frame_count)
+        scope_duration = sum(scope.duration for scope in scopes)
+        job = VideoJob(path, name, info, output_dir, meta, frame_count, segments=segments,
+                       scope_duration=scope_duration)
+        scoped_meta = segment_meta(meta, scope_duration) if segments else meta
+        if self.output_specs:
+            job.cost = estimate_multi_cost(scoped_meta, self.output_specs, spec_counts)
+        else:
+            job.cost = estimate_cost(scoped_meta, self.mode, self.param, self.encoding, frame_count)
+        return job, None
+
+    def clear_outputs(self, output_dir):
+        # 删除某个视频已写出的帧（tar 分片模式下丢弃其成员），用于重做
+        if self.shard_writer is not None:
+            self.shard_writer.discard(self.member_prefix(output_dir))
+        frame_dirs = [d for _, d in self.spec_output_dirs(output_dir)] if self.output_specs else [output_dir]
+        for frame_dir in frame_dirs:
+            for frame_name in list_frame_files(frame_dir):
+                os.remove(os.path.join(frame_dir, frame_name))
+
+    def add_to_quarantine(self, path, info, reason):
+        # 加入隔离名单并在结果中注明原因；未使用隔离名单（--no-quarantine）时不做任何记录，返回 False
+        if self.quarantine is None:
+            return False
+        info["隔离原因"] = reason
+        self.quarantine.add(path, reason)
+        return True
+
+    def extract_attempt(self, job, threads, ext, tolerant):
+        # 运行一次提取，返回 (跳转解码的时间点或 None, 返回码, stderr)；tolerant 为 True 时使用容错参数。
+        # 指定了片段时逐个片段提取，各片段的帧以片段编号为前缀（seg01_frame_0001.png），编号互不冲突
+        meta = job.meta
+        job.info.pop("场景切换数", None)
+        job.dedup_candidates = 0
+        timestamps, returncode, logs = None, 0, []
+        scene_frames = 0
+        for segment in job.segments or [None]:
+            scope = segment_meta(meta, segment.duration) if segment else meta
+            offset = segment.start if segment else 0.0
+            # 跳转解码的目标时间点（相对整个视频）；None 表示顺序解码
+            timestamps = None
+            if self.mode == MODE_SCENES and not self.output_specs:
+                timestamps = self.detect_scenes(job, threads, tolerant, segment)
+                scene_frames += len(timestamps)
+                self.progress_tracker.set_expected(job.path, scene_frames)
+            elif not self.dedup_threshold and choose_strategy(scope, self.mode, self.param) == STRATEGY_SEEK:
+                # 去重需要在同一路帧流中与上一保留帧比较，跳转解码的各进程互相独立，因此只在不去重时跳转
+                timestamps = [offset + ts for ts in seek_timestamps(scope, self.param)]
+            with self.metrics.stage("extract", job.path):
+                if self.output_specs:
+                    returncode, err_bytes = self._extract_multi_output(job, threads, tolerant, segment)
+                elif self.shard_writer is not None:
+                    returncode, err_bytes = self._extract_to_shards(job, threads, ext, timestamps, tolerant, segment)
+                else:
+                    returncode, err_bytes = self._extract_to_files(job, threads, ext, timestamps, tolerant, segment)
+            logs.append(err_bytes)
+            if returncode != 0:
+                break
+        # 各片段的日志合在一起，关键帧数与去重统计按全部片段累计
+        return timestamps, returncode, b"".join(logs)
+
+    def extract_video(self, job, threads):
+        # 第二阶段：按调度器分配的解码线程数运行 ffmpeg；超时、卡住或失败时清掉残留输出，
+        # 改用容错参数（不用硬件解码、忽略解码错误）重试一次，仍失败则加入隔离名单
+        path, name, info, output_dir, meta = job.path, job.name, job.info, job.output_dir, job.meta
+        frame_count = job.frame_count
+        try:
+            ext = self.image_format.lower()
+            failure = None
+            for tolerant in (False, True):
+                try:
+                    timestamps, returncode, err_bytes = self.extract_attempt(job, threads, ext, tolerant)
+                    if returncode == 0:
+                        failure = None
+                        break
+                    failure = err_bytes.decode(errors="ignore").strip()[-500:] or f"ffmpeg 退出码 {returncode}"
+                except (ProcessTimeout, ValueError) as e:
+                    timestamps, returncode, err_bytes = None, -1, b""
+                    failure = str(e)
+                if not tolerant:
+                    print(f"[重试] {path}: {failure[-200:]}；改用容错参数重新提取", file=sys.stderr)
+                    self.clear_outputs(output_dir)
+
+            entries = self.output_entries(output_dir)
+            if self.dedup_threshold and timestamps is None:
+                # 去重后的帧数无法预估：报告实际保留数，以及去重前的候选数与丢弃数
+                candidates = job.dedup_candidates
+                frame_count = len(entries)
+                info["截取帧数量"] = frame_count
+                info["去重丢弃"] = max(0, candidates - frame_count)
+            if self.output_specs:
+                if any(spec.mode == MODE_KEYFRAMES for spec in self.output_specs):
+                    frame_count = len(entries)
+                    info["截取帧数量"] = frame_count
+            elif self.mode in (MODE_KEYFRAMES, MODE_SCENES):
+                # 关键帧与场景切换模式的帧数无法精确预估，改为报告实际结果
+                frame_count = len(entries)
+                info["截取帧数量"] = frame_count
+            if self.mode == MODE_KEYFRAMES and not self.output_specs:
+                info["关键帧数"] = count_showinfo_frames(err_bytes.decode(errors="ignore"))
+
+            self.on_frames(name, frame_count)
+            self.progress_tracker.finish(path, name, len(entries))
+            _, output_bytes = output_checksum(entries)
+            status = "ok"
+            if failure is None:
+                if self.shard_writer is not None:
+                    self.shard_writer.flush()
+                self.manifest.record(path, entries, info)
+            else:
+                # 提取失败不记入清单；加入隔离名单后以后的运行直接跳过
+                print(f"[提取失败] {path}: {failure}", file=sys.stderr)
+                status = "quarantined" if self.add_to_quarantine(path, info, failure[-200:]) else "failed"
+            self.metrics.record_output(path, len(entries), output_bytes, status)
+
+        except RuntimeError:
+            raise
+        except Exception as e:
+            print(f"[异常] {path}: {str(e)}", file=sys.stderr)
+            info["时长"] = "读取失败"
+
+        return info
+
+    def process_video(self, path, threads):
+        # 单独处理一个视频（探测 + 提取），供集群节点等自行分发任务的调用方使用
+        job, info = self.prepare_video(path)
+        if job is not None:
+            info = self.extract_video(job, threads)
+        return info
+
+    def detect_scenes(self, job, threads, tolerant=False, segment=None):
+        # 场景切换模式第一步：在缩小的分析流上检测切换点，再按最小 / 最大间隔确定取帧时间；
+        # 给出 segment 时只检测该片段，返回的时间点已换算为相对整个视频
+        duration = segment.duration if segment else job.meta.duration
+        cmd = build_scene_detect_cmd(job.path, self.param, threads, self.use_gpu, **self.segment_args(segment))
+        with self.metrics.stage("scene_detect", job.path):
+            returncode, _, err_bytes = self.run_process(harden_cmd(cmd) if tolerant else cmd,
+                                                        timeout=extraction_limits(duration)[0])
+        log_text = err_bytes.decode(errors="ignore")
+        if returncode != 0:
+            raise ValueError(log_text.strip()[-500:] or "场景检测失败")
+        cuts = parse_showinfo_times(log_text)
+        job.info["场景切换数"] = job.info.get("场景切换数", 0) + len(cuts)
+        timestamps = plan_scene_timestamps(cuts, duration, self.scene_min_gap, self.scene_max_gap)
+        offset = segment.start if segment else 0.0
+        return [offset + ts for ts in timestamps]
+
+    @staticmethod
+    def process_limits(job, timestamps=None, segment=None):
+        # 看门狗参数：跳转解码的每个进程只取几帧，用固定时限；顺序解码按处理时长与取帧间隔放宽
+        if timestamps is not None:
+            return {"timeout": MIN_TIMEOUT, "stall": MIN_STALL_SECONDS}
+        duration = segment.duration if segment else job.meta.duration
+        frame_count = job.frame_count * duration / job.scope_duration if job.scope_duration else job.frame_count
+        timeout, stall = extraction_limits(duration, frame_count)
+        return {"timeout": timeout, "stall": stall, "media_duration": duration}
+
+    @staticmethod
+    def frame_pattern(ext, segment=None):
+        # 帧文件名模板；按片段提取时以片段编号为前缀，不同片段的帧编号各自从 1 开始
+        return f"{segment.label}_frame_%04d.{ext}" if segment else f"frame_%04d.{ext}"
+
+    @staticmethod
+    def segment_args(segment):
+        # 只解码片段：输入跳转到片段开头，-t 限定读取时长
+        return {"seek": segment.start, "duration": segment.duration} if segment else {}
+
+    @contextmanager
+    def dedup_counters(self, job, count=1):
+        # 去重时为 count 路输出各准备一个计数文件，进程结束后把去重前的候选帧数累加到 job.dedup_candidates；
+        # 不去重时给出 [None] * count
+        if not self.dedup_threshold:
+            yield [None] * count
+            return
+        paths = []
+        try:
+            for _ in range(count):
+                fd, counter_path = tempfile.mkstemp(prefix="vfc_dedup_", suffix=".crc")
+                os.close(fd)
+                paths.append(counter_path)
+            yield paths
+        finally:
+            for counter_path in paths:
+                try:
+                    with open(counter_path, "r", encoding="utf-8", errors="ignore") as f:
+                        job.dedup_candidates += count_framecrc_frames(f.read())
+                    os.remove(counter_path)
+                except OSError:
+                    pass
+
+    def _extract_to_files(self, job, threads, ext, timestamps=None, tolerant=False, segment=None):
+        # 每帧一个图片文件；给出 timestamps 时逐个时间点跳转解码，否则顺序解码（给出 segment 时只解码该片段）
+        path, name, output_dir = job.path, job.name, job.output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        output_pattern = os.path.join(output_dir, self.frame_pattern(ext, segment))
+        limits = self.process_limits(job, timestamps, segment)
+        with self.dedup_counters(job) as (dedup_counter,):
+            if timestamps is not None:
+                ffmpeg_cmds = build_seek_cmds(path, output_pattern, timestamps, self.use_gpu, self.encoding)
+            else:
+                ffmpeg_cmds = [build_linear_cmd(path, output_pattern, self.mode, self.param, threads, self.use_gpu,
+                                                self.encoding, self.dedup_threshold, **self.segment_args(segment),
+                                                dedup_counter=dedup_counter)]
+            if tolerant:
+                ffmpeg_cmds = [harden_cmd(cmd) for cmd in ffmpeg_cmds]
+
+            # 跳转解码每个进程输出固定帧数，按进程累计；顺序解码读取 ffmpeg 的实时进度；前面片段的帧一并计入
+            frames_before = len(list_frame_files(output_dir)) if segment else 0
+            returncode, err_bytes = 0, b""
+            for ffmpeg_cmd in ffmpeg_cmds:
+                returncode, _, err_bytes = self.run_process(
+                    ffmpeg_cmd,
+                    on_progress=lambda progress, base=frames_before: self.progress_tracker.update(
+                        path, name, dict(progress, frames=base + progress["frames"])),
+                    on_usage=lambda usage: self.metrics.add_process_usage(path, usage),
+                    **limits
+                )
+                if returncode != 0:
+                    break
+                frames_before = len(list_frame_files(output_dir))
+        return returncode, err_bytes
+
+    def _extract_multi_output(self, job, threads, tolerant=False, segment=None):
+        # 一次顺序解码，经 split 滤镜同时写出全部输出，每项输出写到 output_root/<输出名>/<视频>/
+        path, name, meta = job.path, job.name, job.meta
+        outputs = []
+        for spec, spec_dir in self.spec_output_dirs(job.output_dir):
+            os.makedirs(spec_dir, exist_ok=True)
+            outputs.append((spec, os.path.join(spec_dir, self.frame_pattern(spec.image_format, segment))))
+        # ffmpeg 的进度帧数只反映第一路输出，按预估帧数比例折算为全部输出的帧数
+        scope = segment_meta(meta, segment.duration) if segment else meta
+        first = self.output_specs[0]
+        ratio = (sum(estimate_frame_count(scope, spec.mode, spec.param) for spec in self.output_specs)
+                 / max(1, estimate_frame_count(scope, first.mode, first.param)))
+        frames_before = len(self.output_entries(job.output_dir)) if segment else 0
+        with self.dedup_counters(job, len(outputs)) as counter_paths:
+            cmd = build_multi_output_cmd(path, outputs, threads, self.use_gpu, self.dedup_threshold,
+                                         **self.segment_args(segment), dedup_counters=counter_paths)
+            if tolerant:
+                cmd = harden_cmd(cmd)
+            returncode, _, err_bytes = self.run_process(
+                cmd,
+                on_progress=lambda progress: self.progress_tracker.update(
+                    path, name, dict(progress, frames=frames_before + int(progress["frames"] * ratio))),
+                on_usage=lambda usage: self.metrics.add_process_usage(path, usage),
+                **self.process_limits(job, segment=segment)
+            )
+        return returncode, err_bytes
+
+    def _extract_to_shards(self, job, threads, ext, timestamps=None, tolerant=False, segment=None):
+        # ffmpeg 把编码好的图片流写到 stdout，逐张切分后追加到 tar 分片，成员名与单文件模式的相对路径一致
+        path, name, meta = job.path, job.name, job.meta
+        prefix = self.member_prefix(job.output_dir)
+        limits = self.process_limits(job, timestamps, segment)
+        member_pattern = f"{prefix}/{self.frame_pattern(ext, segment)}"
+        frames_before = len(self.output_entries(job.output_dir)) if segment else 0
+
+        written = [0]
+
+        def write_images(chunk, splitter):
+            for image in splitter.feed(chunk):
+                written[0] += 1
+                self.shard_writer.add(member_pattern % written[0], image)
+            self.progress_tracker.update(path, name, {"frames": frames_before + written[0], "fps": None,
+                                                      "speed": None, "out_time": None})
+
+        with self.dedup_counters(job) as (dedup_counter,):
+            if timestamps is not None:
+                ffmpeg_cmds = build_seek_pipe_cmds(path, timestamps, 1 / meta.fps if meta.fps else 0.04,
+                                                   self.use_gpu, self.encoding)
+            else:
+                ffmpeg_cmds = [build_linear_cmd(path, PIPE_OUTPUT, self.mode, self.param, threads, self.use_gpu,
+                                                self.encoding, self.dedup_threshold, **self.segment_args(segment),
+                                                dedup_counter=dedup_counter)]
+            if tolerant:
+                ffmpeg_cmds = [harden_cmd(cmd) for cmd in ffmpeg_cmds]
+            returncode, err_bytes = 0, b""
+            for ffmpeg_cmd in ffmpeg_cmds:
+                returncode, _, err_bytes = self.run_process(
+                    ffmpeg_cmd,
+                    on_stdout=lambda chunk, splitter=ImageStreamSplitter(ext): write_images(chunk, splitter),
+                    on_usage=lambda usage: self.metrics.add_process_usage(path, usage),
+                    **limits
+                )
+                if returncode != 0:
+                    break
+        return returncode, err_bytes
+
+    def run(self):
+        # 处理整个文件夹，返回全部结果记录；出错时直接抛出异常，由调用方处理
+
+        # 在任务开始时显示模式
+        if self.use_gpu:
+            mode_text = f"检测到 NVIDIA GPU: {', '.join(self.gpu_models)}，启用 GPU 加速"
+        else:
+            mode_text = "未检测到 NVIDIA 显卡，启用 CPU 模式"
+        self.on_notice(mode_text)
+
+        # 监视模式长期运行：结果记录只保留最近的一部分，已结束视频的指标逐批写入 metrics.jsonl
+        self.collected = deque(maxlen=WATCH_RESULT_LIMIT) if self.watch else []
+        self.metrics = RunMetrics(os.path.join(self.output_root, METRICS_JSONL) if self.watch else None)
+        self.total = 0
+        self.progress_tracker.start_batch(0)
+        source_index = self.new_source_index()
+
+        # 边扫描边探测：每批新发现的视频立即送入探测线程，探测线程把任务按预估开销放入调度器，
+        # max_threads 个提取线程按从大到小取任务，避免大文件排在最后形成长尾
+        scheduler = JobScheduler(self.max_threads, fixed_threads=self.decoder_threads)
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_threads) as extract_pool:
+            workers = [extract_pool.submit(self.extract_worker, scheduler) for _ in range(self.max_threads)]
+            try:
+                with ThreadPoolExecutor(max_workers=self.max_threads) as probe_pool:
+                    # 监视模式下由监视器为每次全量扫描单独计时，不计入等待新文件的时间
+                    with nullcontext() if self.watch else self.metrics.stage("scan"):
+                        for batch in self.watch_batches(source_index) if self.watch else self.scan_batches():
+                            # 批量预热探测缓存，未变化的文件无需再次 ffprobe
+                            if self.probe_cache is not None:
+                                self.cached_meta.update(self.probe_cache.get_many(batch))
+                            self.total += len(batch)
+                            self.progress_tracker.add_videos(len(batch))
+                            self.on_scan(self.total, False)
+                            for path in batch:
+                                original = self.duplicate_of(source_index, path)
+                                if original is not None:
+                                    self.link_duplicate(path, original)
+                                    continue
+                                future = probe_pool.submit(self.prepare_video, path)
+                                future.add_done_callback(
+                                    lambda f, p=path: self.on_prepared(f, p, scheduler, errors))
+                    self.on_scan(self.total, True)
+                if errors:
+                    raise errors[0]
+            except Exception:
+                # 意外错误：停止其余任务后再抛给调用方
+                self.stop()
+                raise
+            finally:
+                scheduler.close()
+            for worker in workers:
+                worker.result()
+
+        if self.probe_cache is not None:
+            self.probe_cache.flush()
+        if self.shard_writer is not None:
+            self.shard_writer.close()
+        # 指标写入输出目录：metrics.jsonl（逐视频 + 汇总）与 metrics.prom（Prometheus 文本格式）
+        self.metrics.export(self.output_root)
+        self.on_metrics(self.metrics.summary)
+        return list(self.collected)
+
+    def new_source_index(self):
+        # 按扫描顺序登记内容指纹，先出现的视频负责提取，结果与并发时序无关；重复记录每次运行重新生成
+        if not self.skip_duplicates:
+            return None
+        duplicates_path = os.path.join(self.output_root, DUPLICATES_NAME)
+        if os.path.exists(duplicates_path):
+            os.remove(duplicates_path)
+        return SourceIndex()
+
+    def duplicate_of(self, source_index, path):
+        # 登记视频并返回内容相同、已负责提取的视频；不跳过重复视频时返回 None。
+        # 片段表为内容相同的两个视频指定了不同的片段时，两者的输出不同，各自提取
+        original = source_index.claim(path) if source_index is not None else None
+        if original is not None and self.segment_plan.ranges_for(path) == self.segment_plan.ranges_for(original):
+            return original
+        return None
+
+    def link_duplicate(self, path, original):
+        # 重复视频不再提取：输出目录链接到原视频的输出，并记入 duplicates.jsonl
+        info = self.base_info(path)
+        info["重复于"] = self.manifest.video_key(original)
+        own_dir, target_dir = self.video_output_dir(path), self.video_output_dir(original)
+        if self.shard_writer is not None:
+            # tar 分片中没有目录可链接，只记录引用
+            linked = False
+        elif self.output_specs:
+            linked = all([link_output(target, link) for (_, target), (_, link)
+                          in zip(self.spec_output_dirs(target_dir), self.spec_output_dirs(own_dir))])
+        else:
+            linked = link_output(target_dir, own_dir)
+        info["输出目录"] = self.member_prefix(own_dir if linked else target_dir)
+        record_duplicate(self.output_root, self.manifest.video_key(path), info["重复于"], info["输出目录"])
+        self.metrics.record_output(path, 0, 0, "duplicate")
+        self.progress_tracker.skip(path)
+        self.report_done(info)
+
+    def scan_batches(self):
+        # 把流式扫描结果按数量或时间凑批，慢速网络盘上也能尽快开始探测
+        batch, last = [], time.monotonic()
+        for path in iter_videos(self.folder, self.extensions, self.exclude):
+            if not self._is_running:
+                return
+            batch.append(path)
+            now = time.monotonic()
+            if len(batch) >= SCAN_BATCH_SIZE or now - last >= SCAN_BATCH_SECONDS:
+                yield batch
+                batch, last = [], now
+        if batch and self._is_running:
+            yield batch
+
+    def watch_batches(self, source_index):
+        # 监视模式的视频来源：inotify（不可用时轮询）发现的、大小已稳定的新视频；
+        # 每批送出后清理已结束视频的逐文件状态，常驻运行时内存不随处理过的文件数增长
+        watcher = FolderWatcher(self.folder, self.extensions, self.exclude, self.stable_seconds,
+                                scan_stage=lambda: self.metrics.stage("scan"))
+        self.on_notice(f"正在监视文件夹（{watcher.mode}），新视频写完后自动提取到 {self.output_root}")
+        for batch in watcher.batches(lambda: self._is_running):
+            yield batch
+            self.metrics.fold_finished()
+            if source_index is not None:
+                source_index.trim()
+
+    def on_prepared(self, future, path, scheduler, errors):
+        # 探测完成回调（在探测线程中执行）：放入调度器，或直接记为完成
+        try:
+            job, info = future.result()
+        except RuntimeError:
+            # 停止后尚未开始的任务也会立即抛出，不再计入进度
+            print(f"[停止] {path}", file=sys.stderr)
+            return
+        except Exception as e:
+            # 意外错误：停止其余任务，由 run() 抛给调用方
+            errors.append(e)
+            self.stop()
+            return
+        if job is not None:
+            scheduler.add(job, job.cost)
+        else:
+            self.report_done(info)
+
+    def extract_worker(self, scheduler):
+        while True:
+            job, threads = scheduler.take()
+            if job is None:
+                return
+            try:
+                info = self.extract_video(job, threads)
+            except RuntimeError:
+                print(f"[停止] {job.path}", file=sys.stderr)
+                continue
+            finally:
+                scheduler.done(job)
+            self.report_done(info)
+
+    def report_done(self, info):
+        with self.completed_lock:
+            self.completed_count += 1
+            done = self.completed_count
+            self.collected.append(info)
+        self.on_progress(info["文件名"], done, self.total)
+        self.on_item(info)
@@ -0,0 +1,323 @@
+# Project Path: core/FFmpegCommands.py
+import re
+
+from core.FFmpegPaths import FFMPEG_BIN
+
+# 提取模式，与界面 mode_box 的下标一致
+MODE_SECONDS = 0
+MODE_FRAMES = 1
+MODE_KEYFRAMES = 2
+MODE_SCENES = 3
+# 命令行与任务定义文件中使用的模式名称
+MODE_NAMES = {
+    "seconds": MODE_SECONDS,      # 每N秒取1帧
+    "frames": MODE_FRAMES,        # 每N帧取1帧
+    "keyframes": MODE_KEYFRAMES,  # 仅关键帧(间隔≥N秒)
+    "scenes": MODE_SCENES,        # 场景切换(阈值N%)
+}
+
+# 线性解码：一次解码整段视频，用滤镜挑帧
+STRATEGY_LINEAR = "linear"
+# 跳转解码：对每个目标时间点 -ss 输入跳转，只解码目标所在的 GOP
+STRATEGY_SEEK = "seek"
+
+# N 至少为关键帧间隔的多少倍时改用跳转解码
+SEEK_MIN_GOP_RATIO = 2.0
+# 每个 ffmpeg 进程处理的跳转目标数，兼顾进程启动开销与同时打开的解码器内存
+SEEK_TARGETS_PER_PROCESS = 8
+
+# 场景检测分析流的宽度：在缩小的画面上计算场景分数，检测代价远低于全分辨率
+SCENE_ANALYSIS_WIDTH = 160
+
+_PTS_TIME_RE = re.compile(r"pts_time:\s*(-?[\d.]+)")
+
+# 近似重复帧去除：mpdecimate 以 8x8 块为单位与上一保留帧比较，阈值为单块像素差之和的缩放系数
+DEFAULT_DEDUP_THRESHOLD = 12
+# 统计去重前的候选帧数：候选帧 split 出一路缩到极小尺寸，以 framecrc 写入计数文件，每帧一行。
+# 计数文件的格式由 framecrc 复用器定义，不依赖 ffmpeg 日志的前缀格式
+DEDUP_COUNTER_FILTER = "scale=8:8:flags=neighbor"
+
+# 输出到 stdout 的图片流（tar 分片模式），不在磁盘上生成单帧文件
+PIPE_OUTPUT = "pipe:1"
+
+
+def choose_strategy(meta, mode, param):
+    # 场景切换模式先在缩小的分析流上检测，再跳转到各切换点取全分辨率帧；
+    # “每N秒”模式仅在间隔明显大于关键帧间隔时，跳转解码才比顺序解码省
+    if mode == MODE_SCENES:
+        return STRATEGY_SEEK
+    if mode != MODE_SECONDS or not meta.keyframe_interval:
+        return STRATEGY_LINEAR
+    if param >= meta.keyframe_interval * SEEK_MIN_GOP_RATIO:
+        return STRATEGY_SEEK
+    return STRATEGY_LINEAR
+
+
+def build_select_filter(mode, param):
+    # 只负责“挑哪些帧”，不含时间戳改写；关键帧模式且 N=0 时无需筛选，返回 None
+    if mode == MODE_SECONDS:
+        return f"fps=1/{param}"
+    if mode == MODE_KEYFRAMES:
+        # N>0 时只保留与上一保留帧相隔至少 N 秒的关键帧
+        if param > 0:
+            return f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{param})'"
+        return None
+    if mode == MODE_SCENES:
+        return f"select='gt(scene\\,{param / 100:.2f})'"
+    return f"select='not(mod(n\\,{param}))'"
+
+
+def build_dedup_filter(threshold):
+    # 只比较已挑出的帧，逐帧与上一保留帧比较，内存占用恒定
+    hi = 64 * threshold
+    lo = 64 * threshold * 5 // 12
+    return f"mpdecimate=hi={hi}:lo={lo}:frac=0.33"
+
+
+def _join_filters(filters):
+    return ",".join(f for f in filters if f) or "null"
+
+
+def build_dedup_chains(source, pre_filters, dedup, post_filters, out_label, tag=""):
+    # 去重的滤镜图片段：挑帧之后 split，一路进入计数输出 [dedup_count<tag>]，另一路去重、裁剪 / 缩放后作为 out_label
+    return [f"{source}{_join_filters(pre_filters)},split[dedup_all{tag}][dedup_keep{tag}]",
+            f"[dedup_all{tag}]{DEDUP_COUNTER_FILTER}[dedup_count{tag}]",
+            f"[dedup_keep{tag}]{_join_filters([build_dedup_filter(dedup), *post_filters])}{out_label}"]
+
+
+def dedup_counter_args(counter_path, tag=""):
+    # 计数输出放在所有图片输出之后，-progress 的帧数仍对应第一路图片输出
+    return ["-map", f"[dedup_count{tag}]", "-f", "framecrc", counter_path]
+
+
+def count_framecrc_frames(text):
+    # framecrc 每帧一行，# 开头的为注释
+    return sum(1 for line in text.splitlines() if line.strip() and not line.startswith("#"))
+
+
+def select_filters(mode, param):
+    # 单路输出的挑帧部分（不含去重与裁剪 / 缩放）
+    select_filter = build_select_filter(mode, param)
+    if mode == MODE_KEYFRAMES:
+        # showinfo 在筛选前逐帧打印，用于统计解码到的关键帧数
+        return ["showinfo", select_filter]
+    if mode == MODE_FRAMES:
+        return [select_filter, "setpts=N/FRAME_RATE/TB"]
+    return [select_filter]
+
+
+def build_filter(mode, param, dedup=None, post_filters=()):
+    # post_filters 为挑帧（与去重）之后的裁剪 / 缩放，只作用于输出的帧
+    filters = select_filters(mode, param)
+    if dedup:
+        filters.append(build_dedup_filter(dedup))
+    return _join_filters(filters + list(post_filters))
+
+
+def input_args(path, threads, use_gpu, seek=None, keyframes_only=False, duration=None):
+    args = []
+    if use_gpu:
+        args += ["-hwaccel", "cuda"]
+    args += ["-threads", str(threads)]
+    if keyframes_only:
+        # 解码器直接丢弃非关键帧，P/B 帧完全不解码
+        args += ["-skip_frame", "nokey"]
+    if seek is not None:
+        args += ["-ss", f"{seek:.3f}"]
+    if duration is not None:
+        # 只读取这么长的输入，到达后解码器即停止
+        args += ["-t", f"{duration:.3f}"]
+    return args + ["-i", path]
+
+
+# 容错重试时加在每个输入前的参数：忽略解码错误、丢弃损坏的包、补齐缺失的时间戳、按相邻帧隐藏损坏区域
+TOLERANT_INPUT_ARGS = ["-err_detect", "ignore_err", "-fflags", "+discardcorrupt+genpts",
+                       "-ec", "favor_inter+guess_mvs+deblock"]
+
+
+def harden_cmd(cmd):
+    # 把命令改成更保守的版本，用于超时或失败后的重试：不使用硬件解码，各输入加上容错参数
+    hardened = []
+    i = 0
+    while i < len(cmd):
+        if cmd[i] == "-hwaccel":
+            i += 2
+            continue
+        if cmd[i] == "-i":
+            hardened += TOLERANT_INPUT_ARGS
+        hardened.append(cmd[i])
+        i += 1
+    return hardened
+
+
+def build_linear_cmd(path, output_pattern, mode, param, threads, use_gpu, encoding, dedup=None, seek=None,
+                     duration=None, dedup_counter=None):
+    # output_pattern 为 PIPE_OUTPUT 时把图片流写到 stdout；encoding 为 ImageEncoding；dedup 为去重阈值，None 表示不去重。
+    # 给出 seek / duration 时只解码该片段（输入跳转 + -t），片段内的时间戳从 0 开始，挑帧规则按片段内计算；
+    # 去重时给出 dedup_counter 则把去重前的候选帧计数写入该文件（见 count_framecrc_frames）
+    keyframes_only = mode == MODE_KEYFRAMES
+    # 关键帧模式需要 info 级日志以读取 showinfo 的逐帧输出
+    loglevel = "info" if keyframes_only else "error"
+    cmd = [FFMPEG_BIN, "-hide_banner", "-nostats", "-loglevel", loglevel]
+    cmd += input_args(path, threads, use_gpu, seek=seek, keyframes_only=keyframes_only, duration=duration)
+    if dedup and dedup_counter:
+        chains = build_dedup_chains("[0:v:0]", select_filters(mode, param), dedup, encoding.filters(), "[out]")
+        cmd += ["-filter_complex", ";".join(chains), "-vsync", "vfr", "-map", "[out]"]
+    else:
+        cmd += ["-vf", build_filter(mode, param, dedup, encoding.filters()), "-vsync", "vfr"]
+    cmd += encoding.output_args(to_pipe=output_pattern == PIPE_OUTPUT)
+    cmd.append(output_pattern)
+    if dedup and dedup_counter:
+        cmd += dedup_counter_args(dedup_counter)
+    return cmd
+
+
+def spec_select_filters(mode, param, skip_nonkey=True):
+    # 多输出中单项输出的挑帧部分：挑帧 + 时间戳改写；
+    # 输入未跳过非关键帧（与其他模式的输出共用解码）时，用 select 的 key 变量挑出关键帧
+    filters = []
+    if mode == MODE_KEYFRAMES and not skip_nonkey:
+        filters.append("select='eq(key\\,1)'")
+    filters.append(build_select_filter(mode, param))
+    if mode == MODE_FRAMES:
+        filters.append("setpts=N/FRAME_RATE/TB")
+    return filters
+
+
+def build_spec_filter(mode, param, post_filters=(), skip_nonkey=True, dedup=None):
+    # 多输出中单项输出的滤镜链：挑帧 + 时间戳改写 + 去重 + 裁剪 / 缩放
+    filters = spec_select_filters(mode, param, skip_nonkey)
+    if dedup:
+        filters.append(build_dedup_filter(dedup))
+    return _join_filters(filters + list(post_filters))
+
+
+def build_multi_output_cmd(path, outputs, threads, use_gpu, dedup=None, seek=None, duration=None,
+                           dedup_counters=None):
+    # 一次解码，split 成多路，每路按各自的规则挑帧、缩放后编码到各自的输出；
+    # outputs 为 [(OutputSpec, output_pattern)]。所有输出都只要关键帧时，解码器直接跳过非关键帧。
+    # 去重时给出 dedup_counters（与 outputs 一一对应的计数文件）则分别统计各项输出去重前的候选帧数
+    keyframes_only = all(spec.mode == MODE_KEYFRAMES for spec, _ in outputs)
+    count = bool(dedup and dedup_counters)
+    cmd = [FFMPEG_BIN, "-hide_banner", "-nostats", "-loglevel", "error"]
+    cmd += input_args(path, threads, use_gpu, seek=seek, keyframes_only=keyframes_only, duration=duration)
+    labels = [f"[s{i}]" for i in range(len(outputs))]
+    chains = [f"[0:v:0]split={len(outputs)}{''.join(labels)}"]
+    for i, (spec, _) in enumerate(outputs):
+        post_filters = spec.encoding().filters()
+        if count:
+            chains += build_dedup_chains(f"[s{i}]", spec_select_filters(spec.mode, spec.param, keyframes_only),
+                                         dedup, post_filters, f"[o{i}]", tag=str(i))
+        else:
+            spec_filter = build_spec_filter(spec.mode, spec.param, post_filters, skip_nonkey=keyframes_only,
+                                            dedup=dedup)
+            chains.append(f"[s{i}]{spec_filter}[o{i}]")
+    cmd += ["-filter_complex", ";".join(chains), "-vsync", "vfr"]
+    for i, (spec, output_pattern) in enumerate(outputs):
+        cmd += ["-map", f"[o{i}]"] + spec.encoding().output_args()
+        cmd.append(output_pattern)
+    if count:
+        for i, counter_path in enumerate(dedup_counters):
+            cmd += dedup_counter_args(counter_path, tag=str(i))
+    return cmd
+
+
+def build_scene_detect_cmd(path, threshold, threads, use_gpu, seek=None, duration=None):
+    # 场景检测：缩小画面后按场景分数筛选，showinfo 打印切换帧的时间，不编码任何输出；
+    # 只检测某个片段时，打印的时间相对片段开头
+    select_filter = build_select_filter(MODE_SCENES, threshold)
+    cmd = [FFMPEG_BIN, "-hide_banner", "-nostats", "-loglevel", "info"]
+    cmd += input_args(path, threads, use_gpu, seek=seek, duration=duration)
+    cmd += ["-an", "-sn", "-vf", f"scale={SCENE_ANALYSIS_WIDTH}:-2:flags=fast_bilinear,{select_filter},showinfo",
+            "-f", "null", "-"]
+    return cmd
+
+
+def parse_showinfo_times(log_text, instance="Parsed_showinfo"):
+    times = []
+    for line in log_text.splitlines():
+        if instance in line and " n:" in line:
+            match = _PTS_TIME_RE.search(line)
+            if match:
+                times.append(float(match.group(1)))
+    return times
+
+
+def plan_scene_timestamps(cuts, duration, min_gap=0.0, max_gap=0.0):
+    # 以开头画面加各切换点为候选：与上一取帧点不足 min_gap 的切换点跳过；
+    # 相邻取帧点超过 max_gap（>0）时按 max_gap 补帧，补出的点也与下一切换点保持至少 min_gap
+    timestamps = [0.0]
+    for cut in sorted(cuts) + [duration]:
+        if max_gap > 0:
+            while cut - timestamps[-1] > max_gap:
+                fill = timestamps[-1] + max_gap
+                if cut - fill < min_gap or fill >= duration:
+                    break
+                timestamps.append(fill)
+        if cut < duration and cut - timestamps[-1] >= max(min_gap, 1e-3):
+            timestamps.append(cut)
+    return timestamps
+
+
+def count_showinfo_frames(log_text, instance="Parsed_showinfo"):
+    return sum(1 for line in log_text.splitlines() if instance in line and " n:" in line)
+
+
+def last_frame_time(duration, fps):
+    # 最后一帧的时间戳；帧率未知时按 25fps 估算
+    return max(0.0, duration - (1 / fps if fps else 0.04))
+
+
+def seconds_frame_count(duration, fps, param):
+    # fps=1/N 滤镜（round=near）把每个输入帧映射到最近的输出时刻 k*N，输出第 0 到最后一帧所对应的时刻，
+    # 即 round(最后一帧时间 / N) + 1 帧。跳转解码与预估帧数都按此计算，两种策略的输出帧数一致
+    if duration <= 0:
+        return 0
+    return int(last_frame_time(duration, fps) / param + 0.5) + 1
+
+
+def seek_timestamps(meta, param):
+    # 与 fps=1/N 的输出一一对应：第 k 帧取 k*N 秒处；最后一个时刻可能落在视频末尾之后，改取最后一帧
+    last = last_frame_time(meta.duration, meta.fps)
+    return [min(k * param, last) for k in range(seconds_frame_count(meta.duration, meta.fps, param))]
+
+
+def build_seek_cmds(path, output_pattern, timestamps, use_gpu, encoding):
+    # 一个进程打开多个带 -ss 的输入，各取 1 帧写到对应编号的文件，编号与线性模式一致；
+    # 各输入本身就并行解码，因此每个输入只给 1 个解码线程
+    cmds = []
+    output_args = encoding.output_args()
+    post_filters = encoding.filters()
+    if post_filters:
+        # -vf 是输出选项，对每路输出分别生效
+        output_args = ["-vf", ",".join(post_filters)] + output_args
+    for start in range(0, len(timestamps), SEEK_TARGETS_PER_PROCESS):
+        batch = timestamps[start:start + SEEK_TARGETS_PER_PROCESS]
+        cmd = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error"]
+        for ts in batch:
+            cmd += input_args(path, 1, use_gpu, seek=ts)
+        for i in range(len(batch)):
+            cmd += ["-map", f"{i}:v:0", "-frames:v", "1", "-update", "1"] + output_args
+            cmd.append(output_pattern % (start + i + 1))
+        cmds.append(cmd)
+    return cmds
+
+
+def build_seek_pipe_cmds(path, timestamps, frame_interval, use_gpu, encoding):
+    # 跳转解码的管道版本：各输入只读取约两帧时长，trim 各取第 1 帧后 concat 成一路，
+    # 按时间点顺序写到 stdout
+    cmds = []
+    output_args = encoding.output_args(to_pipe=True)
+    post_filters = "".join("," + f for f in encoding.filters())
+    for start in range(0, len(timestamps), SEEK_TARGETS_PER_PROCESS):
+        batch = timestamps[start:start + SEEK_TARGETS_PER_PROCESS]
+        cmd = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error"]
+        for ts in batch:
+            cmd += input_args(path, 1, use_gpu, seek=ts, duration=max(frame_interval * 2, 0.05))
+        chains = [f"[{i}:v:0]trim=end_frame=1[v{i}]" for i in range(len(batch))]
+        inputs = "".join(f"[v{i}]" for i in range(len(batch)))
+        graph = ";".join(chains + [f"{inputs}concat=n={len(batch)}:v=1:a=0{post_filters}[out]"])
+        cmd += ["-filter_complex", graph, "-map", "[out]", "-vsync", "vfr"] + output_args
+        cmd.append(PIPE_OUTPUT)
+        cmds.append(cmd)
+    return cmds
@@ -0,0 +1,29 @@
+# Project Path: core/FFmpegPaths.py
+import os
+import sys
+
+# 获取项目内的 ffmpeg/ffprobe 路径
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FFMPEG_DIR = os.path.join(BASE_DIR, "ffmpeg")
+FFMPEG_BIN = os.path.join(FFMPEG_DIR, "ffmpeg.exe" if sys.platform == "win32" else "ffmpeg")
+FFPROBE_BIN = os.path.join(FFMPEG_DIR, "ffprobe.exe" if sys.platform == "win32" else "ffprobe")
+
+# Windows 下启动子进程时不弹出控制台窗口
+CREATE_NO_WINDOW = 0x08000000 if sys.platform == "win32" else 0
+
+
+def check_ffmpeg_exists(gui_mode=True):
+    missing = []
+    if not os.path.isfile(FFMPEG_BIN):
+        missing.append(FFMPEG_BIN)
+    if not os.path.isfile(FFPROBE_BIN):
+        missing.append(FFPROBE_BIN)
+    if missing:
+        msg = "缺少必要的组件：\n" + "\n".join(missing) + "\n\n请将 ffmpeg.exe 和 ffprobe.exe 放入项目的 ffmpeg/ 文件夹。"
+        if gui_mode:
+            # 仅界面模式才导入 Qt，命令行启动不依赖 PyQt6
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.critical(None, "缺少 ffmpeg", msg)
+        else:
+            print(msg, file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,233 @@
+# Project Path: core/FolderWatcher.py
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from contextlib import nullcontext
+
+from core.VideoScanner import DEFAULT_EXTENSIONS, iter_videos, wanted_dir, wanted_video
+
+# 文件大小与修改时间保持不变这么多秒后，认为已写入完毕
+DEFAULT_STABLE_SECONDS = 2.0
+# 全量扫描间隔（秒）：无 inotify 时据此轮询；有 inotify 时兜底发现 NFS 等远程写入（不产生事件）
+DEFAULT_POLL_SECONDS = 5.0
+# 检查待定文件是否写完的间隔（秒）
+CHECK_INTERVAL = 0.5
+
+# inotify 事件掩码（linux/inotify.h）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+              | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+# 基于 Linux inotify 的目录监视（通过 ctypes 调用 libc，无第三方依赖）；不可用时构造抛出 OSError
+class InotifySource:
+    def __init__(self, folder, exclude=()):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 仅在 Linux 上可用")
+        self.folder = folder
+        self.exclude = exclude
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._dirs = {}  # 监视描述符 -> 目录
+        self.overflowed = False
+        self.add_tree(folder)
+
+    def add_tree(self, top):
+        # 递归监视 top 及其子目录，返回其中已存在的文件（目录是在监视建立前就写入了文件时）
+        found = []
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if current == top and top == self.folder:
+                    raise OSError(err, f"无法监视目录: {current}")
+                # 监视数量达到上限（ENOSPC）等：放弃该目录，由调用方定期全量扫描兜底
+                self.overflowed = True
+                continue
+            self._dirs[wd] = current
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = os.path.relpath(entry.path, self.folder).replace("\\", "/")
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if wanted_dir(rel_path, entry.name, self.exclude):
+                        stack.append(entry.path)
+                elif top != self.folder:
+                    found.append(entry.path)
+        return found
+
+    def wait(self, timeout):
+        # 等待最多 timeout 秒，返回 (有变动的文件路径集合, 被删除或移走的文件与目录路径集合)
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set(), set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set(), set()
+        changed, removed = set(), set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出，可能漏掉了文件，交给调用方全量扫描
+                self.overflowed = True
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                removed.add(path)
+                changed.discard(path)
+            elif mask & IN_ISDIR:
+                rel_path = os.path.relpath(path, self.folder).replace("\\", "/")
+                if mask & (IN_CREATE | IN_MOVED_TO) and wanted_dir(rel_path, name, self.exclude):
+                    changed.update(self.add_tree(path))
+            else:
+                changed.add(path)
+                removed.discard(path)
+        return changed, removed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+# 监视文件夹中新到达的视频：收到变动（inotify）或轮询发现后先放入待定列表，
+# 大小与修改时间持续 stable_seconds 不变（即已写完）才交给提取流程
+class FolderWatcher:
+    def __init__(self, folder, extensions=DEFAULT_EXTENSIONS, exclude=(), stable_seconds=DEFAULT_STABLE_SECONDS,
+                 poll_seconds=DEFAULT_POLL_SECONDS, use_inotify=True, scan_stage=None):
+        self.folder = folder
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.exclude = tuple(exclude)
+        self.stable_seconds = stable_seconds
+        self.poll_seconds = poll_seconds
+        # 每次全量扫描套用的计时上下文（如 RunMetrics 的 scan 阶段）
+        self.scan_stage = scan_stage or nullcontext
+        self.source = None
+        if use_inotify:
+            try:
+                self.source = InotifySource(folder, self.exclude)
+            except OSError as e:
+                print(f"[监视] inotify 不可用，改为每 {poll_seconds:g} 秒轮询: {e}", file=sys.stderr)
+        self._pending = {}   # 待定文件 -> (大小, 修改时间, 开始稳定的时刻)
+        self._queued = {}    # 已交给提取流程的文件 -> (大小, 修改时间)，被覆盖写入后会重新排队
+
+    @property
+    def mode(self):
+        return "inotify" if self.source is not None else "poll"
+
+    def _candidate(self, path):
+        rel_path = os.path.relpath(path, self.folder).replace("\\", "/")
+        if rel_path.startswith("..") or not wanted_video(rel_path, os.path.basename(path), self.extensions,
+                                                         self.exclude):
+            return
+        # 路径中任一级目录被排除（如输出目录）时忽略
+        parts = rel_path.split("/")[:-1]
+        if any(not wanted_dir("/".join(parts[:i + 1]), part, self.exclude) for i, part in enumerate(parts)):
+            return
+        if path not in self._pending:
+            self._pending[path] = (-1, -1, 0.0)
+
+    def _forget(self, removed):
+        # 删除或移走的文件（及目录下的全部文件）不再保留待定与排队记录；移入他处时另有事件重新加入
+        prefixes = tuple(path + os.sep for path in removed)
+        for table in (self._pending, self._queued):
+            for path in [path for path in table if path in removed or path.startswith(prefixes)]:
+                del table[path]
+
+    def _rescan(self):
+        seen = set()
+        with self.scan_stage():
+            for path in iter_videos(self.folder, self.extensions, self.exclude):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(path)
+                if self._queued.get(path) != (st.st_size, st.st_mtime_ns):
+                    self._candidate(path)
+        # 已删除的文件不再保留排队记录
+        for path in [path for path in self._queued if path not in seen]:
+            del self._queued[path]
+
+    def _ready(self, now):
+        ready = []
+        for path, (size, mtime, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                # 写入中被删除或改名
+                del self._pending[path]
+                continue
+            signature = (st.st_size, st.st_mtime_ns)
+            if signature != (size, mtime) or st.st_size == 0:
+                self._pending[path] = signature + (now,)
+            elif now - since >= self.stable_seconds:
+                del self._pending[path]
+                if self._queued.get(path) != signature:
+                    self._queued[path] = signature
+                    ready.append(path)
+        return sorted(ready)
+
+    def batches(self, is_running):
+        # 持续产出已写完的新视频批次，is_running() 返回 False 时结束；启动时先把已有的视频全部纳入
+        self._rescan()
+        last_scan = time.monotonic()
+        try:
+            while is_running():
+                if self.source is not None:
+                    changed, removed = self.source.wait(CHECK_INTERVAL)
+                    self._forget(removed)
+                    for path in changed:
+                        self._candidate(path)
+                    if self.source.overflowed:
+                        self.source.overflowed = False
+                        self._rescan()
+                        last_scan = time.monotonic()
+                else:
+                    time.sleep(CHECK_INTERVAL)
+                if time.monotonic() - last_scan >= self.poll_seconds:
+                    # inotify 模式下也定期全量扫描：远程客户端写入不产生事件，同时清理漏掉删除事件的记录
+                    self._rescan()
+                    last_scan = time.monotonic()
+                ready = self._ready(time.monotonic())
+                if ready and is_running():
+                    yield ready
+        finally:
+            if self.source is not None:
+                self.source.close()
@@ -0,0 +1,259 @@
+# Project Path: core/FrameShards.py
+import json
+import os
+import tarfile
+import threading
+import time
+
+# 分片文件名：frames-000000.tar、frames-000001.tar ……（WebDataset 风格，可直接按顺序流式读取）
+SHARD_PREFIX = "frames-"
+SHARD_SUFFIX = ".tar"
+# 偏移索引：每行 [成员名, 分片序号, 数据偏移, 数据长度]；单元素行 [前缀] 表示作废该前缀下此前的全部成员
+INDEX_NAME = "frames_index.jsonl"
+DEFAULT_SHARD_SIZE = 1024 * 1024 * 1024
+
+_BLOCK = tarfile.BLOCKSIZE
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def shard_name(number):
+    return f"{SHARD_PREFIX}{number:06d}{SHARD_SUFFIX}"
+
+
+def list_shards(output_root):
+    try:
+        return sorted(e.name for e in os.scandir(output_root)
+                      if e.is_file() and e.name.startswith(SHARD_PREFIX) and e.name.endswith(SHARD_SUFFIX))
+    except FileNotFoundError:
+        return []
+
+
+def load_index(output_root):
+    # 读取偏移索引，返回 {前缀: {成员名: (分片序号, 偏移, 长度)}}；同名成员以最后一次写入为准
+    members = {}
+    try:
+        with open(os.path.join(output_root, INDEX_NAME), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                if len(record) == 1:
+                    members.pop(record[0], None)
+                elif len(record) == 4:
+                    name, shard, offset, size = record
+                    members.setdefault(name.rpartition("/")[0], {})[name] = (shard, offset, size)
+    except FileNotFoundError:
+        pass
+    return members
+
+
+# 把 ffmpeg image2pipe 输出的连续图片字节流切分为单张图片（PNG 按块长度，JPG 按标记段，WebP 按 RIFF 头中的长度）
+class ImageStreamSplitter:
+    def __init__(self, image_format):
+        self.image_format = image_format.lower()
+        self._buf = bytearray()
+        self._pos = 0          # 上次解析停下的位置，避免重复扫描
+        self._in_scan = False  # JPG：停在熵编码数据中
+
+    def feed(self, chunk):
+        self._buf += chunk
+        images = []
+        while True:
+            if self.image_format == "png":
+                end = self._find_png_end()
+            elif self.image_format == "webp":
+                end = self._find_webp_end()
+            else:
+                end = self._find_jpg_end()
+            if end is None:
+                return images
+            images.append(bytes(self._buf[:end]))
+            del self._buf[:end]
+            self._pos, self._in_scan = 0, False
+
+    def _find_png_end(self):
+        buf = self._buf
+        if len(buf) < 8:
+            return None
+        if buf[:8] != _PNG_SIGNATURE:
+            raise ValueError("ffmpeg 输出不是 PNG 数据流")
+        pos = self._pos or 8
+        while len(buf) >= pos + 8:
+            length = int.from_bytes(buf[pos:pos + 4], "big")
+            end = pos + 12 + length
+            if len(buf) < end:
+                break
+            if buf[pos + 4:pos + 8] == b"IEND":
+                return end
+            pos = end
+        self._pos = pos
+        return None
+
+    def _find_webp_end(self):
+        buf = self._buf
+        if len(buf) < 12:
+            return None
+        if buf[:4] != b"RIFF" or buf[8:12] != b"WEBP":
+            raise ValueError("ffmpeg 输出不是 WebP 数据流")
+        # RIFF 长度不含开头 8 字节；块按偶数字节对齐
+        size = int.from_bytes(buf[4:8], "little")
+        end = 8 + size + (size & 1)
+        return end if len(buf) >= end else None
+
+    def _find_jpg_end(self):
+        buf = self._buf
+        if len(buf) < 2:
+            return None
+        if buf[:2] != b"\xff\xd8":
+            raise ValueError("ffmpeg 输出不是 JPG 数据流")
+        pos = self._pos or 2
+        while True:
+            if self._in_scan:
+                # 熵编码数据中 0xFF 后跟 0x00（转义）或 RSTn 都不是段标记
+                while True:
+                    pos = buf.find(b"\xff", pos)
+                    if pos < 0 or pos + 1 >= len(buf):
+                        self._pos = len(buf) if pos < 0 else pos
+                        return None
+                    nxt = buf[pos + 1]
+                    if nxt == 0x00 or 0xD0 <= nxt <= 0xD7:
+                        pos += 2
+                        continue
+                    break
+                self._in_scan = False
+            if pos + 2 > len(buf):
+                break
+            if buf[pos] != 0xFF:
+                raise ValueError("JPG 数据流损坏")
+            marker = buf[pos + 1]
+            if marker == 0xFF:
+                # 填充字节
+                pos += 1
+                continue
+            if marker == 0xD9:
+                return pos + 2
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                pos += 2
+                continue
+            if pos + 4 > len(buf):
+                break
+            end = pos + 2 + int.from_bytes(buf[pos + 2:pos + 4], "big")
+            if end > len(buf):
+                break
+            pos = end
+            self._in_scan = marker == 0xDA
+        self._pos = pos
+        return None
+
+
+# 把帧图片顺序写入固定大小上限的 tar 分片，并同步追加偏移索引；多个提取线程共用一个实例
+class ShardWriter:
+    def __init__(self, output_root, shard_size=DEFAULT_SHARD_SIZE):
+        self.output_root = output_root
+        self.shard_size = max(_BLOCK * 4, int(shard_size))
+        self._lock = threading.Lock()
+        self._members = load_index(output_root)
+        # 续提时从新的分片开始，上一次可能中断在写了一半的分片上
+        existing = list_shards(output_root)
+        self._next_shard = int(existing[-1][len(SHARD_PREFIX):-len(SHARD_SUFFIX)]) + 1 if existing else 0
+        self._shard = None
+        self._shard_no = None
+        self._shard_pos = 0
+        self._index = open(os.path.join(output_root, INDEX_NAME), "a", encoding="utf-8")
+
+    def _open_next_shard(self):
+        self._close_shard()
+        self._shard_no = self._next_shard
+        self._next_shard += 1
+        self._shard = open(os.path.join(self.output_root, shard_name(self._shard_no)), "wb", buffering=1024 * 1024)
+        self._shard_pos = 0
+
+    def _close_shard(self):
+        if self._shard is not None:
+            # tar 结尾的两个空块
+            self._shard.write(b"\0" * (_BLOCK * 2))
+            self._shard.close()
+            self._shard = None
+
+    def add(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        padding = -len(data) % _BLOCK
+        record_size = len(header) + len(data) + padding
+        with self._lock:
+            if self._shard is None or (self._shard_pos and self._shard_pos + record_size > self.shard_size):
+                self._open_next_shard()
+            offset = self._shard_pos + len(header)
+            self._shard.write(header)
+            self._shard.write(data)
+            self._shard.write(b"\0" * padding)
+            self._shard_pos += record_size
+            self._members.setdefault(name.rpartition("/")[0], {})[name] = (self._shard_no, offset, len(data))
+            self._index.write(json.dumps([name, self._shard_no, offset, len(data)], ensure_ascii=False) + "\n")
+
+    def entries(self, prefix):
+        # 某个视频（成员名前缀）已写入的帧：[(成员名, 字节数)]
+        with self._lock:
+            members = self._members.get(prefix, {})
+            return sorted((name, entry[2]) for name, entry in members.items())
+
+    def discard(self, prefix):
+        # 作废未完成视频的残留帧；数据仍留在旧分片中，但不再出现在索引里
+        with self._lock:
+            if self._members.pop(prefix, None) is not None:
+                self._index.write(json.dumps([prefix], ensure_ascii=False) + "\n")
+
+    def flush(self):
+        # 写入清单前调用，保证清单记录的帧都已落盘
+        with self._lock:
+            if self._shard is not None:
+                self._shard.flush()
+            self._index.flush()
+
+    def close(self):
+        with self._lock:
+            self._close_shard()
+            self._index.close()
+
+
+# 按偏移索引随机读取单帧，无需解包分片
+class ShardReader:
+    def __init__(self, output_root):
+        self.output_root = output_root
+        self._entries = {}
+        for members in load_index(output_root).values():
+            self._entries.update(members)
+        self._files = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self):
+        return sorted(self._entries)
+
+    def read(self, name):
+        shard, offset, size = self._entries[name]
+        f = self._files.get(shard)
+        if f is None:
+            f = self._files[shard] = open(os.path.join(self.output_root, shard_name(shard)), "rb")
+        f.seek(offset)
+        return f.read(size)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
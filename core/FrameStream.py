@@ -0,0 +1,175 @@
+# Project Path: core/FrameStream.py
+import queue
+import re
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from core.FFmpegCommands import MODE_KEYFRAMES, build_select_filter, input_args
+from core.FFmpegPaths import FFMPEG_BIN, CREATE_NO_WINDOW
+from core.VideoProbe import probe_video
+
+# 支持的原始像素格式及每像素字节数（按 uint8 通道计）
+PIX_FMT_CHANNELS = {
+    "rgb24": 3,
+    "bgr24": 3,
+    "rgba": 4,
+    "bgra": 4,
+    "gray": 1,
+}
+
+_PTS_TIME_RE = re.compile(r"pts_time:\s*(-?[\d.]+)")
+
+
+@dataclass
+class StreamFrame:
+    index: int          # 输出序号，从 0 开始，对应文件模式下的 frame_%04d（index + 1）
+    timestamp: float    # 源视频中的时间（秒），无法获取时为 None
+    data: Any           # numpy.ndarray（H, W, C）或 memoryview
+
+
+def output_size(meta, width=None, height=None):
+    # ffmpeg 默认会按旋转信息自动转正画面，宽高随之互换
+    src_w, src_h = meta.width, meta.height
+    if meta.rotation in (90, 270):
+        src_w, src_h = src_h, src_w
+    if not src_w or not src_h:
+        raise ValueError("无法获取视频分辨率")
+    if width and height:
+        return int(width), int(height)
+    if width:
+        return int(width), max(2, int(round(src_h * width / src_w / 2)) * 2)
+    if height:
+        return max(2, int(round(src_w * height / src_h / 2)) * 2), int(height)
+    return src_w, src_h
+
+
+def build_stream_cmd(path, mode, param, size, pix_fmt, threads=0, scaler="bicubic"):
+    filters = [build_select_filter(mode, param), f"scale={size[0]}:{size[1]}:flags={scaler}", "showinfo"]
+    cmd = [FFMPEG_BIN, "-hide_banner", "-nostats", "-loglevel", "info"]
+    cmd += input_args(path, threads, False, keyframes_only=mode == MODE_KEYFRAMES)
+    cmd += ["-vf", ",".join(f for f in filters if f), "-vsync", "vfr",
+            "-f", "rawvideo", "-pix_fmt", pix_fmt, "pipe:1"]
+    return cmd
+
+
+def _read_exact(stream, buffer):
+    view = memoryview(buffer)
+    filled = 0
+    while filled < len(buffer):
+        n = stream.readinto(view[filled:])
+        if not n:
+            return filled
+        filled += n
+    return filled
+
+
+def iter_frames(path, mode, param, width=None, height=None, pix_fmt="rgb24", output="numpy",
+                read_ahead=4, threads=0, meta=None):
+    # 与文件模式相同的 mode/param 语义，把帧以原始像素直接从 ffmpeg 的 stdout 读出，不落盘。
+    # output="numpy" 时每帧为独立的 ndarray；output="memoryview" 时复用 read_ahead + 2 块缓冲区，
+    # 返回的 memoryview 只在迭代到下一帧之前有效，需要保留时请自行复制。
+    if pix_fmt not in PIX_FMT_CHANNELS:
+        raise ValueError(f"不支持的像素格式: {pix_fmt}")
+    if output not in ("numpy", "memoryview"):
+        raise ValueError(f"不支持的输出类型: {output}")
+    np = None
+    if output == "numpy":
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("output='numpy' 需要安装 numpy，或改用 output='memoryview'")
+
+    meta = meta or probe_video(path)
+    w, h = output_size(meta, width, height)
+    channels = PIX_FMT_CHANNELS[pix_fmt]
+    frame_bytes = w * h * channels
+
+    proc = subprocess.Popen(
+        build_stream_cmd(path, mode, param, (w, h), pix_fmt, threads),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=CREATE_NO_WINDOW, shell=False
+    )
+
+    # stderr 中 showinfo 的 pts_time 与输出帧一一对应
+    timestamps = queue.Queue()
+    stderr_tail = []
+
+    def read_stderr():
+        for raw in proc.stderr:
+            line = raw.decode(errors="ignore")
+            if "Parsed_showinfo" in line and " n:" in line:
+                match = _PTS_TIME_RE.search(line)
+                timestamps.put(float(match.group(1)) if match else None)
+            else:
+                stderr_tail.append(line)
+                del stderr_tail[:-20]
+
+    # 有界预读：队列满时读线程阻塞，ffmpeg 随之因管道写满而暂停，内存占用有上限
+    read_ahead = max(1, read_ahead)
+    frames = queue.Queue(maxsize=read_ahead)
+    ring = [bytearray(frame_bytes) for _ in range(read_ahead + 2)] if output == "memoryview" else None
+    stop_event = threading.Event()
+    _end = object()
+
+    def read_stdout():
+        index = 0
+        try:
+            while not stop_event.is_set():
+                buffer = ring[index % len(ring)] if ring else bytearray(frame_bytes)
+                if _read_exact(proc.stdout, buffer) < frame_bytes:
+                    break
+                while not stop_event.is_set():
+                    try:
+                        frames.put(buffer, timeout=0.2)
+                        break
+                    except queue.Full:
+                        continue
+                index += 1
+        finally:
+            while True:
+                try:
+                    frames.put(_end, timeout=0.2)
+                    break
+                except queue.Full:
+                    if stop_event.is_set():
+                        break
+
+    stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+    stdout_thread = threading.Thread(target=read_stdout, daemon=True)
+    stderr_thread.start()
+    stdout_thread.start()
+
+    index = 0
+    try:
+        while True:
+            buffer = frames.get()
+            if buffer is _end:
+                break
+            try:
+                timestamp = timestamps.get(timeout=5)
+            except queue.Empty:
+                timestamp = None
+            if np is not None:
+                data = np.frombuffer(buffer, dtype=np.uint8).reshape(h, w, channels)
+            else:
+                data = memoryview(buffer)
+            yield StreamFrame(index, timestamp, data)
+            index += 1
+        proc.wait()
+        stderr_thread.join(timeout=5)
+        if proc.returncode != 0:
+            raise RuntimeError("ffmpeg 执行失败: " + "".join(stderr_tail).strip())
+    finally:
+        # 调用方提前结束迭代（break / close）时终止 ffmpeg
+        stop_event.set()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        # 清空队列，确保读线程不会阻塞在 put 上
+        while True:
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                break
+        stdout_thread.join(timeout=5)
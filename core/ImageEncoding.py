@@ -0,0 +1,137 @@
+# Project Path: core/ImageEncoding.py
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+IMAGE_FORMATS = ("png", "jpg", "webp")
+# 有损格式的默认压缩质量（1-100）
+DEFAULT_QUALITY = {"jpg": 85, "webp": 80}
+# 压缩级别的取值范围：PNG 为 zlib 级别（越小越快、文件越大），WebP 为编码方法（越小越快）
+COMPRESSION_LEVELS = {"png": (0, 9), "webp": (0, 6)}
+# 缩放算法（swscale flags）：fast_bilinear 最快，lanczos 画质最好
+SCALERS = ("fast_bilinear", "bilinear", "bicubic", "area", "lanczos")
+DEFAULT_SCALER = "bicubic"
+# 各格式可选的像素格式，None（自动）时由 ffmpeg 按编码器选择
+PIXEL_FORMATS = {
+    "png": ("rgb24", "rgba", "gray", "rgb48be", "gray16be"),
+    "jpg": ("yuvj420p", "yuvj422p", "yuvj444p", "gray"),
+    "webp": ("yuv420p", "yuva420p"),
+}
+# 各格式写单帧文件时使用的编码器
+FILE_CODECS = {
+    "png": "png",
+    "jpg": "mjpeg",
+    "webp": "libwebp",
+}
+
+_CROP_RE = re.compile(r"^(\d+):(\d+)(?::(\d+):(\d+))?$")
+
+
+def parse_crop(text):
+    # 裁剪区域 "宽:高[:x:y]"（源视频像素），省略 x:y 时居中裁剪；返回规范化的字符串，空值返回 None
+    text = (text or "").strip()
+    if not text:
+        return None
+    match = _CROP_RE.match(text)
+    if not match or not int(match.group(1)) or not int(match.group(2)):
+        raise ValueError(f"裁剪区域格式应为 宽:高[:x:y]: {text}")
+    return text
+
+
+# 帧图片的编码与后处理：格式、质量 / 压缩级别、像素格式，以及挑帧之后的裁剪与缩放。
+# 裁剪与缩放放在滤镜链末尾，只处理挑出的帧；输出尺寸越小，编码越快
+@dataclass(frozen=True)
+class ImageEncoding:
+    image_format: str = "png"
+    quality: Optional[int] = None            # JPG / WebP 压缩质量 1-100
+    compression_level: Optional[int] = None  # PNG 0-9 / WebP 0-6，None 为编码器默认
+    width: Optional[int] = None              # 只给宽或高时另一边按比例缩放
+    height: Optional[int] = None
+    scaler: str = DEFAULT_SCALER
+    crop: Optional[str] = None               # "宽:高[:x:y]"，在缩放之前进行
+    pix_fmt: Optional[str] = None
+
+    def __post_init__(self):
+        image_format = self.image_format.lower()
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"不支持的图片格式: {self.image_format}")
+        object.__setattr__(self, "image_format", image_format)
+        if image_format in DEFAULT_QUALITY:
+            quality = self.quality if self.quality is not None else DEFAULT_QUALITY[image_format]
+            if not 1 <= quality <= 100:
+                raise ValueError("压缩质量需在 1-100 之间")
+            object.__setattr__(self, "quality", int(quality))
+        else:
+            object.__setattr__(self, "quality", None)
+        if self.compression_level is not None:
+            if image_format not in COMPRESSION_LEVELS:
+                # JPG 没有压缩级别，只能通过压缩质量调整
+                raise ValueError(f"{image_format.upper()} 不支持压缩级别，请使用压缩质量")
+            low, high = COMPRESSION_LEVELS[image_format]
+            if not low <= self.compression_level <= high:
+                raise ValueError(f"{image_format.upper()} 压缩级别需在 {low}-{high} 之间")
+        if self.width is not None and self.width <= 0 or self.height is not None and self.height <= 0:
+            raise ValueError("输出宽高必须为正整数")
+        if self.scaler not in SCALERS:
+            raise ValueError(f"未知的缩放算法: {self.scaler}")
+        object.__setattr__(self, "crop", parse_crop(self.crop))
+        if self.pix_fmt and self.pix_fmt not in PIXEL_FORMATS[image_format]:
+            raise ValueError(f"{image_format.upper()} 不支持像素格式 {self.pix_fmt}，"
+                             f"可选: {', '.join(PIXEL_FORMATS[image_format])}")
+
+    @property
+    def resizes(self):
+        return bool(self.width or self.height)
+
+    def filters(self):
+        # 挑帧之后追加的滤镜：先裁剪再缩放
+        filters = []
+        if self.crop:
+            filters.append(f"crop={self.crop}")
+        if self.resizes:
+            filters.append(f"scale={self.width or -2}:{self.height or -2}:flags={self.scaler}")
+        return filters
+
+    def output_args(self, to_pipe=False):
+        args = []
+        if to_pipe:
+            args += ["-f", "image2pipe"]
+        if to_pipe or self.image_format == "webp":
+            args += ["-c:v", FILE_CODECS[self.image_format]]
+        if self.image_format == "jpg":
+            args += ["-qscale:v", str(int((100 - self.quality) / 5 + 2))]
+        elif self.image_format == "webp":
+            args += ["-quality", str(self.quality)]
+        if self.compression_level is not None:
+            args += ["-compression_level", str(self.compression_level)]
+        if self.pix_fmt:
+            args += ["-pix_fmt", self.pix_fmt]
+        return args
+
+    def extra_params(self):
+        # 除格式与质量外影响输出内容的设置，用于续提时比较参数；均为默认值时为空，与旧版本的清单兼容
+        params = {}
+        if self.compression_level is not None:
+            params["compression_level"] = self.compression_level
+        if self.resizes:
+            params["scale"] = [self.width, self.height, self.scaler]
+        if self.crop:
+            params["crop"] = self.crop
+        if self.pix_fmt:
+            params["pix_fmt"] = self.pix_fmt
+        return params
+
+    def output_pixels(self, width, height):
+        # 按源视频尺寸估算输出图片的像素数，用于开销估算
+        if self.crop:
+            crop_w, crop_h = self.crop.split(":")[:2]
+            width, height = min(width, int(crop_w)), min(height, int(crop_h))
+        if self.width and self.height:
+            width, height = self.width, self.height
+        elif self.width:
+            height = height * self.width / max(1, width)
+            width = self.width
+        elif self.height:
+            width = width * self.height / max(1, height)
+            height = self.height
+        return max(1, int(width * height))
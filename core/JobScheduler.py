@@ -0,0 +1,114 @@
+# Project Path: core/JobScheduler.py
+import heapq
+import itertools
+import os
+import threading
+
+from core.FFmpegCommands import MODE_KEYFRAMES, MODE_SCENES, STRATEGY_SEEK, choose_strategy
+
+# 相对 H.264 的解码开销系数
+CODEC_COST = {
+    "h264": 1.0,
+    "hevc": 1.6,
+    "av1": 2.0,
+    "vp9": 1.4,
+    "vp8": 0.9,
+    "mpeg4": 0.6,
+    "mpeg2video": 0.5,
+    "prores": 0.8,
+    "mjpeg": 0.7,
+}
+# 编码一张图片相对解码一帧的开销
+IMAGE_ENCODE_COST = {
+    "png": 3.0,
+    "jpg": 1.0,
+    "webp": 4.0,
+}
+
+
+def estimate_cost(meta, mode, param, encoding, frame_count):
+    # 以“解码像素帧”为单位估算单个视频的耗时：解码量 × 分辨率 × 编码格式系数 + 输出帧的编码量（按输出像素计）
+    pixels = max(1, meta.width * meta.height)
+    codec_factor = CODEC_COST.get(meta.codec, 1.0)
+    gop_frames = (meta.keyframe_interval or 2.0) * meta.fps
+    if mode == MODE_KEYFRAMES:
+        decoded_frames = meta.duration / (meta.keyframe_interval or 2.0)
+    elif mode == MODE_SCENES:
+        # 检测需完整解码一遍（缩小后分析，不编码），取帧时每个切换点再解码半个 GOP
+        decoded_frames = meta.total_frames + frame_count * (gop_frames / 2 + 1)
+    elif choose_strategy(meta, mode, param) == STRATEGY_SEEK:
+        # 每个目标平均需要从关键帧解码半个 GOP
+        decoded_frames = frame_count * (gop_frames / 2 + 1)
+    else:
+        decoded_frames = meta.total_frames
+    encoded_frames = frame_count * IMAGE_ENCODE_COST.get(encoding.image_format, 1.0)
+    return decoded_frames * codec_factor * pixels + encoded_frames * encoding.output_pixels(meta.width, meta.height)
+
+
+def estimate_multi_cost(meta, specs, frame_counts):
+    # 多输出共用一次顺序解码，只有编码量按各输出累加；缩放后的输出按输出像素计编码量
+    pixels = max(1, meta.width * meta.height)
+    codec_factor = CODEC_COST.get(meta.codec, 1.0)
+    if all(spec.mode == MODE_KEYFRAMES for spec in specs):
+        decoded_frames = meta.duration / (meta.keyframe_interval or 2.0)
+    else:
+        decoded_frames = meta.total_frames
+    cost = decoded_frames * codec_factor * pixels
+    for spec, frames in zip(specs, frame_counts):
+        cost += frames * IMAGE_ENCODE_COST.get(spec.image_format, 1.0) * spec.encoding().output_pixels(
+            meta.width, meta.height)
+    return cost
+
+
+# 按预估耗时从大到小（LPT）派发任务，并在并发任务间分配 ffmpeg 解码线程
+class JobScheduler:
+    def __init__(self, max_jobs, core_budget=None, fixed_threads=None):
+        self.max_jobs = max(1, max_jobs)
+        self.core_budget = core_budget or os.cpu_count() or 4
+        self.fixed_threads = fixed_threads
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._running = {}   # job -> cost
+        self._closed = False
+
+    def add(self, job, cost):
+        with self._cond:
+            heapq.heappush(self._heap, (-cost, next(self._seq), job))
+            self._cond.notify()
+
+    def close(self):
+        # 不再有新任务加入；队列取空后 take() 返回 None
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def take(self):
+        with self._cond:
+            while not self._heap and not self._closed:
+                self._cond.wait()
+            if not self._heap:
+                return None, 0
+            neg_cost, _, job = heapq.heappop(self._heap)
+            cost = -neg_cost
+            threads = self._threads_for(cost)
+            self._running[id(job)] = cost
+            return job, threads
+
+    def done(self, job):
+        with self._cond:
+            self._running.pop(id(job), None)
+
+    def _threads_for(self, cost):
+        if self.fixed_threads:
+            return self.fixed_threads
+        # 与正在运行的任务以及即将填满并发位的待办任务按耗时比例分配核心；
+        # 批次末尾只剩少数大任务时，它们能拿到全部核心
+        slots = self.max_jobs - len(self._running) - 1
+        peers = list(self._running.values())
+        if slots > 0:
+            peers += [-c for c, _, _ in heapq.nsmallest(slots, self._heap)]
+        total = cost + sum(peers)
+        if total <= 0:
+            return max(1, self.core_budget // self.max_jobs)
+        return max(1, min(self.core_budget, round(self.core_budget * cost / total)))
@@ -0,0 +1,95 @@
+# Project Path: core/OutputSpecs.py
+import json
+import re
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from core.FFmpegCommands import MODE_NAMES, MODE_SCENES
+from core.ImageEncoding import DEFAULT_SCALER, IMAGE_FORMATS, ImageEncoding
+
+_SPEC_NAME_RE = re.compile(r"^[^/\\:*?\"<>|]+$")
+
+
+# 多输出任务中的一项输出：各自的采样规则、格式、质量与缩放，写入 output_root 下同名子文件夹
+@dataclass
+class OutputSpec:
+    name: str
+    mode: int
+    param: int
+    image_format: str = "png"
+    jpg_quality: Optional[int] = None  # JPG / WebP 压缩质量
+    width: Optional[int] = None    # 只给宽或高时另一边按比例缩放
+    height: Optional[int] = None
+    scaler: str = DEFAULT_SCALER
+    crop: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    compression_level: Optional[int] = None
+
+    def to_dict(self):
+        # 后加入的编码设置为默认值时省略，旧版本写下的清单仍能续提
+        data = asdict(self)
+        for key, default in (("scaler", DEFAULT_SCALER), ("crop", None), ("pix_fmt", None),
+                             ("compression_level", None)):
+            if data[key] == default:
+                del data[key]
+        return data
+
+    def encoding(self):
+        return ImageEncoding(self.image_format, self.jpg_quality, self.compression_level, self.width, self.height,
+                             self.scaler, self.crop, self.pix_fmt)
+
+
+def parse_output_spec(data):
+    if not isinstance(data, dict):
+        raise ValueError("每项输出配置必须是 JSON 对象")
+    name = str(data.get("name", "")).strip()
+    if not name or name in (".", "..") or not _SPEC_NAME_RE.match(name):
+        raise ValueError(f"输出名称无效: {name!r}")
+    mode = data.get("mode", "seconds")
+    if isinstance(mode, str):
+        if mode not in MODE_NAMES:
+            raise ValueError(f"[{name}] 未知的提取模式: {mode}")
+        mode = MODE_NAMES[mode]
+    if mode == MODE_SCENES:
+        # 场景切换需要先检测再跳转取帧，无法与其他输出共用一次顺序解码
+        raise ValueError(f"[{name}] 多输出任务暂不支持场景切换模式")
+    param = int(data.get("param", 1))
+    if param < (0 if mode == MODE_NAMES["keyframes"] else 1):
+        raise ValueError(f"[{name}] 参数N 无效: {param}")
+    image_format = str(data.get("format", "png")).lower()
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"[{name}] 不支持的图片格式: {image_format}")
+    quality = data.get("quality")
+    level = data.get("compression_level")
+    try:
+        encoding = ImageEncoding(
+            image_format,
+            int(quality) if quality is not None else None,
+            int(level) if level is not None else None,
+            int(data["width"]) if data.get("width") else None,
+            int(data["height"]) if data.get("height") else None,
+            str(data.get("scaler") or DEFAULT_SCALER),
+            data.get("crop") or None,
+            data.get("pix_fmt") or None,
+        )
+    except ValueError as e:
+        raise ValueError(f"[{name}] {e}")
+    return OutputSpec(name, mode, param, encoding.image_format, encoding.quality, encoding.width, encoding.height,
+                      encoding.scaler, encoding.crop, encoding.pix_fmt, encoding.compression_level)
+
+
+def parse_output_specs(data):
+    # 任务定义：{"outputs": [...]} 或直接是输出配置列表
+    items = data.get("outputs") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise ValueError("任务定义中没有输出配置")
+    specs = [parse_output_spec(item) for item in items]
+    names = [spec.name.lower() for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("输出名称不能重复")
+    return specs
+
+
+def load_output_specs(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_output_specs(json.load(f))
@@ -0,0 +1,127 @@
+# Project Path: core/ProbeCache.py
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from core.VideoProbe import VideoMeta
+
+DEFAULT_MAX_ENTRIES = 200000
+# sqlite 单条语句的参数数量有上限，批量查询时分块
+_QUERY_CHUNK = 500
+
+
+def default_cache_path():
+    # 与 QSettings("MyCompany", "VideoFrameExtractor") 的存放位置保持一致
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, "MyCompany", "VideoFrameExtractor_probe_cache.sqlite3")
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+# 按 (绝对路径, 大小, mtime_ns) 缓存 ffprobe 结果，文件未变化时跳过探测
+class ProbeCache:
+    def __init__(self, db_path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path or default_cache_path()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS probe_cache ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, meta TEXT, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_probe_cache_last_used ON probe_cache(last_used)")
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
+
+    def get(self, path):
+        return self.get_many([path]).get(path)
+
+    def get_many(self, paths):
+        # 批量预热：一次性查出所有未变化文件的探测结果，返回 {原始路径: VideoMeta}
+        fingerprints = {}
+        for path in paths:
+            try:
+                fingerprints[path] = file_fingerprint(path)
+            except OSError:
+                continue
+        by_abs = {fp[0]: (path, fp) for path, fp in fingerprints.items()}
+        abs_paths = list(by_abs)
+
+        result = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(abs_paths), _QUERY_CHUNK):
+                chunk = abs_paths[i:i + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT path, size, mtime_ns, meta FROM probe_cache WHERE path IN ({placeholders})", chunk
+                ).fetchall()
+                hits = []
+                for abs_path, size, mtime_ns, meta_text in rows:
+                    path, fp = by_abs[abs_path]
+                    if (size, mtime_ns) != fp[1:]:
+                        continue
+                    try:
+                        meta = VideoMeta.from_dict(json.loads(meta_text))
+                    except (ValueError, TypeError, KeyError):
+                        continue
+                    meta.path = path
+                    result[path] = meta
+                    hits.append((now, abs_path))
+                if hits:
+                    self._conn.executemany("UPDATE probe_cache SET last_used = ? WHERE path = ?", hits)
+            self._conn.commit()
+        return result
+
+    def put(self, path, meta):
+        try:
+            abs_path, size, mtime_ns = file_fingerprint(path)
+        except OSError:
+            return
+        meta_text = json.dumps(meta.to_dict(), ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probe_cache (path, size, mtime_ns, meta, last_used) VALUES (?, ?, ?, ?, ?)",
+                (abs_path, size, mtime_ns, meta_text, time.time())
+            )
+            self._pending_writes += 1
+            # 攒一批再提交并检查容量，避免每个文件都触发一次磁盘同步
+            if self._pending_writes >= 64:
+                self._evict()
+                self._conn.commit()
+                self._pending_writes = 0
+
+    def flush(self):
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def _evict(self):
+        # 超出容量时淘汰最久未使用的记录
+        if not self.max_entries:
+            return
+        self._conn.execute(
+            "DELETE FROM probe_cache WHERE path IN ("
+            "SELECT path FROM probe_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
@@ -0,0 +1,124 @@
+# Project Path: core/ProcessWatchdog.py
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+# 没有进度可参考时的最短时限（秒）
+MIN_TIMEOUT = 120
+# 尚无进度时按视频时长估算的时限：每秒视频最多允许的处理秒数
+TIMEOUT_PER_MEDIA_SECOND = 5.0
+# 有进度后按实际速度推算总耗时，时限为推算值的倍数
+PROJECTION_FACTOR = 2.0
+# 连续这么多秒既没有新帧、处理到的时间点也不前进即视为卡住；稀疏取帧时按相邻输出帧的视频间隔放宽
+MIN_STALL_SECONDS = 60
+STALL_PER_MEDIA_SECOND = 5.0
+PROBE_TIMEOUT = 60
+CHECK_INTERVAL = 1.0
+
+# 子进程放进独立的进程组，超时时连同其派生的进程一起结束
+if sys.platform == "win32":
+    PROCESS_GROUP_KWARGS = {"creationflags": 0x00000200}  # CREATE_NEW_PROCESS_GROUP
+else:
+    PROCESS_GROUP_KWARGS = {"start_new_session": True}
+
+
+def signal_process_group(proc, sig=None):
+    # sig 为 None 时强制结束整个进程组
+    if proc.poll() is not None:
+        return
+    try:
+        if sys.platform == "win32":
+            if sig is None:
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=0x08000000)
+            else:
+                proc.terminate()
+        else:
+            os.killpg(proc.pid, signal.SIGKILL if sig is None else sig)
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def extraction_limits(duration, frame_count=None):
+    # 顺序解码整段视频的时限：(总时限秒数, 卡住判定秒数)
+    timeout = max(MIN_TIMEOUT, duration * TIMEOUT_PER_MEDIA_SECOND)
+    stall = MIN_STALL_SECONDS
+    if frame_count:
+        stall = max(stall, duration / frame_count * STALL_PER_MEDIA_SECOND)
+    return timeout, stall
+
+
+class ProcessTimeout(Exception):
+    pass
+
+
+class _Entry:
+    def __init__(self, proc, timeout, stall, media_duration):
+        now = time.monotonic()
+        self.proc = proc
+        self.start = now
+        self.deadline = now + timeout
+        self.min_timeout = timeout if media_duration is None else MIN_TIMEOUT
+        self.stall = stall
+        self.media_duration = media_duration
+        self.last_advance = now
+        self.last_frames = -1
+        self.last_out_time = -1.0
+        self.reason = None
+
+    def advance(self, frames, out_time):
+        now = time.monotonic()
+        if frames is not None and frames > self.last_frames:
+            self.last_frames = frames
+            self.last_advance = now
+        if out_time is not None and out_time > self.last_out_time:
+            # 去重时静止画面可能几分钟不保留新帧，但去重计数输出的时间点仍在前进，不算卡住
+            self.last_out_time = out_time
+            self.last_advance = now
+        if self.media_duration and out_time:
+            # 按已处理到的时间点推算总耗时：慢但稳定的视频不会被误杀，卡住的视频不必等满固定时限
+            projected = (now - self.start) * self.media_duration / out_time
+            self.deadline = self.start + max(self.min_timeout, projected * PROJECTION_FACTOR)
+
+
+# 监视正在运行的 ffmpeg / ffprobe：超过时限或长时间没有新帧时结束其进程组，
+# run_process 随后抛出 ProcessTimeout。所有子进程共用一个后台线程
+class ProcessWatchdog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = set()
+        self._thread = None
+
+    def watch(self, proc, timeout, stall=None, media_duration=None):
+        # stall 为 None 表示该进程不上报进度，只检查总时限；media_duration 给出时按进度推算时限
+        entry = _Entry(proc, timeout, stall, media_duration)
+        with self._lock:
+            self._entries.add(entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+        return entry
+
+    def unwatch(self, entry):
+        with self._lock:
+            self._entries.discard(entry)
+
+    def _loop(self):
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            now = time.monotonic()
+            with self._lock:
+                entries = list(self._entries)
+            for entry in entries:
+                if entry.reason is not None:
+                    continue
+                if now > entry.deadline:
+                    entry.reason = f"处理超时（{now - entry.start:.0f} 秒）"
+                elif entry.stall is not None and now - entry.last_advance > entry.stall:
+                    entry.reason = f"{now - entry.last_advance:.0f} 秒没有新帧且处理进度未前进，疑似卡住"
+                else:
+                    continue
+                signal_process_group(entry.proc)
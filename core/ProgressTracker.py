@@ -0,0 +1,127 @@
+# Project Path: core/ProgressTracker.py
+import threading
+import time
+
+# 默认每秒最多推送 10 次进度
+DEFAULT_MIN_INTERVAL = 0.1
+
+
+def _parse_out_time(value):
+    # -progress 中的 out_time 形如 00:01:02.345678
+    try:
+        h, m, s = value.split(":")
+        return int(h) * 3600 + int(m) * 60 + float(s)
+    except (ValueError, AttributeError):
+        return None
+
+
+# 解析 ffmpeg -progress 输出的 key=value 块，每遇到 progress= 行返回一次汇总；
+# 某块缺少的字段沿用上一块的值
+class FFmpegProgressParser:
+    def __init__(self):
+        self._block = {}
+
+    def feed(self, line):
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return None
+        self._block[key.strip()] = value.strip()
+        if key.strip() != "progress":
+            return None
+        block = self._block
+        try:
+            frames = int(block.get("frame", 0))
+        except ValueError:
+            frames = 0
+        try:
+            fps = float(block.get("fps", 0))
+        except ValueError:
+            fps = 0.0
+        return {
+            "frames": frames,
+            "fps": fps,
+            "speed": block.get("speed", "").rstrip("x").strip() or None,
+            "out_time": _parse_out_time(block.get("out_time")),
+            "end": block.get("progress") == "end",
+        }
+
+
+# 汇总各视频的实时帧进度，计算整批吞吐与预计剩余时间，并按时间间隔节流推送
+class ProgressTracker:
+    def __init__(self, callback, min_interval=DEFAULT_MIN_INTERVAL):
+        self.callback = callback
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last_emit = 0.0
+        self._start = time.monotonic()
+        self._total_videos = 0
+        self._expected = {}   # 已探测且未结束视频的预计帧数
+        self._current = {}    # 进行中视频的已完成帧数
+        self._finished_frames = 0
+        self._finished_videos = 0  # 已结束的视频只计入合计，不逐个保留（监视模式下长期运行）
+
+    def start_batch(self, total_videos):
+        with self._lock:
+            self._start = time.monotonic()
+            self._total_videos = total_videos
+
+    def add_videos(self, count):
+        # 流式扫描时视频总数随发现逐步增加
+        with self._lock:
+            self._total_videos += count
+
+    def skip(self, key):
+        # 续提跳过的视频不计入吞吐和剩余量
+        with self._lock:
+            self._total_videos = max(0, self._total_videos - 1)
+
+    def set_expected(self, key, frames):
+        with self._lock:
+            self._expected[key] = max(0, int(frames))
+
+    def update(self, key, name, progress):
+        with self._lock:
+            self._current[key] = progress["frames"]
+            now = time.monotonic()
+            if now - self._last_emit < self.min_interval:
+                return
+            self._last_emit = now
+            stats = self._snapshot(now)
+        stats.update(file=name, frames=progress["frames"], fps=progress["fps"],
+                     speed=progress["speed"], out_time=progress["out_time"])
+        self.callback(stats)
+
+    def finish(self, key, name, frames):
+        # 单个视频结束时总是推送一次，保证最终数字准确
+        with self._lock:
+            self._current.pop(key, None)
+            self._expected.pop(key, None)
+            self._finished_frames += frames
+            self._finished_videos += 1
+            now = time.monotonic()
+            self._last_emit = now
+            stats = self._snapshot(now)
+        stats.update(file=name, frames=frames, fps=None, speed=None, out_time=None)
+        self.callback(stats)
+
+    def _snapshot(self, now):
+        done = self._finished_frames + sum(self._current.values())
+        elapsed = max(now - self._start, 1e-6)
+        batch_fps = done / elapsed
+        # 已结束视频按实际帧数计
+        expected_total = self._finished_frames + sum(self._expected.values())
+        known = self._finished_videos + len(self._expected)
+        # 尚未探测的视频按已探测视频的平均帧数外推
+        unknown = self._total_videos - known
+        if unknown > 0 and known:
+            expected_total += expected_total / known * unknown
+        eta = None
+        if batch_fps > 0 and expected_total:
+            eta = max(0.0, (expected_total - done) / batch_fps)
+        return {
+            "batch_frames": done,
+            "batch_fps": round(batch_fps, 2),
+            "expected_frames": int(expected_total),
+            "elapsed": round(elapsed, 1),
+            "eta": round(eta, 1) if eta is not None else None,
+        }
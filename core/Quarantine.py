@@ -0,0 +1,56 @@
+# Project Path: core/Quarantine.py
+import json
+import os
+import threading
+import time
+
+from core.ProbeCache import default_cache_path, file_fingerprint
+
+
+def default_quarantine_path():
+    # 与探测缓存放在同一目录，跨运行、跨输出目录生效
+    return os.path.join(os.path.dirname(default_cache_path()), "VideoFrameExtractor_quarantine.jsonl")
+
+
+# 隔离名单：重试后仍失败（损坏、截断、解码卡死）的视频，以后的运行直接跳过。
+# 按 (绝对路径, 大小, mtime_ns) 记录，文件被替换或修复后自动失效；删除对应行即可手动重试
+class Quarantine:
+    def __init__(self, path=None):
+        self.path = path or default_quarantine_path()
+        self._lock = threading.Lock()
+        self._entries = {}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._entries[record["path"]] = record
+        except FileNotFoundError:
+            pass
+
+    def reason(self, path):
+        # 仍在隔离中时返回原因，否则返回 None
+        try:
+            abs_path, size, mtime_ns = file_fingerprint(path)
+        except OSError:
+            return None
+        with self._lock:
+            record = self._entries.get(abs_path)
+        if record and record["size"] == size and record["mtime_ns"] == mtime_ns:
+            return record["reason"]
+        return None
+
+    def add(self, path, reason):
+        try:
+            abs_path, size, mtime_ns = file_fingerprint(path)
+        except OSError:
+            return
+        record = {"path": abs_path, "size": size, "mtime_ns": mtime_ns, "reason": reason,
+                  "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+        with self._lock:
+            self._entries[abs_path] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
@@ -0,0 +1,157 @@
+# Project Path: core/RunManifest.py
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+MANIFEST_NAME = "manifest.jsonl"
+OUTPUT_ROOT_PREFIX = "帧生成_"
+# 监视模式的固定输出目录名：重启后沿用，已完成的视频按清单跳过
+WATCH_OUTPUT_NAME = OUTPUT_ROOT_PREFIX + "watch"
+
+
+def new_output_root(folder):
+    return os.path.join(folder, OUTPUT_ROOT_PREFIX + datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+
+def source_fingerprint(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def list_frame_files(output_dir):
+    try:
+        return sorted(e.name for e in os.scandir(output_dir) if e.is_file())
+    except FileNotFoundError:
+        return []
+
+
+def list_output_entries(output_dir):
+    # 输出目录中的帧文件：[(文件名, 字节数)]
+    try:
+        return sorted((e.name, e.stat().st_size) for e in os.scandir(output_dir) if e.is_file())
+    except FileNotFoundError:
+        return []
+
+
+def output_checksum(entries):
+    # 输出摘要：按文件名+大小计算，避免为校验而重读全部图片
+    digest = hashlib.sha1()
+    total_bytes = 0
+    for name, size in entries:
+        total_bytes += size
+        digest.update(f"{name}:{size}\n".encode("utf-8"))
+    return digest.hexdigest(), total_bytes
+
+
+def part_name(part):
+    # 集群节点各自追加的清单分片：manifest.<节点>.jsonl
+    return f"manifest.{part}.jsonl"
+
+
+def _list_parts(output_root):
+    try:
+        return sorted(e.path for e in os.scandir(output_root)
+                      if e.name.startswith("manifest.") and e.name.endswith(".jsonl") and e.name != MANIFEST_NAME)
+    except FileNotFoundError:
+        return []
+
+
+def _read_manifest(manifest_path, has_header=True):
+    # 返回 (首行设置, {视频: 记录})；清单分片没有首行设置
+    header, entries = None, {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                if has_header and header is None:
+                    header = record
+                elif "video" in record:
+                    entries[record["video"]] = record
+    except FileNotFoundError:
+        pass
+    return header, entries
+
+
+def find_resumable_root(folder, params):
+    # 在目标文件夹下查找参数一致的最近一次输出目录；监视模式的目录可能正被常驻进程写入，不参与续提
+    candidates = []
+    try:
+        for entry in os.scandir(folder):
+            if entry.is_dir() and entry.name.startswith(OUTPUT_ROOT_PREFIX) and entry.name != WATCH_OUTPUT_NAME:
+                candidates.append(entry.path)
+    except FileNotFoundError:
+        return None
+    for root in sorted(candidates, reverse=True):
+        header, _ = _read_manifest(os.path.join(root, MANIFEST_NAME))
+        if header and header.get("params") == params:
+            return root
+    return None
+
+
+# 记录已完成的视频，供下一次相同参数的运行跳过。
+# 给出 part 时（集群节点）新记录写入各自的清单分片：NFS 等共享存储上多个客户端同时追加同一文件并不安全；
+# 读取时合并主清单与全部分片
+class RunManifest:
+    def __init__(self, output_root, folder, params, part=None):
+        self.output_root = output_root
+        self.folder = folder
+        self.params = params
+        main_path = os.path.join(output_root, MANIFEST_NAME)
+        self.path = os.path.join(output_root, part_name(part)) if part else main_path
+        self._lock = threading.Lock()
+        header, self.entries = _read_manifest(main_path)
+        if header is None or header.get("params") != params:
+            if part:
+                # 主清单由协调端创建，节点不改写
+                raise ValueError(f"输出目录的清单与任务参数不一致: {output_root}")
+            # 新目录或参数不一致：重新开始记录，旧的清单分片一并作废
+            self.entries = {}
+            for path in _list_parts(output_root):
+                os.remove(path)
+            with open(main_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"folder": folder, "params": params}, ensure_ascii=False) + "\n")
+        for path in _list_parts(output_root):
+            self.entries.update(_read_manifest(path, has_header=False)[1])
+
+    def video_key(self, path):
+        return os.path.relpath(path, self.folder).replace("\\", "/")
+
+    def completed_info(self, path, entries):
+        # 已完成且输出完整时返回当时的结果信息，否则返回 None（需要重做）；
+        # entries 为该视频当前的输出 [(名称, 字节数)]，来自输出目录或 tar 分片索引
+        entry = self.entries.get(self.video_key(path))
+        if not entry:
+            return None
+        try:
+            if entry["fingerprint"] != source_fingerprint(path):
+                return None
+        except OSError:
+            return None
+        # 帧数相同但有帧被截断或替换时，按文件名+大小的摘要也能发现
+        if len(entries) != entry["frames"] or output_checksum(entries)[0] != entry.get("checksum"):
+            return None
+        return entry.get("info")
+
+    def record(self, path, entries, info):
+        checksum, total_bytes = output_checksum(entries)
+        entry = {
+            "video": self.video_key(path),
+            "fingerprint": source_fingerprint(path),
+            "frames": len(entries),
+            "bytes": total_bytes,
+            "checksum": checksum,
+            "info": info,
+        }
+        with self._lock:
+            self.entries[entry["video"]] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
@@ -0,0 +1,180 @@
+# Project Path: core/RunMetrics.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_JSONL = "metrics.jsonl"
+METRICS_PROM = "metrics.prom"
+
+# 对外汇总的阶段；scene_detect 仅场景切换模式使用
+STAGES = ("scan", "probe", "scene_detect", "extract")
+
+
+def wait_with_usage(proc):
+    # 等待子进程结束并取得其资源占用（用户/系统 CPU、峰值内存）；不支持 wait4 的平台返回 None
+    if not hasattr(os, "wait4"):
+        proc.wait()
+        return None
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        proc.wait()
+        return None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        "user_seconds": usage.ru_utime,
+        "system_seconds": usage.ru_stime,
+        "max_rss_kb": usage.ru_maxrss,
+    }
+
+
+# 汇总中按视频累加的字段
+_TOTAL_FIELDS = ("videos", "duplicate_videos", "quarantined_videos", "frames", "output_bytes", "ffmpeg_cpu_seconds")
+
+
+def _video_totals(videos):
+    return {
+        "videos": len(videos),
+        "duplicate_videos": sum(1 for v in videos if v["status"] == "duplicate"),
+        "quarantined_videos": sum(1 for v in videos if v["status"] == "quarantined"),
+        "frames": sum(v["frames"] for v in videos),
+        "output_bytes": sum(v["output_bytes"] for v in videos),
+        "ffmpeg_cpu_seconds": sum(v["ffmpeg_user_seconds"] + v["ffmpeg_system_seconds"] for v in videos),
+    }
+
+
+def _video_line(video):
+    video = {k: round(v, 3) if isinstance(v, float) else v for k, v in video.items()}
+    return json.dumps({"type": "video", **video}, ensure_ascii=False) + "\n"
+
+
+# 记录一次运行中各阶段（扫描、探测、提取）的耗时、子进程 CPU 与输出字节数。
+# 给出 spill_path 时（监视模式长期运行），已结束的视频可通过 fold_finished() 写入该文件并只保留合计
+class RunMetrics:
+    def __init__(self, spill_path=None):
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._cpu_start = os.times()
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+        self.videos = {}
+        self.summary = None
+        self.spill_path = spill_path
+        self._folded = dict.fromkeys(_TOTAL_FIELDS, 0)
+        if spill_path is not None:
+            open(spill_path, "w", encoding="utf-8").close()
+
+    def _video(self, key):
+        return self.videos.setdefault(key, {
+            "video": key, "probe_seconds": 0.0, "extract_seconds": 0.0,
+            "ffmpeg_user_seconds": 0.0, "ffmpeg_system_seconds": 0.0, "ffmpeg_max_rss_kb": 0,
+            "processes": 0, "frames": 0, "output_bytes": 0, "status": "",
+        })
+
+    @contextmanager
+    def stage(self, stage, key=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                # 各视频并发执行，阶段合计为所有视频耗时之和（可能大于墙钟时间）
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + elapsed
+                if key is not None:
+                    video = self._video(key)
+                    video[f"{stage}_seconds"] = video.get(f"{stage}_seconds", 0.0) + elapsed
+
+    def add_process_usage(self, key, usage):
+        if usage is None:
+            return
+        with self._lock:
+            video = self._video(key)
+            video["processes"] += 1
+            video["ffmpeg_user_seconds"] += usage["user_seconds"]
+            video["ffmpeg_system_seconds"] += usage["system_seconds"]
+            video["ffmpeg_max_rss_kb"] = max(video["ffmpeg_max_rss_kb"], usage["max_rss_kb"])
+
+    def record_output(self, key, frames, output_bytes, status):
+        with self._lock:
+            video = self._video(key)
+            video["frames"] = frames
+            video["output_bytes"] = output_bytes
+            video["status"] = status
+
+    def fold_finished(self):
+        # 把已结束（已记录状态）的视频逐行追加到 spill_path，并从内存中移除，只累加进合计
+        with self._lock:
+            finished = [key for key, video in self.videos.items() if video["status"]]
+            videos = [self.videos.pop(key) for key in finished]
+            for field, value in _video_totals(videos).items():
+                self._folded[field] += value
+        if videos:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.writelines(_video_line(video) for video in videos)
+
+    def finish(self):
+        # 汇总整次运行；可重复调用，以最后一次为准
+        cpu_end = os.times()
+        with self._lock:
+            totals = _video_totals(list(self.videos.values()))
+            for field, value in self._folded.items():
+                totals[field] += value
+            self.summary = {
+                "wall_seconds": round(time.perf_counter() - self._start, 3),
+                "process_cpu_seconds": round(
+                    (cpu_end.user - self._cpu_start.user) + (cpu_end.system - self._cpu_start.system), 3),
+                "children_cpu_seconds": round(
+                    (cpu_end.children_user - self._cpu_start.children_user)
+                    + (cpu_end.children_system - self._cpu_start.children_system), 3),
+                "stage_seconds": {k: round(v, 3) for k, v in self.stage_seconds.items()},
+                **totals,
+                "ffmpeg_cpu_seconds": round(totals["ffmpeg_cpu_seconds"], 3),
+            }
+            return dict(self.summary)
+
+    def write_jsonl(self, path):
+        with self._lock:
+            videos = [dict(v) for v in self.videos.values()]
+            summary = dict(self.summary or {})
+        # 写入 spill_path 时接在已折叠的视频之后
+        with open(path, "a" if path == self.spill_path else "w", encoding="utf-8") as f:
+            f.writelines(_video_line(video) for video in videos)
+            f.write(json.dumps({"type": "summary", **summary}, ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path):
+        summary = self.summary or self.finish()
+        lines = [
+            "# HELP vfc_run_wall_seconds Wall-clock time of the whole run.",
+            "# TYPE vfc_run_wall_seconds gauge",
+            f"vfc_run_wall_seconds {summary['wall_seconds']}",
+            "# HELP vfc_stage_seconds Summed time spent per stage across all videos.",
+            "# TYPE vfc_stage_seconds gauge",
+        ]
+        for stage, seconds in summary["stage_seconds"].items():
+            lines.append(f'vfc_stage_seconds{{stage="{stage}"}} {seconds}')
+        lines += [
+            "# HELP vfc_process_cpu_seconds CPU time of the extractor process itself.",
+            "# TYPE vfc_process_cpu_seconds gauge",
+            f"vfc_process_cpu_seconds {summary['process_cpu_seconds']}",
+            "# HELP vfc_ffmpeg_cpu_seconds CPU time of all ffmpeg extraction processes.",
+            "# TYPE vfc_ffmpeg_cpu_seconds gauge",
+            f"vfc_ffmpeg_cpu_seconds {summary['ffmpeg_cpu_seconds']}",
+            "# HELP vfc_videos_total Videos handled in this run.",
+            "# TYPE vfc_videos_total counter",
+            f"vfc_videos_total {summary['videos']}",
+            "# HELP vfc_frames_total Frames written in this run.",
+            "# TYPE vfc_frames_total counter",
+            f"vfc_frames_total {summary['frames']}",
+            "# HELP vfc_output_bytes_total Bytes written in this run.",
+            "# TYPE vfc_output_bytes_total counter",
+            f"vfc_output_bytes_total {summary['output_bytes']}",
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def export(self, output_dir):
+        self.finish()
+        self.write_jsonl(os.path.join(output_dir, METRICS_JSONL))
+        self.write_prometheus(os.path.join(output_dir, METRICS_PROM))
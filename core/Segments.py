@@ -0,0 +1,140 @@
+# Project Path: core/Segments.py
+import csv
+import hashlib
+import os
+import re
+from dataclasses import dataclass, replace
+
+# 片段表（CSV）的列：视频（相对源文件夹的路径、文件名或绝对路径）、开始时间、结束时间；结束为空表示到视频结尾。
+# 首行可以是表头；同一视频可以有多行
+CSV_COLUMNS = ("file", "start", "end")
+
+_TIME_RE = re.compile(r"^(?:(?:(\d+):)?(\d+):)?(\d+(?:\.\d*)?)$")
+
+
+def parse_time(text):
+    # "90"、"1:30"、"01:02:03.5" -> 秒
+    match = _TIME_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"无法识别的时间: {text!r}")
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds)
+
+
+def format_time(seconds):
+    # 秒 -> "1:02:03.5" / "2:03"，用于结果表格中的片段说明
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    secs_text = f"{secs:06.3f}".rstrip("0").rstrip(".")
+    return f"{hours}:{minutes:02d}:{secs_text}" if hours else f"{minutes}:{secs_text}"
+
+
+def parse_range(text):
+    # "开始-结束"，结束可省略（到视频结尾）；返回 (开始, 结束或 None)
+    start_text, sep, end_text = text.strip().partition("-")
+    if not sep:
+        raise ValueError(f"时间范围格式应为 开始-结束: {text!r}")
+    start = parse_time(start_text) if start_text.strip() else 0.0
+    end = parse_time(end_text) if end_text.strip() else None
+    if end is not None and end <= start:
+        raise ValueError(f"时间范围的结束必须晚于开始: {text!r}")
+    return start, end
+
+
+def parse_ranges(text):
+    # 逗号或分号分隔的多个时间范围，如 "0:10-0:20, 1:00-"
+    return [parse_range(part) for part in re.split(r"[,;，；]", text or "") if part.strip()]
+
+
+def load_segment_csv(path):
+    # 读取片段表，返回 {视频键: [(开始, 结束或 None)]}，视频键为规范化后的路径文本
+    table = {}
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for line_no, row in enumerate(csv.reader(f), 1):
+            row = [cell.strip() for cell in row]
+            if not row or not row[0] or row[0].startswith("#"):
+                continue
+            if line_no == 1 and row[0].lower() in ("file", "video", "path", "文件", "视频"):
+                continue
+            if len(row) < 2:
+                raise ValueError(f"片段表第 {line_no} 行缺少开始时间")
+            try:
+                start = parse_time(row[1]) if row[1] else 0.0
+                end = parse_time(row[2]) if len(row) > 2 and row[2] else None
+            except ValueError as e:
+                raise ValueError(f"片段表第 {line_no} 行: {e}")
+            if end is not None and end <= start:
+                raise ValueError(f"片段表第 {line_no} 行: 结束必须晚于开始")
+            table.setdefault(row[0].replace("\\", "/"), []).append((start, end))
+    return table
+
+
+@dataclass(frozen=True)
+class Segment:
+    index: int     # 从 1 开始，按开始时间排序
+    start: float
+    end: float
+    label: str     # 帧文件名前缀，如 "seg01"，不同片段的帧互不重名
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def describe(self):
+        return f"{format_time(self.start)}-{format_time(self.end)}"
+
+
+def resolve_segments(ranges, duration):
+    # 把时间范围裁到视频时长内，按开始排序并合并重叠部分（重叠处不会重复取帧），编号为 seg01、seg02……
+    clipped = []
+    for start, end in ranges:
+        end = duration if end is None else min(end, duration)
+        if end > start:
+            clipped.append([start, end])
+    clipped.sort()
+    merged = []
+    for start, end in clipped:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    width = max(2, len(str(len(merged))))
+    return [Segment(i, start, end, f"seg{i:0{width}d}") for i, (start, end) in enumerate(merged, 1)]
+
+
+def segment_meta(meta, seconds):
+    # 只处理其中 seconds 秒时的视频信息，用于按片段预估帧数与开销
+    return replace(meta, duration=seconds, nb_frames=None)
+
+
+# 每个视频要处理的时间范围：片段表中列出的视频使用表中的范围，其余视频使用全局范围；
+# 给了片段表但没有全局范围时，未列入表中的视频不处理
+class SegmentPlan:
+    def __init__(self, folder, ranges=(), csv_path=None):
+        self.folder = folder
+        self.ranges = [tuple(r) for r in ranges or ()]
+        self.csv_path = csv_path
+        self.table = load_segment_csv(csv_path) if csv_path else {}
+
+    def __bool__(self):
+        return bool(self.ranges or self.csv_path)
+
+    def params(self):
+        # 影响输出内容的设置，用于续提时比较；片段表按内容摘要比较
+        params = {}
+        if self.ranges:
+            params["ranges"] = [list(r) for r in self.ranges]
+        if self.csv_path:
+            with open(self.csv_path, "rb") as f:
+                params["segment_csv"] = hashlib.sha1(f.read()).hexdigest()
+        return params
+
+    def ranges_for(self, path):
+        # 返回该视频的时间范围列表；None 表示处理整个视频，空列表表示不处理
+        if not self:
+            return None
+        rel_path = os.path.relpath(path, self.folder).replace("\\", "/")
+        for key in (rel_path, os.path.abspath(path).replace("\\", "/"), os.path.basename(path)):
+            if key in self.table:
+                return self.table[key]
+        return list(self.ranges)
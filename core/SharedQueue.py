@@ -0,0 +1,266 @@
+# Project Path: core/SharedQueue.py
+import collections
+import json
+import os
+import socket
+import time
+import uuid
+
+# 共享存储上的任务队列，位于输出目录下，不依赖任何网络服务：
+#   queue.json            队列设置（源文件夹与输出目录均为相对队列目录的路径，各节点挂载点不同也可用）
+#   jobs.jsonl            每行一个待处理视频 {"id": 序号, "video": 相对源文件夹的路径}
+#   leases/<id>.<代>      租约文件，以独占创建（O_EXCL）抢占；持有者定期刷新修改时间，过期后由他人创建下一代接管
+#   done/<id>.json        已完成视频的结果信息
+#   workers/<节点>.json   各节点定期写入的进度，供协调端汇总
+QUEUE_DIR_NAME = "cluster"
+SETTINGS_NAME = "queue.json"
+JOBS_NAME = "jobs.jsonl"
+DEFAULT_LEASE_SECONDS = 120
+
+
+def _write_json_atomic(path, data):
+    # 先写临时文件再改名，其他节点不会读到写了一半的文件
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def create_queue(queue_dir, settings, videos):
+    # 写入全部任务后最后写设置文件，节点看到 queue.json 时队列已完整
+    if os.path.exists(os.path.join(queue_dir, SETTINGS_NAME)):
+        raise ValueError(f"队列已存在: {queue_dir}")
+    for sub in ("leases", "done", "workers"):
+        os.makedirs(os.path.join(queue_dir, sub), exist_ok=True)
+    count = 0
+    with open(os.path.join(queue_dir, JOBS_NAME), "w", encoding="utf-8") as f:
+        for count, video in enumerate(videos, 1):
+            f.write(json.dumps({"id": count, "video": video}, ensure_ascii=False) + "\n")
+    _write_json_atomic(os.path.join(queue_dir, SETTINGS_NAME), dict(settings, jobs=count))
+    return count
+
+
+def extend_queue(queue_dir, videos):
+    # 续提时沿用已有队列：已有任务的完成记录与租约保持不变，只追加新出现的视频。
+    # 任务列表整体改名替换，正在启动的节点不会读到写了一半的行；返回 (任务总数, 新增数)
+    settings = _read_json(os.path.join(queue_dir, SETTINGS_NAME))
+    if settings is None:
+        raise ValueError(f"不是有效的任务队列: {queue_dir}")
+    jobs = load_jobs(queue_dir)
+    known = set(jobs.values())
+    count = max(jobs, default=0)
+    added = []
+    for video in videos:
+        if video not in known:
+            known.add(video)
+            count += 1
+            added.append({"id": count, "video": video})
+    if added:
+        jobs_path = os.path.join(queue_dir, JOBS_NAME)
+        tmp_path = f"{jobs_path}.{uuid.uuid4().hex}.tmp"
+        with open(jobs_path, "r", encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(src.read())
+            for record in added:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, jobs_path)
+        _write_json_atomic(os.path.join(queue_dir, SETTINGS_NAME), dict(settings, jobs=count))
+    return count, len(added)
+
+
+def load_jobs(queue_dir):
+    jobs = {}
+    with open(os.path.join(queue_dir, JOBS_NAME), "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                jobs[record["id"]] = record["video"]
+    return jobs
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# 一个节点对队列的视图：抢占、续租、完成、释放任务。非线程安全，多线程调用方需自行加锁
+class SharedQueue:
+    def __init__(self, queue_dir, worker_id=None):
+        self.queue_dir = queue_dir
+        self.settings = _read_json(os.path.join(queue_dir, SETTINGS_NAME))
+        if self.settings is None:
+            raise ValueError(f"不是有效的任务队列: {queue_dir}")
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = self.settings.get("lease_seconds", DEFAULT_LEASE_SECONDS)
+        self.jobs = load_jobs(queue_dir)
+        self._leases_dir = os.path.join(queue_dir, "leases")
+        self._done_dir = os.path.join(queue_dir, "done")
+        self._status_path = os.path.join(queue_dir, "workers", f"{self.worker_id}.json")
+        ids = sorted(self.jobs)
+        # 各节点从不同位置开始抢占，减少同时争抢同一个任务
+        pending = collections.deque(ids)
+        if ids:
+            pending.rotate(-(hash(self.worker_id) % len(ids)))
+        self._pending = pending
+        self.held = {}  # 本节点持有的租约：{任务序号: 租约文件路径}
+
+    def _lease_path(self, job_id, generation):
+        return os.path.join(self._leases_dir, f"{job_id}.{generation}")
+
+    def _done_path(self, job_id):
+        return os.path.join(self._done_dir, f"{job_id}.json")
+
+    def is_done(self, job_id):
+        return os.path.exists(self._done_path(job_id))
+
+    def _current_generation(self, job_id):
+        generation = -1
+        while os.path.exists(self._lease_path(job_id, generation + 1)):
+            generation += 1
+        return generation
+
+    def _server_now(self):
+        # 用共享存储上刚写入文件的修改时间作为“当前时间”，与租约文件的时间同源，不受节点时钟偏差影响
+        self.write_status(None)
+        return os.stat(self._status_path).st_mtime
+
+    def _try_lease(self, job_id, now):
+        generation = self._current_generation(job_id)
+        if generation >= 0:
+            try:
+                expired = now - os.stat(self._lease_path(job_id, generation)).st_mtime > self.lease_seconds
+            except FileNotFoundError:
+                # 持有者完成后删除了租约
+                return False
+            if not expired:
+                return False
+        path = self._lease_path(job_id, generation + 1)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            # 其他节点抢先接管
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"worker": self.worker_id, "generation": generation + 1}))
+        self.held[job_id] = path
+        if self.is_done(job_id):
+            # 抢到租约的同时另一节点刚好完成
+            self.release(job_id)
+            return False
+        return True
+
+    def claim(self):
+        # 抢占一个任务，返回 (任务序号, 相对路径)；暂时没有可抢占的任务时返回 None
+        now = self._server_now()
+        for _ in range(len(self._pending)):
+            job_id = self._pending.popleft()
+            if self.is_done(job_id):
+                continue
+            if self._try_lease(job_id, now):
+                return job_id, self.jobs[job_id]
+            # 正被其他节点处理：稍后再看，持有者失联时接管
+            self._pending.append(job_id)
+        return None
+
+    def exhausted(self):
+        # 本节点看来已没有未完成的任务（不含本节点正在处理的）
+        return not self._pending
+
+    def renew(self):
+        # 刷新本节点全部租约，返回已被他人接管（续租太迟）的任务序号
+        lost = []
+        for job_id, path in list(self.held.items()):
+            generation = int(path.rsplit(".", 1)[1])
+            if os.path.exists(self._lease_path(job_id, generation + 1)):
+                lost.append(job_id)
+                del self.held[job_id]
+                continue
+            try:
+                os.utime(path, None)
+            except FileNotFoundError:
+                lost.append(job_id)
+                del self.held[job_id]
+        return lost
+
+    def complete(self, job_id, info):
+        # 写入结果后删除租约；租约已被接管时不写结果，以接管者的结果为准
+        path = self.held.pop(job_id, None)
+        if path is None:
+            return False
+        generation = int(path.rsplit(".", 1)[1])
+        if os.path.exists(self._lease_path(job_id, generation + 1)):
+            return False
+        _write_json_atomic(self._done_path(job_id), {"worker": self.worker_id, "info": info})
+        self._remove_leases(job_id, generation)
+        return True
+
+    def release(self, job_id):
+        # 放弃任务（如节点停止），其他节点可立即接管，无需等待租约过期
+        # 把租约的修改时间改到很久以前，相当于立即过期；不删除文件，避免租约代数出现空缺
+        path = self.held.pop(job_id, None)
+        if path is not None:
+            try:
+                os.utime(path, (0, 0))
+            except FileNotFoundError:
+                pass
+            self._pending.append(job_id)
+
+    def _remove_leases(self, job_id, generation):
+        # 仅在已写入结果后调用：此后抢占前都会先看到结果文件，不会再处理该任务
+        for g in range(generation, -1, -1):
+            try:
+                os.remove(self._lease_path(job_id, g))
+            except FileNotFoundError:
+                pass
+
+    def write_status(self, status):
+        # status 为 None 时只刷新修改时间
+        if status is None and os.path.exists(self._status_path):
+            os.utime(self._status_path, None)
+            return
+        _write_json_atomic(self._status_path, dict(status or {}, worker=self.worker_id, updated=time.time()))
+
+
+def queue_status(queue_dir):
+    # 协调端汇总：任务总数、已完成数、处理中的任务，以及各节点上报的进度
+    settings = _read_json(os.path.join(queue_dir, SETTINGS_NAME))
+    if settings is None:
+        raise ValueError(f"不是有效的任务队列: {queue_dir}")
+    lease_seconds = settings.get("lease_seconds", DEFAULT_LEASE_SECONDS)
+    done = sum(1 for name in os.listdir(os.path.join(queue_dir, "done")) if name.endswith(".json"))
+    workers = []
+    workers_dir = os.path.join(queue_dir, "workers")
+    for name in sorted(os.listdir(workers_dir)):
+        if name.endswith(".json"):
+            status = _read_json(os.path.join(workers_dir, name))
+            if status is not None:
+                status["last_seen"] = os.stat(os.path.join(workers_dir, name)).st_mtime
+                workers.append(status)
+    now = max([w["last_seen"] for w in workers], default=time.time())
+    leased = {}
+    for name in os.listdir(os.path.join(queue_dir, "leases")):
+        job_id, _, generation = name.partition(".")
+        if generation.isdigit():
+            path = os.path.join(queue_dir, "leases", name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+            if int(generation) >= leased.get(job_id, (-1, 0))[0]:
+                leased[job_id] = (int(generation), mtime)
+    active = sum(1 for _, mtime in leased.values() if now - mtime <= lease_seconds)
+    return {
+        "jobs": settings["jobs"],
+        "done": done,
+        "active": active,
+        "stale_leases": len(leased) - active,
+        "frames": sum(w.get("frames", 0) for w in workers),
+        "output_bytes": sum(w.get("output_bytes", 0) for w in workers),
+        "workers": workers,
+    }
@@ -0,0 +1,120 @@
+# Project Path: core/SourceDedup.py
+import hashlib
+import json
+import os
+import threading
+
+# 重复视频记录：每行 {"video": 重复的视频, "duplicate_of": 内容相同且已提取的视频, "output": 引用的输出子目录}
+DUPLICATES_NAME = "duplicates.jsonl"
+# 抽样哈希：在文件中均匀取 SAMPLE_COUNT 块、每块 SAMPLE_CHUNK 字节（含开头与结尾）
+SAMPLE_CHUNK = 64 * 1024
+SAMPLE_COUNT = 8
+FULL_HASH_CHUNK = 1024 * 1024
+
+
+def sampled_hash(path, size):
+    digest = hashlib.blake2b(str(size).encode("ascii"), digest_size=20)
+    with open(path, "rb") as f:
+        if size <= SAMPLE_CHUNK * SAMPLE_COUNT:
+            digest.update(f.read())
+        else:
+            step = (size - SAMPLE_CHUNK) // (SAMPLE_COUNT - 1)
+            for i in range(SAMPLE_COUNT):
+                f.seek(i * step)
+                digest.update(f.read(SAMPLE_CHUNK))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(FULL_HASH_CHUNK)
+            if not chunk:
+                return digest.hexdigest()
+            digest.update(chunk)
+
+
+# 按内容识别重复的源视频：先比大小，大小相同再比抽样哈希，抽样也相同才计算完整哈希；
+# 绝大多数文件大小互不相同，不会读取任何内容
+class SourceIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_size = {}
+        self._size_of = {}
+        self._sampled = {}
+        self._full = {}
+
+    def _sampled_hash(self, path, size):
+        value = self._sampled.get(path)
+        if value is None:
+            value = self._sampled[path] = sampled_hash(path, size)
+        return value
+
+    def _full_hash(self, path):
+        value = self._full.get(path)
+        if value is None:
+            value = self._full[path] = full_hash(path)
+        return value
+
+    def claim(self, path):
+        # 登记一个视频；与此前登记的某个视频内容相同时返回该视频路径，否则返回 None。
+        # 先登记者作为提取对象，调用方应按扫描顺序依次登记，结果才稳定
+        with self._lock:
+            # 同一路径再次登记（监视模式下文件被覆盖写入）：先撤销旧的登记与哈希缓存
+            old_size = self._size_of.pop(path, None)
+            if old_size is not None:
+                self._by_size[old_size].remove(path)
+                self._sampled.pop(path, None)
+                self._full.pop(path, None)
+            try:
+                size = os.path.getsize(path)
+                if size == 0:
+                    return None
+                bucket = self._by_size.setdefault(size, [])
+                if bucket:
+                    sample = self._sampled_hash(path, size)
+                    for other in bucket:
+                        if self._sampled_hash(other, size) == sample and self._full_hash(other) == self._full_hash(path):
+                            return other
+                bucket.append(path)
+                self._size_of[path] = size
+            except OSError:
+                # 读取失败时当作不重复处理，交给后续探测报告错误
+                pass
+            return None
+
+    def trim(self):
+        # 监视模式每批之后调用：丢弃哈希缓存（只在大小相同时才需要，可重新计算），
+        # 并移除已删除的文件，使登记表只随文件夹中现存的视频数增长
+        with self._lock:
+            self._sampled.clear()
+            self._full.clear()
+            for path in [path for path in self._size_of if not os.path.exists(path)]:
+                size = self._size_of.pop(path)
+                bucket = self._by_size[size]
+                bucket.remove(path)
+                if not bucket:
+                    del self._by_size[size]
+
+
+def link_output(target_dir, link_dir):
+    # 为重复视频建立指向已提取输出的目录链接（相对路径，输出目录整体移动后仍有效）；
+    # 已有真实目录（如旧版本的输出）时保留不动。返回是否建立了链接
+    if os.path.islink(link_dir):
+        os.unlink(link_dir)
+    elif os.path.exists(link_dir):
+        return False
+    os.makedirs(os.path.dirname(link_dir), exist_ok=True)
+    try:
+        os.symlink(os.path.relpath(target_dir, os.path.dirname(link_dir)), link_dir, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        # Windows 未开启开发者模式时无权创建符号链接，仅保留 duplicates.jsonl 中的引用
+        return False
+    return True
+
+
+def record_duplicate(output_root, video, duplicate_of, output):
+    with open(os.path.join(output_root, DUPLICATES_NAME), "a", encoding="utf-8") as f:
+        f.write(json.dumps({"video": video, "duplicate_of": duplicate_of, "output": output},
+                           ensure_ascii=False) + "\n")
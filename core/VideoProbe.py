@@ -0,0 +1,192 @@
+# Project Path: core/VideoProbe.py
+import json
+import subprocess
+from dataclasses import dataclass, asdict
+from fractions import Fraction
+from typing import Optional
+
+from core.FFmpegCommands import MODE_KEYFRAMES, MODE_SCENES, MODE_SECONDS, seconds_frame_count
+from core.FFmpegPaths import FFPROBE_BIN, CREATE_NO_WINDOW
+
+# 估算关键帧间隔时最多读取的视频包数量
+KEYFRAME_SCAN_PACKETS = 600
+
+
+@dataclass
+class VideoMeta:
+    path: str
+    duration: float                         # 秒
+    frame_rate: Fraction                    # r_frame_rate
+    nb_frames: Optional[int] = None         # 容器记录的精确帧数，未知时为 None
+    codec: str = ""
+    width: int = 0
+    height: int = 0
+    keyframe_interval: Optional[float] = None  # 平均关键帧间隔（秒），扫描范围内不足两个关键帧时为 None
+    rotation: int = 0                       # 顺时针旋转角度
+
+    @property
+    def fps(self):
+        return float(self.frame_rate)
+
+    @property
+    def total_frames(self):
+        # 优先使用精确帧数，否则按时长 × 帧率估算
+        if self.nb_frames:
+            return self.nb_frames
+        return int(round(self.duration * self.fps))
+
+    def to_dict(self):
+        data = asdict(self)
+        data["frame_rate"] = f"{self.frame_rate.numerator}/{self.frame_rate.denominator}"
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data["frame_rate"] = Fraction(data["frame_rate"])
+        return cls(**data)
+
+
+def parse_rational(text):
+    # ffprobe 的 "30000/1001"、"0/0" 等格式
+    try:
+        value = Fraction(text)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return value if value > 0 else None
+
+
+def _to_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(text):
+    try:
+        value = int(text)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+# 探测失败后重试时加在输入前的参数：忽略解析错误、丢弃损坏的包、补齐缺失的时间戳
+TOLERANT_PROBE_ARGS = ["-err_detect", "ignore_err", "-fflags", "+discardcorrupt+genpts"]
+
+
+def build_probe_cmd(path, tolerant=False):
+    # 一次 ffprobe 同时取得容器、视频流信息以及开头若干视频包（用于估算关键帧间隔）
+    return [
+        FFPROBE_BIN, "-v", "error", "-print_format", "json",
+        "-select_streams", "v:0",
+        "-show_format", "-show_streams", "-show_packets",
+        "-show_entries", "packet=pts_time,flags",
+        "-read_intervals", f"%+#{KEYFRAME_SCAN_PACKETS}",
+        *(TOLERANT_PROBE_ARGS if tolerant else []),
+        path
+    ]
+
+
+def _parse_rotation(stream):
+    tags = stream.get("tags") or {}
+    if "rotate" in tags:
+        rotation = _to_float(tags["rotate"])
+        if rotation is not None:
+            return int(rotation) % 360
+    for side_data in stream.get("side_data_list") or []:
+        if "rotation" in side_data:
+            rotation = _to_float(side_data["rotation"])
+            if rotation is not None:
+                # Display Matrix 中为逆时针角度
+                return int(-rotation) % 360
+    return 0
+
+
+def _parse_nb_frames(stream):
+    nb_frames = _to_int(stream.get("nb_frames"))
+    if nb_frames:
+        return nb_frames
+    # mkv 由 mkvmerge 写入的统计标签
+    for key, value in (stream.get("tags") or {}).items():
+        if key.upper().startswith("NUMBER_OF_FRAMES"):
+            nb_frames = _to_int(value)
+            if nb_frames:
+                return nb_frames
+    return None
+
+
+def _parse_keyframe_interval(packets):
+    key_times = []
+    for packet in packets:
+        if "K" not in packet.get("flags", ""):
+            continue
+        pts_time = _to_float(packet.get("pts_time"))
+        if pts_time is not None:
+            key_times.append(pts_time)
+    key_times.sort()
+    if len(key_times) < 2:
+        return None
+    return (key_times[-1] - key_times[0]) / (len(key_times) - 1)
+
+
+def parse_probe_output(path, text):
+    try:
+        data = json.loads(text or "{}")
+    except json.JSONDecodeError:
+        raise ValueError("ffprobe 输出无法解析")
+
+    streams = data.get("streams") or []
+    if not streams:
+        raise ValueError("未找到视频流")
+    stream = streams[0]
+    fmt = data.get("format") or {}
+
+    frame_rate = parse_rational(stream.get("r_frame_rate")) or parse_rational(stream.get("avg_frame_rate"))
+    if frame_rate is None:
+        raise ValueError("无法解析视频帧率")
+
+    nb_frames = _parse_nb_frames(stream)
+    duration = _to_float(stream.get("duration")) or _to_float(fmt.get("duration"))
+    if not duration and nb_frames:
+        duration = float(nb_frames / frame_rate)
+    if not duration:
+        raise ValueError("无法解析视频时长")
+
+    return VideoMeta(
+        path=path,
+        duration=duration,
+        frame_rate=frame_rate,
+        nb_frames=nb_frames,
+        codec=stream.get("codec_name", ""),
+        width=int(stream.get("width") or 0),
+        height=int(stream.get("height") or 0),
+        keyframe_interval=_parse_keyframe_interval(data.get("packets") or []),
+        rotation=_parse_rotation(stream),
+    )
+
+
+def probe_video(path):
+    result = subprocess.run(
+        build_probe_cmd(path), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        creationflags=CREATE_NO_WINDOW, shell=False
+    )
+    if result.returncode != 0:
+        raise ValueError(result.stderr.decode(errors="ignore").strip() or "ffprobe 执行失败")
+    return parse_probe_output(path, result.stdout.decode(errors="ignore"))
+
+
+def estimate_frame_count(meta, mode, param):
+    # 预估某一提取模式下的输出帧数
+    if mode == MODE_SECONDS:
+        return seconds_frame_count(meta.duration, meta.fps, param)
+    if mode == MODE_KEYFRAMES:
+        # 关键帧模式：按平均关键帧间隔与最小间隔 N 中较大者估算
+        interval = max(meta.keyframe_interval or 0, param)
+        if not interval:
+            return 0
+        return int(meta.duration / interval) + 1
+    if mode == MODE_SCENES:
+        # 场景切换模式：检测前无从得知，按平均每 10 秒一次切换粗估，检测后以实际为准
+        return int(meta.duration / 10) + 1
+    return (meta.total_frames + param - 1) // param
@@ -0,0 +1,77 @@
+# Project Path: core/VideoScanner.py
+import fnmatch
+import os
+
+from core.RunManifest import OUTPUT_ROOT_PREFIX
+
+DEFAULT_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+def parse_extensions(text):
+    # "mp4, .MOV mkv" -> (".mp4", ".mov", ".mkv")；为空时使用默认扩展名
+    items = [item.strip().lower() for item in text.replace(",", " ").replace(";", " ").split()]
+    exts = tuple(dict.fromkeys(item if item.startswith(".") else "." + item for item in items if item.strip(".")))
+    return exts or DEFAULT_EXTENSIONS
+
+
+def parse_patterns(text):
+    # 排除规则以分号或换行分隔，允许包含空格
+    return tuple(item.strip() for item in text.replace("\n", ";").split(";") if item.strip())
+
+
+def _excluded(rel_path, name, patterns):
+    return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def wanted_dir(rel_path, name, exclude=()):
+    # 是否进入该子目录：跳过以往的“帧生成_*”输出目录与匹配排除规则的目录
+    return not name.startswith(OUTPUT_ROOT_PREFIX) and not _excluded(rel_path, name, exclude)
+
+
+def wanted_video(rel_path, name, extensions=DEFAULT_EXTENSIONS, exclude=()):
+    # extensions 须为小写
+    return name.lower().endswith(tuple(extensions)) and not _excluded(rel_path, name, exclude)
+
+
+def iter_videos(folder, extensions=DEFAULT_EXTENSIONS, exclude=()):
+    # 基于 os.scandir 的流式扫描：边遍历边产出视频路径，不预先构建完整文件列表；
+    # 跳过以往生成的“帧生成_*”输出目录以及匹配排除规则（相对路径或名称，glob）的文件与目录
+    extensions = tuple(ext.lower() for ext in extensions)
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            # 无权限或扫描期间被删除的目录直接跳过
+            continue
+        subdirs = []
+        with entries:
+            for entry in entries:
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                rel_path = os.path.relpath(entry.path, folder).replace("\\", "/")
+                if is_dir:
+                    if wanted_dir(rel_path, name, exclude):
+                        subdirs.append(entry.path)
+                elif wanted_video(rel_path, name, extensions, exclude):
+                    yield entry.path
+        # 深度优先，子目录按名称顺序处理
+        stack.extend(sorted(subdirs, reverse=True))
+
+
+def output_subdir(folder, path, extensions=DEFAULT_EXTENSIONS):
+    # 视频在输出目录下对应的子目录：保留源文件夹中的相对路径并去掉扩展名（sub/a.mp4 -> sub/a）；
+    # 同目录下还有同名不同扩展名的视频或同名子文件夹时保留扩展名（sub/a.mp4），保证各视频输出互不覆盖
+    rel = os.path.relpath(path, folder)
+    stem, ext = os.path.splitext(rel)
+    directory = os.path.dirname(path)
+    base = os.path.splitext(os.path.basename(path))[0]
+    siblings = [base + e for other in extensions if other != ext.lower() for e in (other, other.upper())]
+    if os.path.isdir(os.path.join(directory, base)) or any(
+            os.path.isfile(os.path.join(directory, name)) for name in siblings):
+        return rel
+    return stem
@@ -0,0 +1,6 @@
+# Project Path: core/__main__.py
+import sys
+
+from core.cli import main
+
+sys.exit(main())
@@ -0,0 +1,258 @@
+# Project Path: core/cli.py
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+from core.ExtractionEngine import ExtractionEngine
+from core.FFmpegCommands import MODE_NAMES, DEFAULT_DEDUP_THRESHOLD
+from core.FFmpegPaths import check_ffmpeg_exists
+from core.FolderWatcher import DEFAULT_STABLE_SECONDS
+from core.ImageEncoding import COMPRESSION_LEVELS, DEFAULT_SCALER, IMAGE_FORMATS, SCALERS, ImageEncoding
+from core.OutputSpecs import load_output_specs
+from core.ProbeCache import ProbeCache
+from core.Quarantine import Quarantine
+from core.Segments import load_segment_csv, parse_ranges
+from core.VideoScanner import DEFAULT_EXTENSIONS, parse_extensions
+
+MODE_CHOICES = MODE_NAMES
+
+
+def add_extraction_arguments(parser):
+    # 决定输出内容的参数（提取模式、格式、扫描范围等），单机与集群模式共用
+    parser.add_argument("--mode", choices=list(MODE_CHOICES), default="seconds", help="提取模式，默认 seconds")
+    parser.add_argument("--ext", action="append", default=None, metavar="EXT",
+                        help=f"视频扩展名，可重复或逗号分隔，默认 {','.join(DEFAULT_EXTENSIONS)}")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="排除匹配的文件或目录（glob，匹配相对路径或名称），可重复")
+    parser.add_argument("--keep-duplicate-videos", action="store_true",
+                        help="内容相同的视频也各自提取（默认只提取一次，其余链接到已提取的输出）")
+    parser.add_argument("-n", "--param", type=int, default=1,
+                        help="参数N，默认 1（keyframes 模式下 0 表示全部关键帧；scenes 模式下为场景分数阈值 1-100%%）")
+    parser.add_argument("--scene-min-gap", type=float, default=0.0, help="scenes 模式：相邻取帧的最小间隔（秒）")
+    parser.add_argument("--scene-max-gap", type=float, default=0.0,
+                        help="scenes 模式：相邻取帧的最大间隔（秒），超过时补帧，0 表示不限制")
+    parser.add_argument("--format", choices=list(IMAGE_FORMATS), default="png", help="图片格式")
+    parser.add_argument("--quality", type=int, default=None, help="JPG / WebP 压缩质量 1-100，默认 JPG 85、WebP 80")
+    parser.add_argument("--compression-level", type=int, default=None,
+                        help=f"PNG 压缩级别 {'-'.join(map(str, COMPRESSION_LEVELS['png']))}"
+                             f"（越小越快、文件越大）或 WebP 编码方法 {'-'.join(map(str, COMPRESSION_LEVELS['webp']))}"
+                             f"（越小越快），默认由编码器决定")
+    parser.add_argument("--width", type=int, default=None, help="输出宽度（像素），只给宽或高时另一边按比例缩放")
+    parser.add_argument("--height", type=int, default=None, help="输出高度（像素）")
+    parser.add_argument("--scaler", choices=list(SCALERS), default=DEFAULT_SCALER,
+                        help=f"缩放算法，默认 {DEFAULT_SCALER}；fast_bilinear 最快")
+    parser.add_argument("--crop", default=None, metavar="W:H[:X:Y]",
+                        help="缩放前先裁剪到该区域（源视频像素），省略 X:Y 时居中")
+    parser.add_argument("--pix-fmt", default=None, help="输出像素格式，如 PNG 的 gray / rgb24、JPG 的 yuvj444p")
+    parser.add_argument("--range", action="append", default=None, metavar="START-END",
+                        help="只提取该时间范围（如 1:30-2:00、90-，省略结束表示到视频结尾），可重复或逗号分隔；"
+                             "只解码范围内的部分，帧文件名以片段编号为前缀")
+    parser.add_argument("--segments", default=None, metavar="CSV",
+                        help="片段表（CSV，列为 file,start,end），按视频指定时间范围；未列入的视频使用 --range，"
+                             "未给 --range 时不处理")
+    parser.add_argument("--job", default=None,
+                        help="多输出任务定义（JSON）：一次解码生成多项输出，忽略 --mode/-n 与 --format 等图片编码参数")
+    parser.add_argument("--dedup", type=int, nargs="?", const=DEFAULT_DEDUP_THRESHOLD, default=None, metavar="T",
+                        help=f"去除与上一保留帧近似重复的帧，T 为差异阈值 1-100（默认 {DEFAULT_DEDUP_THRESHOLD}），越大去得越多")
+    parser.add_argument("--incremental", action="store_true", help="断点续提：沿用参数相同的上一次输出目录")
+
+
+def add_runtime_arguments(parser):
+    # 只影响本机运行方式、不影响输出内容的参数
+    parser.add_argument("-j", "--jobs", type=int, default=min(4, os.cpu_count() or 4), help="并发视频数")
+    parser.add_argument("--decoder-threads", type=int, default=None, help="单任务解码线程数，默认自动")
+    parser.add_argument("--no-probe-cache", action="store_true", help="不使用探测缓存")
+    parser.add_argument("--probe-cache", default=None, help="探测缓存文件路径")
+    parser.add_argument("--no-quarantine", action="store_true",
+                        help="不使用隔离名单：不跳过此前失败的视频，失败的视频也不记入名单")
+    parser.add_argument("--quarantine", default=None, help="隔离名单文件路径（JSON 行），默认与探测缓存同目录")
+    parser.add_argument("--cpu", action="store_true", help="强制 CPU 模式，不使用 GPU 加速")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m core",
+        description="视频帧提取器（命令行版）：批量提取文件夹下所有视频的帧，进度以 JSON 行输出到 stdout"
+    )
+    parser.add_argument("folder", help="需要处理的视频文件夹")
+    add_extraction_arguments(parser)
+    parser.add_argument("--tar-shards", action="store_true", help="帧图片写入 tar 分片（附偏移索引），不生成单帧文件")
+    parser.add_argument("--shard-size", type=int, default=1024, help="单个 tar 分片的大小上限（MB），默认 1024")
+    parser.add_argument("--watch", action="store_true",
+                        help="监视模式：处理完已有视频后继续监视文件夹，新视频写完即提取到固定的 帧生成_watch 目录，Ctrl+C 结束")
+    parser.add_argument("--stable-seconds", type=float, default=DEFAULT_STABLE_SECONDS,
+                        help=f"监视模式：文件大小保持不变多少秒后视为写入完毕，默认 {DEFAULT_STABLE_SECONDS:g}")
+    add_runtime_arguments(parser)
+    return parser
+
+
+def validate_extraction_args(parser, args):
+    if not os.path.isdir(args.folder):
+        parser.error(f"文件夹不存在: {args.folder}")
+    min_param = 0 if args.mode == "keyframes" else 1
+    if args.param < min_param:
+        parser.error(f"参数N 不能小于 {min_param}")
+    if args.mode == "scenes":
+        if args.param > 100:
+            parser.error("场景分数阈值需在 1-100 之间")
+        if args.scene_min_gap < 0 or args.scene_max_gap < 0:
+            parser.error("场景间隔不能为负数")
+        if args.scene_max_gap and args.scene_max_gap < args.scene_min_gap:
+            parser.error("最大间隔不能小于最小间隔")
+    try:
+        ImageEncoding(args.format, args.quality, args.compression_level, args.width, args.height, args.scaler,
+                      args.crop, args.pix_fmt)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.dedup is not None and not 1 <= args.dedup <= 100:
+        parser.error("去重阈值需在 1-100 之间")
+    if args.dedup is not None and args.mode == "scenes" and not args.job:
+        parser.error("场景切换模式不支持去除近似重复帧")
+    try:
+        args.time_ranges = [list(r) for r in parse_ranges(",".join(args.range or []))]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.segments:
+        try:
+            load_segment_csv(args.segments)
+        except (OSError, ValueError) as e:
+            parser.error(f"片段表无效: {e}")
+    if args.job:
+        try:
+            args.output_specs = load_output_specs(args.job)
+        except (OSError, ValueError) as e:
+            parser.error(f"任务定义无效: {e}")
+    else:
+        args.output_specs = None
+
+
+def validate_runtime_args(parser, args):
+    if args.jobs < 1:
+        parser.error("并发视频数至少为 1")
+
+
+def validate_args(parser, args):
+    validate_extraction_args(parser, args)
+    validate_runtime_args(parser, args)
+    if args.shard_size < 1:
+        parser.error("分片大小至少为 1 MB")
+    if args.job and args.tar_shards:
+        parser.error("--job 暂不支持与 --tar-shards 同时使用")
+    if args.stable_seconds < 0:
+        parser.error("稳定时间不能为负数")
+
+
+def extraction_options(args):
+    # ExtractionEngine 中决定输出内容的关键字参数
+    return {
+        "mode": MODE_CHOICES[args.mode],
+        "param": args.param,
+        "image_format": args.format,
+        "jpg_quality": args.quality,
+        "compression_level": args.compression_level,
+        "width": args.width,
+        "height": args.height,
+        "scaler": args.scaler,
+        "crop": args.crop,
+        "pix_fmt": args.pix_fmt,
+        "output_specs": args.output_specs,
+        "dedup_threshold": args.dedup,
+        "scene_min_gap": args.scene_min_gap,
+        "scene_max_gap": args.scene_max_gap,
+        "time_ranges": args.time_ranges,
+        "segment_csv": os.path.abspath(args.segments) if args.segments else None,
+        "extensions": parse_extensions(",".join(args.ext)) if args.ext else DEFAULT_EXTENSIONS,
+        "exclude": args.exclude,
+        "skip_duplicates": not args.keep_duplicate_videos,
+    }
+
+
+def open_probe_cache(args):
+    if args.no_probe_cache:
+        return None
+    try:
+        return ProbeCache(args.probe_cache)
+    except Exception as e:
+        print(f"[探测缓存不可用] {e}", file=sys.stderr)
+        return None
+
+
+def open_quarantine(args):
+    if args.no_quarantine:
+        return None
+    try:
+        return Quarantine(args.quarantine)
+    except OSError as e:
+        print(f"[隔离名单不可用] {e}", file=sys.stderr)
+        return None
+
+
+class JsonLinesReporter:
+    # 回调可能来自多个工作线程，逐行加锁输出
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event, **data):
+        line = json.dumps({"event": event, **data}, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    validate_args(parser, args)
+    check_ffmpeg_exists(gui_mode=False)
+
+    reporter = JsonLinesReporter()
+    probe_cache = open_probe_cache(args)
+
+    engine = ExtractionEngine(
+        args.folder,
+        **extraction_options(args),
+        max_threads=args.jobs,
+        decoder_threads=args.decoder_threads,
+        probe_cache=probe_cache,
+        quarantine=open_quarantine(args),
+        incremental=args.incremental,
+        use_gpu=False if args.cpu else None,
+        shard_size=args.shard_size * 1024 * 1024 if args.tar_shards else None,
+        watch=args.watch,
+        stable_seconds=args.stable_seconds,
+        on_scan=lambda found, finished: reporter.emit("scan", found=found, finished=finished),
+        on_notice=lambda text: reporter.emit("notice", text=text),
+        on_progress=lambda name, done, total: reporter.emit("progress", file=name, done=done, total=total),
+        on_item=lambda info: reporter.emit("item", info=info),
+        on_frames=lambda name, count: reporter.emit("frames", file=name, count=count),
+        on_stats=lambda stats: reporter.emit("stats", **stats),
+        on_metrics=lambda summary: reporter.emit("metrics", **summary),
+    )
+
+    # Ctrl+C / kill 时终止所有 ffmpeg 子进程后退出
+    def handle_signal(signum, frame):
+        engine.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    try:
+        engine.run()
+    except Exception as e:
+        reporter.emit("error", message=str(e))
+        return 1
+    finally:
+        if probe_cache is not None:
+            probe_cache.close()
+
+    reporter.emit("finished", folder=args.folder, output_root=engine.output_root,
+                  count=engine.completed_count, stopped=not engine.is_running)
+    return 0 if engine.is_running else 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
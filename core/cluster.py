@@ -0,0 +1,233 @@
+# Project Path: core/cluster.py
+import argparse
+import os
+import shutil
+import signal
+import sys
+import threading
+
+from core.ExtractionEngine import ExtractionEngine
+from core.FFmpegPaths import check_ffmpeg_exists
+from core.OutputSpecs import OutputSpec
+from core.SharedQueue import (
+    DEFAULT_LEASE_SECONDS, QUEUE_DIR_NAME, SETTINGS_NAME, SharedQueue, create_queue, default_worker_id,
+    extend_queue, queue_status
+)
+from core.cli import (
+    JsonLinesReporter, add_extraction_arguments, add_runtime_arguments, extraction_options, open_probe_cache,
+    open_quarantine, validate_extraction_args, validate_runtime_args
+)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m core.cluster",
+        description="多节点分布式提取：任务队列放在共享存储上，任意数量的无界面节点从中领取视频，无需网络服务"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init", help="扫描文件夹，在输出目录下创建任务队列（协调端）")
+    init.add_argument("folder", help="需要处理的视频文件夹（位于共享存储上）")
+    add_extraction_arguments(init)
+    init.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS,
+                      help=f"租约有效期（秒），节点失联超过该时间后其任务由其他节点接管，默认 {DEFAULT_LEASE_SECONDS}")
+
+    worker = commands.add_parser("worker", help="从队列领取并处理视频，直到队列处理完毕")
+    worker.add_argument("queue", help="任务队列目录（init 输出的 queue）")
+    add_runtime_arguments(worker)
+    worker.add_argument("--worker-id", default=None, help="节点名称，默认 主机名-进程号")
+    worker.add_argument("--poll", type=float, default=5.0, help="暂无可领取任务时的等待间隔（秒），默认 5")
+
+    status = commands.add_parser("status", help="汇总队列与各节点的进度")
+    status.add_argument("queue", help="任务队列目录")
+    status.add_argument("--watch", action="store_true", help="持续输出进度，直到全部完成")
+    status.add_argument("--interval", type=float, default=5.0, help="--watch 的刷新间隔（秒），默认 5")
+    return parser
+
+
+# 片段表复制到队列目录下，各节点不依赖协调端上的路径
+SEGMENTS_NAME = "segments.csv"
+
+
+def queue_settings(engine, options, lease_seconds, queue_dir):
+    # 节点据此重建与协调端一致的引擎；路径相对队列目录保存
+    options = dict(options, extensions=list(options["extensions"]), exclude=list(options["exclude"]))
+    if options["output_specs"]:
+        options["output_specs"] = [spec.to_dict() for spec in options["output_specs"]]
+    if options["segment_csv"]:
+        os.makedirs(queue_dir, exist_ok=True)
+        shutil.copyfile(options["segment_csv"], os.path.join(queue_dir, SEGMENTS_NAME))
+        options["segment_csv"] = SEGMENTS_NAME
+    return {
+        "folder": os.path.relpath(engine.folder, queue_dir),
+        "output_root": os.path.relpath(engine.output_root, queue_dir),
+        "lease_seconds": lease_seconds,
+        "options": options,
+    }
+
+
+def init_queue(args, reporter):
+    options = extraction_options(args)
+    engine = ExtractionEngine(os.path.abspath(args.folder), **options, incremental=args.incremental, use_gpu=False)
+    queue_dir = os.path.join(engine.output_root, QUEUE_DIR_NAME)
+    source_index = engine.new_source_index()
+
+    def videos():
+        # 重复视频在协调端直接链接，不进入队列
+        for batch in engine.scan_batches():
+            for path in batch:
+                original = engine.duplicate_of(source_index, path)
+                if original is not None:
+                    engine.link_duplicate(path, original)
+                else:
+                    yield engine.manifest.video_key(path)
+
+    if os.path.exists(os.path.join(queue_dir, SETTINGS_NAME)):
+        # --incremental 沿用了上次集群运行的输出目录：继续使用原队列，只追加新视频
+        count, added = extend_queue(queue_dir, videos())
+        resumed = True
+    else:
+        count = added = create_queue(queue_dir, queue_settings(engine, options, args.lease_seconds, queue_dir),
+                                     videos())
+        resumed = False
+    reporter.emit("queued", queue=queue_dir, output_root=engine.output_root, jobs=count, new_jobs=added,
+                  resumed=resumed, duplicates=len(engine.collected))
+    return 0
+
+
+def worker_engine(queue, args, probe_cache, reporter):
+    settings = queue.settings
+    options = dict(settings["options"])
+    if options["output_specs"]:
+        options["output_specs"] = [OutputSpec(**spec) for spec in options["output_specs"]]
+    if options.get("segment_csv"):
+        options["segment_csv"] = os.path.join(queue.queue_dir, options["segment_csv"])
+    # 重复视频已由协调端处理；节点按续提方式处理任务，接管失联节点的任务时会先清掉残留输出
+    options["skip_duplicates"] = False
+    return ExtractionEngine(
+        os.path.normpath(os.path.join(queue.queue_dir, settings["folder"])),
+        **options,
+        max_threads=args.jobs,
+        decoder_threads=args.decoder_threads,
+        probe_cache=probe_cache,
+        quarantine=open_quarantine(args),
+        incremental=True,
+        use_gpu=False if args.cpu else None,
+        output_root=os.path.normpath(os.path.join(queue.queue_dir, settings["output_root"])),
+        manifest_part=queue.worker_id,
+        on_stats=lambda stats: reporter.emit("stats", worker=queue.worker_id, **stats),
+    )
+
+
+def run_worker(args, reporter):
+    queue = SharedQueue(args.queue, args.worker_id or default_worker_id())
+    probe_cache = open_probe_cache(args)
+    engine = worker_engine(queue, args, probe_cache, reporter)
+    threads = engine.decoder_threads or max(1, (os.cpu_count() or 4) // args.jobs)
+    lock = threading.Lock()
+    stopped = threading.Event()
+    current = {}
+    counters = {"done": 0}
+
+    def status(finished=False):
+        summary = engine.metrics.finish()
+        return {"pid": os.getpid(), "done": counters["done"], "frames": summary["frames"],
+                "output_bytes": summary["output_bytes"], "current": sorted(current.values()), "finished": finished}
+
+    def heartbeat():
+        # 定期续租并上报进度；续租间隔为租约有效期的四分之一
+        while not stopped.wait(queue.lease_seconds / 4):
+            with lock:
+                for job_id in queue.renew():
+                    print(f"[租约丢失] {queue.jobs[job_id]} 已被其他节点接管", file=sys.stderr)
+                queue.write_status(status())
+
+    def slot():
+        while engine.is_running:
+            with lock:
+                claimed = queue.claim()
+                exhausted = queue.exhausted()
+            if claimed is None:
+                if exhausted:
+                    return
+                stopped.wait(args.poll)
+                continue
+            job_id, video = claimed
+            with lock:
+                current[job_id] = video
+            try:
+                info = engine.process_video(os.path.join(engine.folder, video), threads)
+            except RuntimeError:
+                # 节点停止：立即释放租约，其他节点无需等待过期
+                print(f"[停止] {video}", file=sys.stderr)
+                with lock:
+                    current.pop(job_id, None)
+                    queue.release(job_id)
+                return
+            with lock:
+                current.pop(job_id, None)
+                if queue.complete(job_id, info):
+                    counters["done"] += 1
+            reporter.emit("item", worker=queue.worker_id, info=info)
+
+    def handle_signal(signum, frame):
+        engine.stop()
+        stopped.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+    heartbeat_thread.start()
+    slots = [threading.Thread(target=slot) for _ in range(args.jobs)]
+    for t in slots:
+        t.start()
+    for t in slots:
+        t.join()
+    stopped.set()
+    heartbeat_thread.join()
+
+    with lock:
+        queue.write_status(status(finished=True))
+    engine.metrics.write_jsonl(os.path.join(args.queue, "workers", f"{queue.worker_id}.metrics.jsonl"))
+    if probe_cache is not None:
+        probe_cache.close()
+    reporter.emit("finished", worker=queue.worker_id, done=counters["done"], stopped=not engine.is_running)
+    return 0 if engine.is_running else 130
+
+
+def show_status(args, reporter):
+    while True:
+        summary = queue_status(args.queue)
+        reporter.emit("status", **summary)
+        if not args.watch:
+            return 0
+        if summary["done"] >= summary["jobs"]:
+            reporter.emit("finished", jobs=summary["jobs"], frames=summary["frames"],
+                          output_bytes=summary["output_bytes"])
+            return 0
+        threading.Event().wait(args.interval)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    reporter = JsonLinesReporter()
+    try:
+        if args.command == "init":
+            validate_extraction_args(parser, args)
+            if args.lease_seconds < 10:
+                parser.error("租约有效期至少 10 秒")
+            return init_queue(args, reporter)
+        if args.command == "worker":
+            validate_runtime_args(parser, args)
+            check_ffmpeg_exists(gui_mode=False)
+            return run_worker(args, reporter)
+        return show_status(args, reporter)
+    except ValueError as e:
+        reporter.emit("error", message=str(e))
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
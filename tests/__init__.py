@@ -0,0 +1 @@
+# Project Path: tests/__init__.py
@@ -0,0 +1,48 @@
+# Project Path: tests/test_dedup_counter.py
+from core.FFmpegCommands import MODE_SECONDS, build_linear_cmd, build_multi_output_cmd, count_framecrc_frames
+from core.ImageEncoding import ImageEncoding
+from core.OutputSpecs import OutputSpec
+
+FRAMECRC_SAMPLE = """#software: Lavf61.7.100
+#tb 0: 1/1
+#media_type 0: video
+#codec_id 0: rawvideo
+#dimensions 0: 8x8
+#sar 0: 1/1
+0,          0,          0,        1,       96, 0x2c6d2e4a
+0,          1,          1,        1,       96, 0x2c6d2e4a
+0,          2,          2,        1,       96, 0x1f8b21c3
+"""
+
+
+def test_count_framecrc_frames_ignores_header():
+    assert count_framecrc_frames(FRAMECRC_SAMPLE) == 3
+    assert count_framecrc_frames("") == 0
+
+
+def test_linear_counter_output_comes_after_images():
+    cmd = build_linear_cmd("in.mp4", "out/frame_%04d.png", MODE_SECONDS, 2, 2, False, ImageEncoding(),
+                           dedup=12, dedup_counter="count.crc")
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert "split[dedup_all][dedup_keep]" in graph and "mpdecimate" in graph
+    # 图片是第一路输出，-progress 的帧数仍对应图片；计数输出在最后
+    assert cmd.index("out/frame_%04d.png") < cmd.index("[dedup_count]")
+    assert cmd[-3:] == ["-f", "framecrc", "count.crc"]
+    # 候选帧数不再依赖日志，去重不需要 info 级日志
+    assert cmd[cmd.index("-loglevel") + 1] == "error"
+
+
+def test_linear_without_counter_keeps_simple_chain():
+    cmd = build_linear_cmd("in.mp4", "frame_%04d.png", MODE_SECONDS, 2, 2, False, ImageEncoding(), dedup=12)
+    assert "-filter_complex" not in cmd
+    assert "mpdecimate" in cmd[cmd.index("-vf") + 1]
+
+
+def test_multi_output_counts_each_spec():
+    outputs = [(OutputSpec("a", MODE_SECONDS, 1, "png"), "a/frame_%04d.png"),
+               (OutputSpec("b", MODE_SECONDS, 5, "jpg"), "b/frame_%04d.jpg")]
+    cmd = build_multi_output_cmd("in.mp4", outputs, 2, False, dedup=12, dedup_counters=["a.crc", "b.crc"])
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert "[dedup_count0]" in graph and "[dedup_count1]" in graph
+    assert cmd.index("b/frame_%04d.jpg") < cmd.index("[dedup_count0]") < cmd.index("[dedup_count1]")
+    assert cmd[-1] == "b.crc"
@@ -0,0 +1,69 @@
+# Project Path: tests/test_folder_watcher.py
+import os
+import sys
+
+import pytest
+
+from core import FolderWatcher as watcher_module
+from core.FolderWatcher import FolderWatcher, InotifySource
+
+
+class SilentSource:
+    # 模拟 NFS 等远程写入：不产生任何 inotify 事件
+    overflowed = False
+
+    def wait(self, timeout):
+        return set(), set()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fast_checks(monkeypatch):
+    monkeypatch.setattr(watcher_module, "CHECK_INTERVAL", 0.01)
+
+
+def test_periodic_rescan_finds_files_without_events(tmp_path):
+    watcher = FolderWatcher(str(tmp_path), stable_seconds=0, poll_seconds=0, use_inotify=False)
+    watcher.source = SilentSource()
+    video = tmp_path / "remote.mp4"
+    calls = []
+
+    def is_running():
+        # 启动时的全量扫描之后才写入文件，只能靠定期扫描发现
+        calls.append(1)
+        if len(calls) == 3:
+            video.write_bytes(b"data")
+        return len(calls) < 50
+
+    batches = watcher.batches(is_running)
+    assert next(batches) == [str(video)]
+    batches.close()
+
+
+def test_forget_drops_removed_files_and_directories(tmp_path):
+    watcher = FolderWatcher(str(tmp_path), use_inotify=False)
+    kept, gone = str(tmp_path / "a.mp4"), str(tmp_path / "b.mp4")
+    nested = str(tmp_path / "cam" / "c.mp4")
+    watcher._queued = {kept: (1, 1), gone: (1, 1), nested: (1, 1)}
+    watcher._pending = {str(tmp_path / "cam" / "d.mp4"): (-1, -1, 0.0)}
+    watcher._forget({gone, str(tmp_path / "cam")})
+    assert list(watcher._queued) == [kept]
+    assert watcher._pending == {}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify 仅在 Linux 上可用")
+def test_inotify_reports_deleted_and_moved_files(tmp_path):
+    first, second = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    first.write_bytes(b"a")
+    second.write_bytes(b"b")
+    source = InotifySource(str(tmp_path))
+    try:
+        os.remove(first)
+        os.rename(second, tmp_path / "c.mp4")
+        changed, removed = source.wait(1.0)
+    finally:
+        source.close()
+    assert removed == {str(first), str(second)}
+    assert changed == {str(tmp_path / "c.mp4")}
@@ -0,0 +1,83 @@
+# Project Path: tests/test_frame_shards.py
+import tarfile
+
+import pytest
+
+from core.FrameShards import ImageStreamSplitter, ShardReader, ShardWriter, list_shards, load_index, shard_name
+
+
+def png_image(payload):
+    def chunk(kind, data):
+        # 切分只看块长度，CRC 不校验
+        return len(data).to_bytes(4, "big") + kind + data + b"\0\0\0\0"
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", b"\1" * 13) + chunk(b"IDAT", payload) + chunk(b"IEND", b"")
+
+
+def jpg_image(payload):
+    app0 = b"\xff\xe0" + (2 + 4).to_bytes(2, "big") + b"JFIF"
+    sos = b"\xff\xda" + (2 + 2).to_bytes(2, "big") + b"\0\0"
+    # 熵编码数据中的 FF00 与 RST 标记不能被当作图片结尾
+    scan = payload + b"\xff\x00" + payload + b"\xff\xd3" + payload
+    return b"\xff\xd8" + app0 + sos + scan + b"\xff\xd9"
+
+
+def webp_image(payload):
+    body = b"WEBP" + b"VP8 " + len(payload).to_bytes(4, "little") + payload
+    padding = b"\0" if len(body) & 1 else b""
+    return b"RIFF" + len(body).to_bytes(4, "little") + body + padding
+
+
+@pytest.mark.parametrize("image_format, make", [("png", png_image), ("jpg", jpg_image), ("webp", webp_image)])
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_splitter_recovers_images_across_chunks(image_format, make, chunk_size):
+    # 中间一张的数据里含 0xFF（JPG 扫描数据中按规范写成 FF00）
+    images = [make(b"a" * 5), make(b"\xff\x00" * 3 + b"b"), make(b"c" * 300)]
+    stream = b"".join(images)
+    splitter = ImageStreamSplitter(image_format)
+    out = []
+    for i in range(0, len(stream), chunk_size):
+        out += splitter.feed(stream[i:i + chunk_size])
+    assert out == images
+
+
+def test_splitter_rejects_wrong_format():
+    with pytest.raises(ValueError):
+        ImageStreamSplitter("png").feed(jpg_image(b"x"))
+
+
+def test_shards_roll_over_and_read_back(tmp_path):
+    writer = ShardWriter(str(tmp_path), shard_size=4096)
+    frames = {f"v/frame_{i:03d}.png": bytes([i]) * (700 + i) for i in range(8)}
+    for name, data in frames.items():
+        writer.add(name, data)
+    writer.close()
+
+    shards = list_shards(str(tmp_path))
+    assert len(shards) > 1
+    with ShardReader(str(tmp_path)) as reader:
+        assert reader.names() == sorted(frames)
+        for name, data in frames.items():
+            assert reader.read(name) == data
+    # 分片本身是标准 tar，可直接用 tarfile 读取
+    with tarfile.open(tmp_path / shards[0]) as tar:
+        member = tar.getmembers()[0]
+        assert tar.extractfile(member).read() == frames[member.name]
+
+
+def test_discard_drops_prefix_and_resume_opens_new_shard(tmp_path):
+    writer = ShardWriter(str(tmp_path))
+    writer.add("a/frame_000.png", b"aa")
+    writer.add("b/frame_000.png", b"bb")
+    writer.discard("a")
+    assert writer.entries("a") == []
+    assert writer.entries("b") == [("b/frame_000.png", 2)]
+    writer.close()
+    assert set(load_index(str(tmp_path))) == {"b"}
+
+    resumed = ShardWriter(str(tmp_path))
+    resumed.add("a/frame_000.png", b"new")
+    resumed.close()
+    assert list_shards(str(tmp_path)) == [shard_name(0), shard_name(1)]
+    with ShardReader(str(tmp_path)) as reader:
+        assert reader.read("a/frame_000.png") == b"new"
+        assert reader.read("b/frame_000.png") == b"bb"
@@ -0,0 +1,68 @@
+# Project Path: tests/test_job_scheduler.py
+import threading
+
+from core.JobScheduler import JobScheduler
+
+
+def test_jobs_are_taken_longest_first():
+    scheduler = JobScheduler(1, core_budget=4)
+    for name, cost in (("small", 1), ("large", 5), ("medium", 3), ("tie", 3)):
+        scheduler.add(name, cost)
+    scheduler.close()
+    order = []
+    while True:
+        job, _ = scheduler.take()
+        if job is None:
+            break
+        order.append(job)
+        scheduler.done(job)
+    # 开销相同的任务按加入顺序
+    assert order == ["large", "medium", "tie", "small"]
+
+
+def test_cores_split_by_cost_between_concurrent_jobs():
+    scheduler = JobScheduler(2, core_budget=8)
+    scheduler.add("a", 3)
+    scheduler.add("b", 1)
+    # 第一个任务与即将填满并发位的待办任务按 3:1 分核心
+    assert scheduler.take() == ("a", 6)
+    assert scheduler.take() == ("b", 2)
+
+
+def test_last_large_job_gets_every_core():
+    scheduler = JobScheduler(4, core_budget=8)
+    scheduler.add("a", 10)
+    assert scheduler.take() == ("a", 8)
+    scheduler.done("a")
+    scheduler.add("b", 10)
+    scheduler.add("c", 10)
+    assert scheduler.take() == ("b", 4)
+
+
+def test_small_job_gets_at_least_one_core():
+    scheduler = JobScheduler(2, core_budget=4)
+    scheduler.add("big", 1000)
+    scheduler.take()
+    scheduler.add("tiny", 1)
+    assert scheduler.take() == ("tiny", 1)
+
+
+def test_fixed_and_zero_cost_threads():
+    fixed = JobScheduler(4, core_budget=16, fixed_threads=3)
+    fixed.add("a", 100)
+    assert fixed.take() == ("a", 3)
+    zero = JobScheduler(4, core_budget=16)
+    zero.add("a", 0)
+    assert zero.take() == ("a", 4)
+
+
+def test_take_waits_for_jobs_until_closed():
+    scheduler = JobScheduler(2, core_budget=2)
+    taken = []
+    worker = threading.Thread(target=lambda: taken.extend([scheduler.take(), scheduler.take()]))
+    worker.start()
+    scheduler.add("a", 1)
+    scheduler.close()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert taken[0][0] == "a" and taken[1] == (None, 0)
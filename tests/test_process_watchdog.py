@@ -0,0 +1,51 @@
+# Project Path: tests/test_process_watchdog.py
+import pytest
+
+from core import ProcessWatchdog as watchdog_module
+from core.ProcessWatchdog import _Entry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(watchdog_module.time, "monotonic", clock)
+    return clock
+
+
+def stalled_for(entry, clock):
+    return clock.now - entry.last_advance
+
+
+def test_advancing_out_time_counts_as_progress_when_frames_are_flat(clock):
+    # 去重处理静止画面：保留的帧数长时间不变，但处理到的时间点持续前进
+    entry = _Entry(None, timeout=3600, stall=60, media_duration=600)
+    entry.advance(5, 10.0)
+    for step in range(1, 11):
+        clock.now += 30
+        entry.advance(5, 10.0 + step * 30)
+        assert stalled_for(entry, clock) == 0
+
+
+def test_flat_frames_and_out_time_stall(clock):
+    entry = _Entry(None, timeout=3600, stall=60, media_duration=600)
+    entry.advance(5, 10.0)
+    clock.now += 90
+    entry.advance(5, 10.0)
+    assert stalled_for(entry, clock) == 90
+
+
+def test_new_frames_without_out_time_are_progress(clock):
+    # 管道模式只上报收到的图片数
+    entry = _Entry(None, timeout=3600, stall=60, media_duration=None)
+    entry.advance(1, None)
+    clock.now += 90
+    entry.advance(2, None)
+    assert stalled_for(entry, clock) == 0
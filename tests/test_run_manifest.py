@@ -0,0 +1,94 @@
+# Project Path: tests/test_run_manifest.py
+import os
+
+import pytest
+
+from core.RunManifest import MANIFEST_NAME, WATCH_OUTPUT_NAME, RunManifest, find_resumable_root, part_name
+
+PARAMS = {"mode": 0, "param": 5, "format": "png"}
+FRAMES = [("frame_0001.png", 10), ("frame_0002.png", 12)]
+
+
+@pytest.fixture
+def layout(tmp_path):
+    folder = tmp_path / "videos"
+    folder.mkdir()
+    video = folder / "a.mp4"
+    video.write_bytes(b"video")
+    root = folder / "帧生成_20240101_000000"
+    root.mkdir()
+    return str(folder), str(video), str(root)
+
+
+def test_completed_info_after_reopen(layout):
+    folder, video, root = layout
+    RunManifest(root, folder, PARAMS).record(video, FRAMES, {"文件名": "a.mp4"})
+    manifest = RunManifest(root, folder, PARAMS)
+    assert manifest.completed_info(video, FRAMES) == {"文件名": "a.mp4"}
+    # 输出缺帧时需要重做
+    assert manifest.completed_info(video, FRAMES[:1]) is None
+
+
+def test_truncated_or_replaced_frames_are_redone(layout):
+    folder, video, root = layout
+    RunManifest(root, folder, PARAMS).record(video, FRAMES, {})
+    manifest = RunManifest(root, folder, PARAMS)
+    # 帧数相同，但某帧被截断或换成了别的文件
+    assert manifest.completed_info(video, [FRAMES[0], ("frame_0002.png", 3)]) is None
+    assert manifest.completed_info(video, [FRAMES[0], ("frame_0003.png", 12)]) is None
+    assert manifest.completed_info(video, FRAMES) == {}
+
+
+def test_changed_or_missing_source_is_redone(layout):
+    folder, video, root = layout
+    manifest = RunManifest(root, folder, PARAMS)
+    manifest.record(video, FRAMES, {})
+    with open(video, "ab") as f:
+        f.write(b"more")
+    assert manifest.completed_info(video, FRAMES) is None
+    os.remove(video)
+    assert manifest.completed_info(video, FRAMES) is None
+
+
+def test_param_change_starts_over(layout):
+    folder, video, root = layout
+    RunManifest(root, folder, PARAMS).record(video, FRAMES, {})
+    assert find_resumable_root(folder, PARAMS) == root
+    assert find_resumable_root(folder, dict(PARAMS, param=10)) is None
+    manifest = RunManifest(root, folder, dict(PARAMS, param=10))
+    assert manifest.completed_info(video, FRAMES) is None
+
+
+def test_truncated_last_line_is_ignored(layout):
+    folder, video, root = layout
+    RunManifest(root, folder, PARAMS).record(video, FRAMES, {"ok": True})
+    with open(os.path.join(root, MANIFEST_NAME), "a", encoding="utf-8") as f:
+        f.write('{"video": "b.mp4", "fing')
+    assert RunManifest(root, folder, PARAMS).completed_info(video, FRAMES) == {"ok": True}
+
+
+def test_parts_are_merged_and_checked(layout):
+    folder, video, root = layout
+    RunManifest(root, folder, PARAMS)
+    RunManifest(root, folder, PARAMS, part="node1").record(video, FRAMES, {"node": 1})
+    assert os.path.exists(os.path.join(root, part_name("node1")))
+    assert RunManifest(root, folder, PARAMS).completed_info(video, FRAMES) == {"node": 1}
+    # 节点不改写参数不一致的主清单
+    with pytest.raises(ValueError):
+        RunManifest(root, folder, dict(PARAMS, param=10), part="node2")
+    # 本地重新开始时旧分片一并作废
+    RunManifest(root, folder, dict(PARAMS, param=10))
+    assert not os.path.exists(os.path.join(root, part_name("node1")))
+
+
+def test_watch_root_is_never_resumed(layout):
+    folder, video, root = layout
+    RunManifest(root, folder, PARAMS)
+    watch_root = os.path.join(folder, WATCH_OUTPUT_NAME)
+    os.mkdir(watch_root)
+    RunManifest(watch_root, folder, PARAMS)
+    # “watch” 按名称排在所有时间戳目录之前，但常驻进程的目录不能被普通续提接手
+    assert find_resumable_root(folder, PARAMS) == root
+    os.rename(root, root + "_old")
+    os.remove(os.path.join(root + "_old", MANIFEST_NAME))
+    assert find_resumable_root(folder, PARAMS) is None
@@ -0,0 +1,35 @@
+# Project Path: tests/test_scene_plan.py
+import pytest
+
+from core.FFmpegCommands import plan_scene_timestamps
+
+
+@pytest.mark.parametrize("cuts, duration, min_gap, max_gap, expected", [
+    # 无切换点时只取开头画面
+    ([], 30, 0, 0, [0.0]),
+    ([5, 12.5], 30, 0, 0, [0.0, 5, 12.5]),
+    # 切换点乱序传入也按时间排列
+    ([12.5, 5], 30, 0, 0, [0.0, 5, 12.5]),
+    # 与上一取帧点不足 min_gap 的切换点跳过
+    ([5, 5.5, 20], 30, 2, 0, [0.0, 5, 20]),
+    # 与开头重合的切换点不重复取帧
+    ([0, 0.0005, 3], 30, 0, 0, [0.0, 3]),
+    # 超过 max_gap 时补帧，补到视频末尾为止
+    ([], 10, 0, 4, [0.0, 4, 8]),
+    # 补出的点与下一切换点也保持至少 min_gap
+    ([9], 10, 2, 4, [0.0, 4, 9]),
+    ([6, 30], 40, 1, 10, [0.0, 6, 16, 26, 30]),
+    # 视频末尾及之后的切换点忽略
+    ([10, 12], 10, 0, 0, [0.0]),
+])
+def test_plan_scene_timestamps(cuts, duration, min_gap, max_gap, expected):
+    assert plan_scene_timestamps(cuts, duration, min_gap, max_gap) == expected
+
+
+def test_gaps_respect_limits():
+    cuts = [0.4, 1.0, 1.2, 7.5, 7.9, 25.0, 26.0]
+    timestamps = plan_scene_timestamps(cuts, 40, min_gap=1.0, max_gap=6.0)
+    gaps = [b - a for a, b in zip(timestamps, timestamps[1:])]
+    # min_gap 优先：为避开紧随其后的切换点而少补一帧时，间隔最多超出 max_gap 不到 min_gap
+    assert all(1.0 <= gap < 6.0 + 1.0 for gap in gaps)
+    assert timestamps[-1] > 40 - 6.0
@@ -0,0 +1,28 @@
+# Project Path: tests/test_seek_strategy.py
+from fractions import Fraction
+
+import pytest
+
+from core.FFmpegCommands import MODE_SECONDS, seek_timestamps
+from core.VideoProbe import VideoMeta, estimate_frame_count
+
+
+def fps_filter_outputs(duration, fps, param):
+    # 模拟 fps=1/N（round=near）：每个输入帧映射到最近的输出时刻，输出从 0 到最大时刻之间的每个时刻
+    frame_times = [i / fps for i in range(int(round(duration * fps)))]
+    return max(int(t / param + 0.5) for t in frame_times) + 1
+
+
+@pytest.mark.parametrize("duration, fps, param", [
+    (10, 25, 5), (10, 25, 3), (10, 25, 4), (9.99, 30, 2), (60, 24, 7), (3, 25, 5), (120, 29.97, 10),
+])
+def test_seek_and_linear_frame_counts_match(duration, fps, param):
+    meta = VideoMeta("v.mp4", duration, Fraction(fps).limit_denominator(1001))
+    expected = fps_filter_outputs(duration, meta.fps, param)
+    assert estimate_frame_count(meta, MODE_SECONDS, param) == expected
+    assert len(seek_timestamps(meta, param)) == expected
+
+
+def test_seek_targets_stay_inside_video():
+    meta = VideoMeta("v.mp4", 10, Fraction(25))
+    assert seek_timestamps(meta, 5) == [0, 5, 9.96]
@@ -0,0 +1,72 @@
+# Project Path: tests/test_segments.py
+import pytest
+
+from core.Segments import SegmentPlan, format_time, load_segment_csv, parse_ranges, parse_time, resolve_segments
+
+
+@pytest.mark.parametrize("text, seconds", [("90", 90), ("1:30", 90), ("01:02:03.5", 3723.5), ("2.", 2.0)])
+def test_parse_time(text, seconds):
+    assert parse_time(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["", "1:2:3:4", "abc", "-5"])
+def test_parse_time_rejects_garbage(text):
+    with pytest.raises(ValueError):
+        parse_time(text)
+
+
+def test_parse_ranges():
+    assert parse_ranges("0:10-0:20, 1:00-；-5") == [(10, 20), (60, None), (0.0, 5)]
+    assert parse_ranges("") == []
+
+
+@pytest.mark.parametrize("text", ["10", "20-10", "5-5"])
+def test_parse_ranges_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        parse_ranges(text)
+
+
+def test_format_time():
+    assert format_time(3723.5) == "1:02:03.5"
+    assert format_time(125) == "2:05"
+
+
+def test_resolve_segments_clips_sorts_and_merges():
+    segments = resolve_segments([(50, None), (5, 15), (10, 20), (200, 300), (30, 40)], duration=60)
+    assert [(s.start, s.end) for s in segments] == [(5, 20), (30, 40), (50, 60)]
+    assert [s.label for s in segments] == ["seg01", "seg02", "seg03"]
+    assert segments[0].describe() == "0:05-0:20"
+
+
+def test_load_segment_csv(tmp_path):
+    path = tmp_path / "segments.csv"
+    # 带 BOM 的表头（Excel 导出）
+    path.write_text("\ufefffile,start,end\n"
+                    "# 注释行\n"
+                    "sub\\a.mp4,0:10,0:20\n"
+                    "sub/a.mp4,1:00,\n"
+                    "b.mp4,,30\n", encoding="utf-8")
+    assert load_segment_csv(str(path)) == {"sub/a.mp4": [(10, 20), (60, None)], "b.mp4": [(0.0, 30)]}
+
+
+@pytest.mark.parametrize("row, message", [("a.mp4", "缺少开始时间"), ("a.mp4,x", "第 1 行"), ("a.mp4,20,10", "结束必须晚于开始")])
+def test_load_segment_csv_reports_line(tmp_path, row, message):
+    path = tmp_path / "segments.csv"
+    path.write_text(row + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        load_segment_csv(str(path))
+
+
+def test_segment_plan_lookup(tmp_path):
+    folder = tmp_path / "videos"
+    path = tmp_path / "segments.csv"
+    path.write_text("sub/a.mp4,10,20\nc.mp4,5,\n", encoding="utf-8")
+    plan = SegmentPlan(str(folder), ranges=[(0, 30)], csv_path=str(path))
+    # 按相对路径、文件名匹配；未列入表中的视频使用全局范围
+    assert plan.ranges_for(str(folder / "sub" / "a.mp4")) == [(10, 20)]
+    assert plan.ranges_for(str(folder / "x" / "c.mp4")) == [(5, None)]
+    assert plan.ranges_for(str(folder / "b.mp4")) == [(0, 30)]
+    # 只有片段表时，未列入的视频不处理
+    assert SegmentPlan(str(folder), csv_path=str(path)).ranges_for(str(folder / "b.mp4")) == []
+    assert SegmentPlan(str(folder)).ranges_for(str(folder / "b.mp4")) is None
+    assert set(plan.params()) == {"ranges", "segment_csv"}
@@ -0,0 +1,90 @@
+# Project Path: tests/test_shared_queue.py
+import os
+
+import pytest
+
+from core.SharedQueue import SharedQueue, create_queue, extend_queue, load_jobs, queue_status
+
+
+@pytest.fixture
+def queue_dir(tmp_path):
+    path = str(tmp_path / "cluster")
+    create_queue(path, {"lease_seconds": 60}, ["a.mp4", "b.mp4", "c.mp4"])
+    return path
+
+
+def claim_all(queue):
+    claimed = []
+    while True:
+        job = queue.claim()
+        if job is None:
+            return claimed
+        claimed.append(job)
+
+
+def expire(path):
+    # 租约修改时间改到很久以前，相当于持有者失联
+    os.utime(path, (1, 1))
+
+
+def test_workers_claim_disjoint_jobs(queue_dir):
+    first, second = SharedQueue(queue_dir, "w1"), SharedQueue(queue_dir, "w2")
+    mine = claim_all(first)
+    assert sorted(mine) == [(1, "a.mp4"), (2, "b.mp4"), (3, "c.mp4")]
+    # 租约未过期，其他节点抢不到
+    assert claim_all(second) == []
+    assert not second.exhausted()
+
+
+def test_expired_lease_is_taken_over(queue_dir):
+    first, second = SharedQueue(queue_dir, "w1"), SharedQueue(queue_dir, "w2")
+    claim_all(first)
+    expire(first.held[2])
+    assert claim_all(second) == [(2, "b.mp4")]
+    assert second.held[2].endswith("2.1")
+    # 原持有者续租时发现已被接管，完成时不写结果
+    assert first.renew() == [2]
+    assert first.complete(2, {"frames": 1}) is False
+    assert second.complete(2, {"frames": 2}) is True
+    assert first.is_done(2)
+    assert not any(name.startswith("2.") for name in os.listdir(os.path.join(queue_dir, "leases")))
+
+
+def test_renew_keeps_live_leases(queue_dir):
+    first, second = SharedQueue(queue_dir, "w1"), SharedQueue(queue_dir, "w2")
+    claim_all(first)
+    expire(first.held[1])
+    # 过期前及时续租，其他节点无法接管
+    assert first.renew() == []
+    assert claim_all(second) == []
+
+
+def test_release_hands_job_over_immediately(queue_dir):
+    first, second = SharedQueue(queue_dir, "w1"), SharedQueue(queue_dir, "w2")
+    claim_all(first)
+    first.release(3)
+    assert 3 not in first.held
+    assert claim_all(second) == [(3, "c.mp4")]
+
+
+def test_done_jobs_are_skipped_and_counted(queue_dir):
+    first = SharedQueue(queue_dir, "w1")
+    for job_id, _ in claim_all(first):
+        assert first.complete(job_id, {"job": job_id})
+    assert first.exhausted()
+    # 新加入的节点看到全部已完成
+    assert claim_all(SharedQueue(queue_dir, "w2")) == []
+    status = queue_status(queue_dir)
+    assert (status["jobs"], status["done"], status["active"]) == (3, 3, 0)
+
+
+def test_extend_queue_appends_only_new_videos(queue_dir):
+    assert extend_queue(queue_dir, ["b.mp4", "d.mp4", "a.mp4", "e.mp4"]) == (5, 2)
+    assert load_jobs(queue_dir) == {1: "a.mp4", 2: "b.mp4", 3: "c.mp4", 4: "d.mp4", 5: "e.mp4"}
+    assert extend_queue(queue_dir, ["a.mp4"]) == (5, 0)
+    assert queue_status(queue_dir)["jobs"] == 5
+
+
+def test_create_queue_refuses_existing(queue_dir):
+    with pytest.raises(ValueError):
+        create_queue(queue_dir, {}, ["x.mp4"])
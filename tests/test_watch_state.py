@@ -0,0 +1,50 @@
+# Project Path: tests/test_watch_state.py
+import json
+
+from core.ProgressTracker import ProgressTracker
+from core.RunMetrics import RunMetrics
+from core.SourceDedup import SourceIndex
+
+
+def test_folded_videos_are_spilled_and_still_counted(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    metrics = RunMetrics(path)
+    metrics.record_output("a.mp4", 3, 300, "ok")
+    metrics.record_output("b.mp4", 0, 0, "duplicate")
+    with metrics.stage("probe", "c.mp4"):
+        pass
+    metrics.fold_finished()
+    # 进行中的视频（尚无状态）留在内存中
+    assert list(metrics.videos) == ["c.mp4"]
+    metrics.record_output("c.mp4", 2, 200, "quarantined")
+    summary = metrics.finish()
+    assert (summary["videos"], summary["frames"], summary["output_bytes"]) == (3, 5, 500)
+    assert (summary["duplicate_videos"], summary["quarantined_videos"]) == (1, 1)
+    metrics.write_jsonl(path)
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line.get("video") for line in lines] == ["a.mp4", "b.mp4", "c.mp4", None]
+    assert lines[-1]["type"] == "summary"
+
+
+def test_tracker_keeps_no_per_video_state_after_finish():
+    tracker = ProgressTracker(lambda stats: None, min_interval=0)
+    tracker.start_batch(4)
+    tracker.set_expected("a", 10)
+    tracker.set_expected("b", 30)
+    tracker.finish("a", "a", 12)
+    assert list(tracker._expected) == ["b"]
+    # 已结束按实际帧数计，未探测的两个视频按平均值外推
+    assert tracker._snapshot(tracker._start + 1)["expected_frames"] == 84
+
+
+def test_source_index_trim_forgets_deleted_files(tmp_path):
+    first, second = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    first.write_bytes(b"same")
+    second.write_bytes(b"same")
+    index = SourceIndex()
+    assert index.claim(str(first)) is None
+    assert index.claim(str(second)) == str(first)
+    first.unlink()
+    index.trim()
+    assert index.claim(str(second)) is None
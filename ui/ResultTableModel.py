@@ -0,0 +1,121 @@
+# Project Path: ui/ResultTableModel.py
+import re
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+
+HEADERS = ["文件名", "所在路径", "类型", "大小(MB)", "时长", "每秒帧数", "截取帧数量"]
+
+# 排序用的数据角色：数值列按数值排序，其余按文本
+SORT_ROLE = Qt.ItemDataRole.UserRole
+# 新结果先进入待插入队列，按该间隔（毫秒）合并成一次批量插入
+FLUSH_INTERVAL_MS = 100
+
+_DURATION_RE = re.compile(r"(?:(\d+)h)?(\d+)m(\d+)s")
+
+
+def _duration_seconds(text):
+    match = _DURATION_RE.fullmatch(text or "")
+    if not match:
+        return -1
+    h, m, s = (int(v) if v else 0 for v in match.groups())
+    return h * 3600 + m * 60 + s
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return -1.0
+
+
+def format_duration_text(info):
+    # 只处理部分片段时在时长后注明处理的片段
+    if info.get("片段"):
+        return f"{info['时长']}（片段 {info['片段']}）" if info["时长"] else info["片段"]
+    return info["时长"]
+
+
+def format_frame_count(info):
+    if info.get("重复于"):
+        return f"与 {info['重复于']} 内容相同，未重复提取"
+    if info.get("隔离原因"):
+        # 本次重试后仍失败，或此前已失败而被跳过；完整原因见悬停提示
+        return f"已隔离：{info['隔离原因']}"
+    count_text = str(info["截取帧数量"])
+    if info.get("去重丢弃") not in (None, ""):
+        count_text = f"保留 {info['截取帧数量']} / 去重丢弃 {info['去重丢弃']}"
+    if info.get("关键帧数") not in (None, ""):
+        count_text += f"（关键帧 {info['关键帧数']}）"
+    if info.get("场景切换数") not in (None, ""):
+        count_text += f"（场景切换 {info['场景切换数']}）"
+    return count_text
+
+
+# 结果表格的数据模型：每行只保存结果信息与预先格式化的文本，不为每个单元格创建对象
+class ResultTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._infos = []
+        self._texts = []
+        self._sort_keys = []
+        self._pending = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._texts)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._texts[index.row()][index.column()]
+        if role == SORT_ROLE:
+            return self._sort_keys[index.row()][index.column()]
+        return None
+
+    def append(self, info):
+        # 结果可能每秒到达上百条，先排队，由定时器合并插入
+        self._pending.append(info)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        start = len(self._texts)
+        self.beginInsertRows(QModelIndex(), start, start + len(pending) - 1)
+        for info in pending:
+            texts = (
+                info["文件名"], info["所在路径"], info["类型"], str(info["大小(MB)"]),
+                format_duration_text(info), str(info["每秒帧数"]), format_frame_count(info),
+            )
+            self._infos.append(info)
+            self._texts.append(texts)
+            self._sort_keys.append((
+                texts[0].lower(), texts[1].lower(), texts[2].lower(), _number(info["大小(MB)"]),
+                _duration_seconds(info["时长"]), _number(info["每秒帧数"]), _number(info["截取帧数量"]),
+            ))
+        self.endInsertRows()
+
+    def clear(self):
+        self._flush_timer.stop()
+        self._pending = []
+        self.beginResetModel()
+        self._infos, self._texts, self._sort_keys = [], [], []
+        self.endResetModel()
+
+    def info_at(self, row):
+        return self._infos[row]
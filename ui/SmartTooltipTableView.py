@@ -0,0 +1,43 @@
+# Project Path: ui/SmartTooltipTableView.py
+from PyQt6.QtCore import QEvent
+from PyQt6.QtGui import QFontMetrics
+from PyQt6.QtWidgets import QTableView, QToolTip
+
+
+# 只在文字被截断时显示完整内容的提示框；仅在 Qt 请求提示时计算，并缓存文字宽度
+class SmartTooltipTableView(QTableView):
+    # 单元格左右内边距
+    CELL_PADDING = 6
+    TEXT_WIDTH_CACHE_LIMIT = 50000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setMouseTracking(True)
+        self._metrics = QFontMetrics(self.font())
+        self._text_widths = {}
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.FontChange:
+            self._metrics = QFontMetrics(self.font())
+            self._text_widths.clear()
+        super().changeEvent(event)
+
+    def text_width(self, text):
+        width = self._text_widths.get(text)
+        if width is None:
+            if len(self._text_widths) >= self.TEXT_WIDTH_CACHE_LIMIT:
+                self._text_widths.clear()
+            width = self._text_widths[text] = self._metrics.horizontalAdvance(text)
+        return width
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.Type.ToolTip:
+            index = self.indexAt(event.pos())
+            text = index.data() if index.isValid() else None
+            if text and self.text_width(text) > self.columnWidth(index.column()) - self.CELL_PADDING:
+                QToolTip.showText(event.globalPos(), text, self.viewport(), self.visualRect(index))
+            else:
+                QToolTip.hideText()
+                event.ignore()
+            return True
+        return super().viewportEvent(event)
@@ -3,15 +3,23 @@ import os
 import subprocess
 import sys
 
-from PyQt6.QtCore import Qt, QSettings, QTimer
+from PyQt6.QtCore import Qt, QSettings, QTimer, QSortFilterProxyModel
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QFileDialog, QProgressBar, QMessageBox, QComboBox,
-    QTableWidgetItem, QHeaderView, QAbstractItemView, QSpinBox
+    QHeaderView, QAbstractItemView, QSpinBox, QCheckBox, QGroupBox
 )
 
-from core.WorkerThread import WorkerThread
-from ui.SmartTooltipTableWidget import SmartTooltipTableWidget
+from core.FFmpegCommands import DEFAULT_DEDUP_THRESHOLD
+from core.ImageEncoding import COMPRESSION_LEVELS, DEFAULT_QUALITY, DEFAULT_SCALER, PIXEL_FORMATS, SCALERS, parse_crop
+from core.Segments import load_segment_csv, parse_ranges
+from core.OutputSpecs import load_output_specs
+from core.ProbeCache import ProbeCache
+from core.Quarantine import Quarantine
+from core.VideoScanner import DEFAULT_EXTENSIONS, parse_extensions, parse_patterns
+from core.WorkerThread import WorkerThread, format_duration
+from ui.ResultTableModel import ResultTableModel, SORT_ROLE
+from ui.SmartTooltipTableView import SmartTooltipTableView
 
 
 class FileCollectorApp(QWidget):
@@ -20,9 +28,37 @@ class FileCollectorApp(QWidget):
         self.quality_input = None
         self.quality_label = None
         self.format_box = None
+        self.compression_label = None
+        self.compression_input = None
+        self.width_input = None
+        self.height_input = None
+        self.scaler_box = None
+        self.crop_input = None
+        self.pix_fmt_box = None
+        self.shard_size_label = None
+        self.shard_size_input = None
+        self.range_input = None
+        self.segment_label = None
+        self.segment_load_btn = None
+        self.segment_clear_btn = None
+        self.segment_csv = None  # 已加载的片段表路径
+        self.job_label = None
+        self.job_load_btn = None
+        self.job_clear_btn = None
+        self.output_specs = None  # 已加载的多输出任务定义
         self.thread_input = None
+        self.decoder_thread_input = None
+        self.incremental_check = None
+        self.skip_duplicates_check = None
+        self.watch_check = None
         self.table = None
+        self.table_model = None
+        self.table_proxy = None
+        self.filter_input = None
         self.progress_label = None
+        self.stats_label = None
+        self.metrics_box = None
+        self.metrics_label = None
         self.progress_bar = None
         self.stop_btn = None
         self.pause_resume_btn = None
@@ -30,7 +66,14 @@ class FileCollectorApp(QWidget):
         self.mode_box = None
         self.browse_btn = None
         self.folder_input = None
+        self.ext_input = None
+        self.exclude_input = None
         self.param_input = None
+        self.dedup_check = None
+        self.scene_gap_label = None
+        self.scene_min_gap_input = None
+        self.scene_max_gap_input = None
+        self.dedup_input = None
         self.setWindowTitle("视频帧提取器")
         self.setGeometry(300, 100, 1000, 600)
 
@@ -39,6 +82,8 @@ class FileCollectorApp(QWidget):
         self.is_paused = False
         self.total_count = 0  # 用于记录所有待处理视频数
         self.last_output_root = None  # 保存最后一次处理的输出根目录
+        self.probe_cache = self.open_probe_cache()
+        self.quarantine = self.open_quarantine()
 
         self.setup_ui()
 
@@ -66,11 +111,31 @@ class FileCollectorApp(QWidget):
         path_layout.addStretch(1)
         layout.addLayout(path_layout)
 
+        # === 扫描范围：视频扩展名与排除规则 ===
+        scan_layout = QHBoxLayout()
+        scan_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        ext_label = QLabel("🎬 扩展名:")
+        self.ext_input = QLineEdit()
+        self.ext_input.setFixedWidth(180)
+        self.ext_input.setText(self.settings.value("scan_extensions", " ".join(DEFAULT_EXTENSIONS)))
+        self.ext_input.setToolTip("以空格或逗号分隔，留空使用默认扩展名")
+        exclude_label = QLabel("排除:")
+        self.exclude_input = QLineEdit()
+        self.exclude_input.setFixedWidth(220)
+        self.exclude_input.setText(self.settings.value("scan_exclude", ""))
+        self.exclude_input.setPlaceholderText("如 *.part;回收站/*")
+        self.exclude_input.setToolTip("以分号分隔的 glob 规则，匹配相对路径或名称的文件 / 目录不扫描；以往的“帧生成_*”目录总是跳过")
+        scan_layout.addWidget(ext_label)
+        scan_layout.addWidget(self.ext_input)
+        scan_layout.addWidget(exclude_label)
+        scan_layout.addWidget(self.exclude_input)
+        layout.addLayout(scan_layout)
+
         mode_layout = QHBoxLayout()
         mode_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         mode_label = QLabel("🎯 提取模式:")
         self.mode_box = QComboBox()
-        self.mode_box.addItems(["每N秒取1帧", "每N帧取1帧"])
+        self.mode_box.addItems(["每N秒取1帧", "每N帧取1帧", "仅关键帧(间隔≥N秒)", "场景切换(阈值N%)"])
         self.mode_box.setCurrentIndex(0)
         self.mode_box.setFixedWidth(200)
         mode_layout.addWidget(mode_label)
@@ -81,14 +146,43 @@ class FileCollectorApp(QWidget):
         self.param_input.setMinimum(1)
         self.param_input.setMaximum(3600)
         self.param_input.setValue(1)
+        self.mode_box.currentIndexChanged.connect(self.on_mode_changed)
         mode_layout.addWidget(param_label)
         mode_layout.addWidget(self.param_input)
+
+        # 场景切换模式：相邻取帧的最小 / 最大间隔（秒）
+        self.scene_gap_label = QLabel("间隔(秒):")
+        self.scene_min_gap_input = QSpinBox()
+        self.scene_min_gap_input.setRange(0, 3600)
+        self.scene_min_gap_input.setValue(1)
+        self.scene_min_gap_input.setPrefix("最小 ")
+        self.scene_max_gap_input = QSpinBox()
+        self.scene_max_gap_input.setRange(0, 3600)
+        self.scene_max_gap_input.setValue(0)
+        self.scene_max_gap_input.setPrefix("最大 ")
+        self.scene_max_gap_input.setSpecialValueText("最大 不限")
+        self.scene_max_gap_input.setToolTip("镜头过长时按该间隔补帧，0 表示不限制")
+        for widget in (self.scene_gap_label, self.scene_min_gap_input, self.scene_max_gap_input):
+            widget.setVisible(False)
+            mode_layout.addWidget(widget)
+
+        # 静态画面（监控、讲课）会产生大量几乎相同的帧，可按与上一保留帧的差异去除
+        self.dedup_check = QCheckBox("去除近似重复帧")
+        self.dedup_check.setToolTip("与上一张保留的帧几乎相同的帧不再输出；阈值越大，去除得越多")
+        self.dedup_input = QSpinBox()
+        self.dedup_input.setRange(1, 100)
+        self.dedup_input.setValue(DEFAULT_DEDUP_THRESHOLD)
+        self.dedup_input.setPrefix("阈值 ")
+        self.dedup_input.setEnabled(False)
+        self.dedup_check.toggled.connect(self.dedup_input.setEnabled)
+        mode_layout.addWidget(self.dedup_check)
+        mode_layout.addWidget(self.dedup_input)
         layout.addLayout(mode_layout)
 
         # === 新增线程数控制行 ===
         thread_layout = QHBoxLayout()
         thread_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        thread_label = QLabel("⚙️ 最大线程数:")
+        thread_label = QLabel("⚙️ 并发视频数:")
         self.thread_input = QComboBox()
         cpu_threads = os.cpu_count() or 4
         for i in range(1, cpu_threads + 1):
@@ -97,6 +191,15 @@ class FileCollectorApp(QWidget):
         self.thread_input.setCurrentIndex(default_threads - 1)
         thread_layout.addWidget(thread_label)
         thread_layout.addWidget(self.thread_input)
+
+        decoder_thread_label = QLabel("单任务解码线程:")
+        self.decoder_thread_input = QComboBox()
+        self.decoder_thread_input.addItem("自动")
+        for i in range(1, cpu_threads + 1):
+            self.decoder_thread_input.addItem(str(i))
+        self.decoder_thread_input.setCurrentIndex(0)
+        thread_layout.addWidget(decoder_thread_label)
+        thread_layout.addWidget(self.decoder_thread_input)
         layout.addLayout(thread_layout)
 
         # === 新增图片格式设置行 ===
@@ -104,9 +207,15 @@ class FileCollectorApp(QWidget):
         format_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         format_label = QLabel("🖼️ 图片格式:")
         self.format_box = QComboBox()
-        self.format_box.addItems(["PNG", "JPG"])
+        # 数据为 (图片编码, 是否写入 tar 分片)
+        self.format_box.addItem("PNG", ("png", False))
+        self.format_box.addItem("JPG", ("jpg", False))
+        self.format_box.addItem("WebP", ("webp", False))
+        self.format_box.addItem("PNG（tar 分片）", ("png", True))
+        self.format_box.addItem("JPG（tar 分片）", ("jpg", True))
+        self.format_box.addItem("WebP（tar 分片）", ("webp", True))
         self.format_box.setCurrentIndex(0)
-        self.format_box.setFixedWidth(100)
+        self.format_box.setFixedWidth(150)
         self.format_box.currentIndexChanged.connect(self.toggle_quality_input)
 
         self.quality_label = QLabel("压缩质量:")
@@ -118,12 +227,126 @@ class FileCollectorApp(QWidget):
         self.quality_label.setVisible(False)
         self.quality_input.setVisible(False)
 
+        # PNG 的 zlib 级别 / WebP 的编码方法，越小越快；最小值表示使用编码器默认值
+        self.compression_label = QLabel("压缩级别:")
+        self.compression_input = QSpinBox()
+        self.compression_input.setSpecialValueText("默认")
+        self.compression_input.setFixedWidth(80)
+        self.compression_input.setToolTip("数值越小编码越快、文件越大；PNG 0-9，WebP 0-6")
+
+        # 大量帧写成单个文件会拖垮文件系统，tar 分片按大小上限顺序写入
+        self.shard_size_label = QLabel("分片大小(MB):")
+        self.shard_size_input = QSpinBox()
+        self.shard_size_input.setRange(16, 65536)
+        self.shard_size_input.setValue(1024)
+        self.shard_size_input.setFixedWidth(100)
+        self.shard_size_label.setVisible(False)
+        self.shard_size_input.setVisible(False)
+
         format_layout.addWidget(format_label)
         format_layout.addWidget(self.format_box)
         format_layout.addWidget(self.quality_label)
         format_layout.addWidget(self.quality_input)
+        format_layout.addWidget(self.compression_label)
+        format_layout.addWidget(self.compression_input)
+        format_layout.addWidget(self.shard_size_label)
+        format_layout.addWidget(self.shard_size_input)
+
+        self.incremental_check = QCheckBox("断点续提")
+        self.incremental_check.setToolTip("沿用参数相同的上一次输出目录，跳过已完成的视频，只重做未完成的")
+        self.incremental_check.setChecked(self.settings.value("incremental", False, type=bool))
+        self.incremental_check.toggled.connect(lambda checked: self.settings.setValue("incremental", checked))
+        format_layout.addWidget(self.incremental_check)
+        self.skip_duplicates_check = QCheckBox("跳过重复视频")
+        self.skip_duplicates_check.setToolTip("内容完全相同的视频只提取一次，其余的输出目录链接到已提取的结果")
+        self.skip_duplicates_check.setChecked(self.settings.value("skip_duplicates", True, type=bool))
+        self.skip_duplicates_check.toggled.connect(lambda checked: self.settings.setValue("skip_duplicates", checked))
+        format_layout.addWidget(self.skip_duplicates_check)
+        self.watch_check = QCheckBox("持续监视")
+        self.watch_check.setToolTip("处理完已有视频后继续监视文件夹，新视频写完即自动提取到固定的“帧生成_watch”目录，点击停止结束")
+        self.watch_check.setChecked(self.settings.value("watch", False, type=bool))
+        self.watch_check.toggled.connect(lambda checked: self.settings.setValue("watch", checked))
+        format_layout.addWidget(self.watch_check)
         layout.addLayout(format_layout)
 
+        # === 输出尺寸：挑帧后先裁剪再缩放，输出越小编码越快 ===
+        size_layout = QHBoxLayout()
+        size_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        size_layout.addWidget(QLabel("📐 输出尺寸 宽:"))
+        self.width_input = QSpinBox()
+        self.width_input.setRange(0, 16384)
+        self.width_input.setSpecialValueText("原始")
+        self.width_input.setFixedWidth(80)
+        size_layout.addWidget(self.width_input)
+        size_layout.addWidget(QLabel("高:"))
+        self.height_input = QSpinBox()
+        self.height_input.setRange(0, 16384)
+        self.height_input.setSpecialValueText("原始")
+        self.height_input.setFixedWidth(80)
+        self.height_input.setToolTip("只设置宽或高时另一边按比例缩放")
+        self.width_input.setToolTip(self.height_input.toolTip())
+        size_layout.addWidget(self.height_input)
+        size_layout.addWidget(QLabel("缩放算法:"))
+        self.scaler_box = QComboBox()
+        for scaler in SCALERS:
+            self.scaler_box.addItem("fast_bilinear（最快）" if scaler == "fast_bilinear" else scaler, scaler)
+        self.scaler_box.setCurrentIndex(SCALERS.index(DEFAULT_SCALER))
+        size_layout.addWidget(self.scaler_box)
+        size_layout.addWidget(QLabel("裁剪:"))
+        self.crop_input = QLineEdit()
+        self.crop_input.setPlaceholderText("宽:高[:x:y]")
+        self.crop_input.setToolTip("缩放前先裁剪到该区域（源视频像素），省略 x:y 时居中裁剪；留空不裁剪")
+        self.crop_input.setFixedWidth(120)
+        size_layout.addWidget(self.crop_input)
+        size_layout.addWidget(QLabel("像素格式:"))
+        self.pix_fmt_box = QComboBox()
+        self.pix_fmt_box.setFixedWidth(110)
+        size_layout.addWidget(self.pix_fmt_box)
+        layout.addLayout(size_layout)
+        self.toggle_quality_input(self.format_box.currentIndex())
+
+        # === 时间范围：只解码指定的片段，全局范围或按视频的片段表 ===
+        range_layout = QHBoxLayout()
+        range_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        range_layout.addWidget(QLabel("⏱️ 时间范围:"))
+        self.range_input = QLineEdit()
+        self.range_input.setPlaceholderText("留空处理整个视频，如 0:30-1:00, 5:00-")
+        self.range_input.setToolTip("只提取这些时间范围，逗号分隔，省略结束表示到视频结尾；"
+                                    "帧文件名以片段编号为前缀（seg01_frame_0001.png）")
+        self.range_input.setFixedWidth(260)
+        range_layout.addWidget(self.range_input)
+        self.segment_label = QLabel("未加载片段表")
+        self.segment_label.setStyleSheet("color: gray;")
+        self.segment_load_btn = QPushButton("加载片段表")
+        self.segment_load_btn.setToolTip("从 CSV 加载按视频指定的时间范围（列为 file,start,end）；"
+                                         "未列入的视频使用左侧的时间范围，左侧为空时不处理")
+        self.segment_load_btn.clicked.connect(self.load_segment_table)
+        self.segment_clear_btn = QPushButton("清除")
+        self.segment_clear_btn.setEnabled(False)
+        self.segment_clear_btn.clicked.connect(lambda: self.set_segment_table(None))
+        range_layout.addWidget(self.segment_label)
+        range_layout.addWidget(self.segment_load_btn)
+        range_layout.addWidget(self.segment_clear_btn)
+        layout.addLayout(range_layout)
+
+        # === 多输出任务：一次解码生成多种输出 ===
+        job_layout = QHBoxLayout()
+        job_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        job_title = QLabel("📋 多输出任务:")
+        self.job_label = QLabel("未加载（使用上方的模式与格式）")
+        self.job_label.setStyleSheet("color: gray;")
+        self.job_load_btn = QPushButton("加载任务定义")
+        self.job_load_btn.setToolTip("从 JSON 文件加载多项输出配置（采样规则、格式、质量、缩放），共用一次解码")
+        self.job_load_btn.clicked.connect(self.load_job_definition)
+        self.job_clear_btn = QPushButton("清除")
+        self.job_clear_btn.setEnabled(False)
+        self.job_clear_btn.clicked.connect(self.clear_job_definition)
+        job_layout.addWidget(job_title)
+        job_layout.addWidget(self.job_label)
+        job_layout.addWidget(self.job_load_btn)
+        job_layout.addWidget(self.job_clear_btn)
+        layout.addLayout(job_layout)
+
         btn_layout = QHBoxLayout()
         btn_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
 
@@ -161,9 +384,42 @@ class FileCollectorApp(QWidget):
         progress_text_layout.addWidget(self.progress_label)
         layout.addLayout(progress_text_layout)
 
-        headers = ["文件名", "所在路径", "类型", "大小(MB)", "时长", "每秒帧数", "截取帧数量"]
-        self.table = SmartTooltipTableWidget(0, len(headers))
-        self.table.setHorizontalHeaderLabels(headers)
+        stats_layout = QHBoxLayout()
+        stats_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.stats_label = QLabel("")
+        self.stats_label.setStyleSheet("color: gray;")
+        stats_layout.addWidget(self.stats_label)
+        layout.addLayout(stats_layout)
+
+        # === 运行结束后的分阶段统计 ===
+        self.metrics_box = QGroupBox("📊 运行统计")
+        metrics_layout = QVBoxLayout(self.metrics_box)
+        self.metrics_label = QLabel("")
+        self.metrics_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        metrics_layout.addWidget(self.metrics_label)
+        self.metrics_box.setVisible(False)
+        layout.addWidget(self.metrics_box)
+
+        # === 结果筛选 ===
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("筛选:"))
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("按任意列内容筛选结果")
+        self.filter_input.setClearButtonEnabled(True)
+        filter_layout.addWidget(self.filter_input)
+        layout.addLayout(filter_layout)
+
+        # 结果保存在模型中，排序与筛选通过代理模型完成，视图只绘制可见行
+        self.table_model = ResultTableModel(self)
+        self.table_proxy = QSortFilterProxyModel(self)
+        self.table_proxy.setSourceModel(self.table_model)
+        self.table_proxy.setSortRole(SORT_ROLE)
+        self.table_proxy.setFilterKeyColumn(-1)
+        self.table_proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.filter_input.textChanged.connect(self.table_proxy.setFilterFixedString)
+        self.table = SmartTooltipTableView()
+        self.table.setModel(self.table_proxy)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         header.setSectionsClickable(True)
@@ -173,7 +429,7 @@ class FileCollectorApp(QWidget):
         self.table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
         self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.table.setStyleSheet("""
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background-color: #e6f7ff;
             }
         """)
@@ -182,57 +438,244 @@ class FileCollectorApp(QWidget):
         self.table.setTextElideMode(Qt.TextElideMode.ElideRight)
         self.table.setMouseTracking(True)
         self.table.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.table.setSortingEnabled(True)
+        # 初始不排序，保持结果的完成顺序
+        self.table.sortByColumn(-1, Qt.SortOrder.AscendingOrder)
 
         layout.addWidget(self.table)
 
         self.setLayout(layout)
-        self.table.cellDoubleClicked.connect(self.open_file_from_table)
+        self.table.doubleClicked.connect(self.open_file_from_table)
         QTimer.singleShot(0, self.auto_resize_columns)
 
+    @staticmethod
+    def open_probe_cache():
+        # 探测缓存不可用（如目录无写权限）时退化为每次重新探测
+        try:
+            return ProbeCache()
+        except Exception as e:
+            print(f"[探测缓存不可用] {e}")
+            return None
+
+    @staticmethod
+    def open_quarantine():
+        # 隔离名单不可用时不跳过、也不记录失败的视频
+        try:
+            return Quarantine()
+        except OSError as e:
+            print(f"[隔离名单不可用] {e}")
+            return None
+
+    def on_mode_changed(self, index):
+        # 关键帧模式下 N=0 表示保留全部关键帧；场景切换模式下 N 为场景分数阈值（%）
+        self.param_input.setMinimum(0 if index == 2 else 1)
+        is_scene = index == 3
+        self.param_input.setMaximum(100 if is_scene else 3600)
+        if is_scene:
+            self.param_input.setValue(30)
+        for widget in (self.scene_gap_label, self.scene_min_gap_input, self.scene_max_gap_input):
+            widget.setVisible(is_scene)
+        self.update_dedup_enabled()
+
+    def update_dedup_enabled(self):
+        # 场景切换模式按检测出的时间点取帧，不支持去重；多输出任务不含场景切换模式
+        allowed = bool(self.output_specs) or self.mode_box.currentIndex() != 3
+        if not allowed:
+            self.dedup_check.setChecked(False)
+        self.dedup_check.setEnabled(allowed)
+
     def toggle_quality_input(self, index):
-        is_jpg = self.format_box.currentText().lower() == "jpg"
-        self.quality_label.setVisible(is_jpg)
-        self.quality_input.setVisible(is_jpg)
-        if is_jpg:
-            self.quality_input.setValue(85)
+        image_format, to_shards = self.format_box.currentData()
+        lossy = image_format in DEFAULT_QUALITY
+        self.quality_label.setVisible(lossy)
+        self.quality_input.setVisible(lossy)
+        if lossy:
+            self.quality_input.setValue(DEFAULT_QUALITY[image_format])
+        has_level = image_format in COMPRESSION_LEVELS
+        self.compression_label.setVisible(has_level)
+        self.compression_input.setVisible(has_level)
+        if has_level:
+            low, high = COMPRESSION_LEVELS[image_format]
+            self.compression_input.setRange(low - 1, high)
+            self.compression_input.setValue(low - 1)
+        self.pix_fmt_box.clear()
+        self.pix_fmt_box.addItem("自动", None)
+        for pix_fmt in PIXEL_FORMATS[image_format]:
+            self.pix_fmt_box.addItem(pix_fmt, pix_fmt)
+        self.shard_size_label.setVisible(to_shards)
+        self.shard_size_input.setVisible(to_shards)
+
+    def load_segment_table(self):
+        start_dir = self.settings.value("last_segment_dir", "") or os.path.expanduser("~")
+        path, _ = QFileDialog.getOpenFileName(self, "选择片段表", start_dir, "CSV 文件 (*.csv)")
+        if not path:
+            return
+        try:
+            table = load_segment_csv(path)
+        except Exception as e:
+            QMessageBox.critical(self, "片段表无效", f"{path}\n\n{e}")
+            return
+        self.settings.setValue("last_segment_dir", os.path.dirname(path))
+        self.set_segment_table(path, sum(len(ranges) for ranges in table.values()), len(table))
+
+    def set_segment_table(self, path, segment_count=0, video_count=0):
+        self.segment_csv = path
+        if path:
+            self.segment_label.setText(f"{os.path.basename(path)}：{video_count} 个视频，{segment_count} 个片段")
+        else:
+            self.segment_label.setText("未加载片段表")
+        self.segment_clear_btn.setEnabled(bool(path))
+
+    def load_job_definition(self):
+        start_dir = self.settings.value("last_job_dir", "") or os.path.expanduser("~")
+        path, _ = QFileDialog.getOpenFileName(self, "选择任务定义", start_dir, "JSON 文件 (*.json)")
+        if not path:
+            return
+        try:
+            specs = load_output_specs(path)
+        except Exception as e:
+            QMessageBox.critical(self, "任务定义无效", f"{path}\n\n{e}")
+            return
+        self.settings.setValue("last_job_dir", os.path.dirname(path))
+        self.set_output_specs(specs, os.path.basename(path))
+
+    def clear_job_definition(self):
+        self.set_output_specs(None)
+
+    def set_output_specs(self, specs, source=""):
+        self.output_specs = specs
+        if specs:
+            self.job_label.setText(f"{source}：{len(specs)} 项输出（{', '.join(s.name for s in specs)}）")
+        else:
+            self.job_label.setText("未加载（使用上方的模式与格式）")
+        # 任务定义中的每项输出自带模式、格式与尺寸 / 裁剪 / 像素格式等编码设置
+        for widget in (self.mode_box, self.param_input, self.format_box, self.quality_input, self.shard_size_input,
+                       self.width_input, self.height_input, self.scaler_box, self.crop_input, self.pix_fmt_box,
+                       self.compression_input):
+            widget.setEnabled(not specs)
+        self.update_dedup_enabled()
+        self.job_clear_btn.setEnabled(bool(specs))
+
+    def on_scan_progress(self, found, finished):
+        self.total_count = found
+        if self.progress_bar.value() == 0 and not finished:
+            self.progress_label.setText(f"正在扫描视频...（已发现 {found} 个）")
+        elif finished and found == 0:
+            self.progress_label.setText("未找到视频文件")
 
     def update_progress(self, filename, done, total):
         self.progress_bar.setValue(int(done / total * 100))
         self.progress_label.setText(f"已完成：{filename}（进度：{done}/{total}）")
 
+    def update_stats(self, stats):
+        text = f"已提取 {stats['batch_frames']} / 约 {stats['expected_frames']} 帧 | {stats['batch_fps']} 帧/秒"
+        if stats.get("eta") is not None:
+            text += f" | 预计剩余 {format_duration(stats['eta'])}"
+        if stats.get("speed"):
+            text += f" | 当前：{stats['file']} {stats['speed']}x"
+        self.stats_label.setText(text)
+
+    def show_metrics(self, summary):
+        stages = summary["stage_seconds"]
+        self.metrics_label.setText(
+            f"总耗时 {summary['wall_seconds']:.1f}s | 视频 {summary['videos']} 个"
+            f"（重复跳过 {summary['duplicate_videos']} 个，隔离跳过 {summary['quarantined_videos']} 个）| "
+            f"帧 {summary['frames']} 张 | 写入 {summary['output_bytes'] / (1024 * 1024):.1f} MB\n"
+            f"扫描 {stages['scan']:.1f}s | 探测 {stages['probe']:.1f}s | 提取 {stages['extract']:.1f}s"
+            f"（各视频累计）| ffmpeg CPU {summary['ffmpeg_cpu_seconds']:.1f}s | "
+            f"本进程 CPU {summary['process_cpu_seconds']:.1f}s\n"
+            f"详细指标：metrics.jsonl / metrics.prom（位于输出目录）"
+        )
+        self.metrics_box.setVisible(True)
+
     def start_process(self):
         folder = self.folder_input.text().strip()
         if not folder or not os.path.isdir(folder):
             QMessageBox.critical(self, "错误", "请选择有效的文件夹")
             return
+        if (self.mode_box.currentIndex() == 3 and self.scene_max_gap_input.value()
+                and self.scene_max_gap_input.value() < self.scene_min_gap_input.value()):
+            QMessageBox.critical(self, "错误", "场景切换的最大间隔不能小于最小间隔")
+            return
+        try:
+            parse_crop(self.crop_input.text())
+            time_ranges = [list(r) for r in parse_ranges(self.range_input.text())]
+        except ValueError as e:
+            QMessageBox.critical(self, "错误", str(e))
+            return
 
-        file_list = [os.path.join(dp, f) for dp, dn, filenames in os.walk(folder) for f in filenames]
-        video_files = [f for f in file_list if os.path.splitext(f)[1].lower() in ['.mp4', '.avi', '.mov', '.mkv']]
-        self.total_count = len(video_files)
+        # 视频总数由引擎流式扫描时逐步上报，这里不再预先遍历文件夹
+        self.total_count = 0
+        extensions = parse_extensions(self.ext_input.text())
+        exclude = parse_patterns(self.exclude_input.text())
+        self.settings.setValue("scan_extensions", self.ext_input.text())
+        self.settings.setValue("scan_exclude", self.exclude_input.text())
 
         self.folder_input.setEnabled(False)
         self.browse_btn.setEnabled(False)
-        self.table.setRowCount(0)
+        self.table_model.clear()
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
-        self.progress_label.setText("开始提取...")
+        self.progress_label.setText("正在扫描视频...")
+        self.stats_label.setText("")
+        self.metrics_box.setVisible(False)
 
         mode = self.mode_box.currentIndex()
         param = self.param_input.value()
         thread_count = int(self.thread_input.currentText())
-        image_format = self.format_box.currentText().lower()
-        quality = self.quality_input.value() if image_format == 'jpg' else None
-
-        self.worker = WorkerThread(
-            folder, mode, param,
-            max_threads=thread_count,
-            image_format=image_format,
-            jpg_quality=quality
-        )
+        decoder_text = self.decoder_thread_input.currentText()
+        decoder_threads = int(decoder_text) if decoder_text.isdigit() else None
+        image_format, to_shards = self.format_box.currentData()
+        quality = self.quality_input.value() if image_format in DEFAULT_QUALITY else None
+        compression_level = None
+        if image_format in COMPRESSION_LEVELS and self.compression_input.value() >= COMPRESSION_LEVELS[image_format][0]:
+            compression_level = self.compression_input.value()
+        shard_size = self.shard_size_input.value() * 1024 * 1024 if to_shards else None
+
+        try:
+            # 构造引擎时会读取片段表、清单与编码参数，出错时提示并恢复界面
+            self.worker = WorkerThread(
+                folder, mode, param,
+                max_threads=thread_count,
+                image_format=image_format,
+                jpg_quality=quality,
+                decoder_threads=decoder_threads,
+                probe_cache=self.probe_cache,
+                quarantine=self.quarantine,
+                incremental=self.incremental_check.isChecked(),
+                shard_size=None if self.output_specs else shard_size,
+                output_specs=self.output_specs,
+                dedup_threshold=self.dedup_input.value() if self.dedup_check.isChecked() else None,
+                scene_min_gap=self.scene_min_gap_input.value(),
+                scene_max_gap=self.scene_max_gap_input.value(),
+                width=self.width_input.value() or None,
+                height=self.height_input.value() or None,
+                scaler=self.scaler_box.currentData(),
+                crop=self.crop_input.text().strip() or None,
+                pix_fmt=self.pix_fmt_box.currentData(),
+                compression_level=compression_level,
+                time_ranges=time_ranges,
+                segment_csv=self.segment_csv,
+                extensions=extensions,
+                exclude=exclude,
+                skip_duplicates=self.skip_duplicates_check.isChecked(),
+                watch=self.watch_check.isChecked()
+            )
+        except (ValueError, OSError) as e:
+            self.worker = None
+            QMessageBox.critical(self, "错误", str(e))
+            self.progress_bar.setVisible(False)
+            self.progress_label.setText("❌ 出现错误")
+            self.folder_input.setEnabled(True)
+            self.browse_btn.setEnabled(True)
+            return
         self.worker.progress.connect(self.update_progress)
         self.worker.finished.connect(self.on_worker_finished)
         self.worker.error.connect(self.show_error)
         self.worker.itemReady.connect(self.append_table_item)
+        self.worker.statsUpdated.connect(self.update_stats)
+        self.worker.metricsReady.connect(self.show_metrics)
+        self.worker.scanProgress.connect(self.on_scan_progress)
 
         self.worker.modeNotice.connect(lambda text: QMessageBox.information(self, "处理模式", text))
         self.worker.start()
@@ -246,13 +689,17 @@ class FileCollectorApp(QWidget):
     def resize_column_to_contents(self, logical_index):
         self.table.resizeColumnToContents(logical_index)
 
-    def open_file_from_table(self, row, column):
-        filename_item = self.table.item(row, 0)
-        if not filename_item or not self.last_output_root:
+    def open_file_from_table(self, index):
+        if not index.isValid() or not self.last_output_root:
             return
 
-        video_name = filename_item.text().strip()
-        output_dir = os.path.join(self.last_output_root, os.path.splitext(video_name)[0])
+        info = self.table_model.info_at(self.table_proxy.mapToSource(index).row())
+        # 输出子目录保留了源文件夹中的相对路径；旧版本续提记录中没有该字段，按文件名推断
+        rel_dir = info.get("输出目录") or os.path.splitext(info["文件名"].strip())[0]
+        output_dir = os.path.join(self.last_output_root, rel_dir)
+        if not os.path.exists(output_dir):
+            # tar 分片模式下没有单独的帧目录，打开分片所在的输出根目录
+            output_dir = self.last_output_root
 
         self.open_output_folder(output_dir)
 
@@ -278,7 +725,8 @@ class FileCollectorApp(QWidget):
             self.settings.setValue("last_folder", folder)
 
     def auto_resize_columns(self):
-        column_count = self.table.columnCount()
+        # 列宽只在窗口首次显示时计算一次，之后由用户拖动或双击表头调整
+        column_count = self.table_model.columnCount()
         viewport_width = self.table.viewport().width()
         if viewport_width <= 0:
             return
@@ -321,6 +769,7 @@ class FileCollectorApp(QWidget):
 
         # 保存输出根目录，保证任务完成后仍可打开
         self.last_output_root = self.worker.output_root if self.worker else None
+        self.table_model.flush()
         self.worker = None
 
         if self.last_output_root and os.path.exists(self.last_output_root):
@@ -335,16 +784,7 @@ class FileCollectorApp(QWidget):
                 self.open_output_folder(self.last_output_root)
 
     def append_table_item(self, item):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        self.table.setItem(row, 0, QTableWidgetItem(item["文件名"]))
-        self.table.setItem(row, 1, QTableWidgetItem(item["所在路径"]))
-        self.table.setItem(row, 2, QTableWidgetItem(item["类型"]))
-        self.table.setItem(row, 3, QTableWidgetItem(str(item["大小(MB)"])))
-        self.table.setItem(row, 4, QTableWidgetItem(item["时长"]))
-        self.table.setItem(row, 5, QTableWidgetItem(str(item["每秒帧数"])))
-        self.table.setItem(row, 6, QTableWidgetItem(str(item["截取帧数量"])))
-        self.auto_resize_columns()
+        self.table_model.append(item)
 
     def show_error(self, msg):
         QMessageBox.critical(self, "错误", msg)